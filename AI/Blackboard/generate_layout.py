@@ -0,0 +1,253 @@
+#! /usr/bin/env python
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Gera o layout do blackboard (include/blackboard_layout.h e src/blackboard_layout.py) a partir
+# de blackboard.schema, para que c++ e python usem sempre os mesmos índices.
+#
+# python generate_layout.py           gera os arquivos
+# python generate_layout.py --check   só verifica se os arquivos gerados estão atualizados
+
+import os
+import re
+import sys
+import zlib
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA = os.path.join(HERE, 'blackboard.schema')
+HEADER = os.path.join(HERE, 'include', 'blackboard_layout.h')
+MODULE = os.path.join(HERE, 'src', 'blackboard_layout.py')
+
+MAGIC = 0x52464242 # 'RFBB'
+TYPES = {'int32': 1, 'float32': 1, 'float64': 2} # Palavras de 4 bytes ocupadas por cada tipo
+SECTIONS = (('int32', 'variable_int', 'Inteiros'), ('float32', 'variable_float', 'Floats'),
+            ('float64', 'variable_double', 'Doubles'))
+
+
+class SchemaError(Exception):
+    pass
+
+
+class Layout(object): # Campos do schema, já expandidos e com a posição de cada um no segmento
+
+    def __init__(self, text, filename = SCHEMA):
+        self.version = None
+        self.regions = {}  # tipo -> [primeira palavra, número de elementos ou None]
+        self.fields = {}   # tipo -> [(nome, índice)], na ordem do schema
+        self.arrays = {}   # nome base -> (tipo, [nomes dos elementos])
+        self.filename = filename
+
+        for number, line in enumerate(text.splitlines(), 1):
+            words = line.split('#', 1)[0].split()
+            if not words:
+                continue
+            try:
+                self._Parse(words)
+            except (ValueError, IndexError):
+                raise SchemaError('%s:%d: linha inválida: %s' % (filename, number, line.strip()))
+            except SchemaError as e:
+                raise SchemaError('%s:%d: %s' % (filename, number, e))
+        self._Validate()
+
+    def _Parse(self, words):
+        if words[0] == 'version':
+            self.version = int(words[1])
+        elif words[0] == 'region':
+            if words[1] not in TYPES:
+                raise SchemaError('tipo desconhecido %s' % words[1])
+            self.regions[words[1]] = [int(words[2]), None if words[3] == '*' else int(words[3])]
+        elif words[0] in TYPES:
+            tp, name, index = words[0], words[1], int(words[2])
+            if tp not in self.regions:
+                raise SchemaError('campo %s antes da região %s' % (name, tp))
+            fields = self.fields.setdefault(tp, [])
+            if len(words) == 3:
+                fields.append((name, index))
+                return
+            count = int(words[3].strip('[]'))
+            step = int(words[4]) if len(words) > 4 else 1
+            if '%' not in name:
+                raise SchemaError('o nome do array %s não tem %%d' % name)
+            base = re.sub('_+', '_', re.sub('%[0-9]*d', '', name)).strip('_')
+            names = [name % (i+1) for i in xrange(count)]
+            fields.extend((n, index + i*step) for i, n in enumerate(names))
+            self.arrays[base] = (tp, names)
+        else:
+            raise ValueError(words[0])
+
+    def _Validate(self):
+        if self.version is None:
+            raise SchemaError('%s: falta a versão' % self.filename)
+        if self.regions.get('int32', [None])[0] != 0:
+            raise SchemaError('%s: a região int32 deve começar na palavra 0' % self.filename)
+        if self.regions.get('float64', [0])[0] % 2:
+            raise SchemaError('%s: a região float64 deve começar numa palavra par' % self.filename)
+
+        # Cada palavra do segmento pertence a uma única região e a um único campo
+        owner = {}
+        for tp, (start, count) in self.regions.items():
+            size = TYPES[tp]
+            fields = self.fields.get(tp, [])
+            if count is None:
+                count = max([index for name, index in fields] + [-1]) + 1
+                self.regions[tp][1] = count
+            for name, index in fields:
+                if not 0 <= index < count:
+                    raise SchemaError('%s: %s (%d) fora da região %s' % (self.filename, name, index, tp))
+            for word in xrange(start, start + count*size):
+                if word in owner:
+                    raise SchemaError('%s: regiões %s e %s sobrepostas' % (self.filename, owner[word], tp))
+                owner[word] = tp
+
+        names = {}
+        for tp, fields in self.fields.items():
+            for name, index in fields:
+                if name in names:
+                    raise SchemaError('%s: %s declarado duas vezes' % (self.filename, name))
+                names[name] = (tp, index)
+            used = {}
+            for name, index in fields:
+                if index in used:
+                    raise SchemaError('%s: %s e %s no mesmo índice %d' % (self.filename, used[index], name, index))
+                used[index] = name
+
+        # Tamanho do segmento: até o fim da última região, múltiplo de 64 bytes
+        end = max(start + count*TYPES[tp] for tp, (start, count) in self.regions.items()) * 4
+        self.size = (end + 63) // 64 * 64
+
+        # Grupos de mudança: um par CHANGE_<G>/WAITERS_<G> por grupo, um bit de futex cada
+        self.groups = []
+        for name, index in self.fields.get('int32', []):
+            if name.startswith('CHANGE_'):
+                group = name[len('CHANGE_'):]
+                if names.get('WAITERS_' + group, ('',))[0] != 'int32':
+                    raise SchemaError('%s: %s sem WAITERS_%s' % (self.filename, name, group))
+                self.groups.append((group, index, names['WAITERS_' + group][1]))
+        if 'OTHER' not in [group for group, counter, waiters in self.groups]:
+            raise SchemaError('%s: falta o grupo CHANGE_OTHER/WAITERS_OTHER' % self.filename)
+        if len(self.groups) > 32:
+            raise SchemaError('%s: mais de 32 grupos de mudança' % self.filename)
+
+    def Offset(self, tp):
+        return self.regions[tp][0] if tp in self.regions else 0
+
+    def Hash(self): # Muda com qualquer campo, tipo, posição ou versão
+        words = []
+        for tp, fields in sorted(self.fields.items()):
+            for name, index in fields:
+                words.append('%s %s %d' % (tp, name, self.Offset(tp) + index*TYPES[tp]))
+        text = '%d|%d|%s' % (self.version, self.size, ';'.join(sorted(words)))
+        value = zlib.crc32(text.encode('utf-8')) & 0xffffffff
+        return value - (1 << 32) if value >= (1 << 31) else value # Como int32 com sinal
+
+    def WordGroups(self): # Grupo de mudança de cada palavra do segmento
+        ids = dict((group, i) for i, (group, counter, waiters) in enumerate(self.groups))
+        words = [ids['OTHER']] * (self.size // 4)
+        for tp, fields in self.fields.items():
+            for name, index in fields:
+                prefix = name.split('_')[1 if name.startswith('SEQ_') else 0]
+                word = self.Offset(tp) + index*TYPES[tp]
+                words[word:word + TYPES[tp]] = [ids.get(prefix, ids['OTHER'])] * TYPES[tp]
+        return words
+
+    def Header(self):
+        lines = ['/* Gerado por generate_layout.py a partir de blackboard.schema, não edite. */',
+                 '#ifndef BLACKBOARD_LAYOUT_H',
+                 '#define BLACKBOARD_LAYOUT_H',
+                 '',
+                 '#define BLACKBOARD_LAYOUT_MAGIC 0x%08x' % MAGIC,
+                 '#define BLACKBOARD_LAYOUT_VERSION %d' % self.version,
+                 '#define BLACKBOARD_LAYOUT_HASH ((int)0x%08x)' % (self.Hash() & 0xffffffff),
+                 '#define BLACKBOARD_SIZE %d // Tamanho do segmento em bytes' % self.size,
+                 '#define BLACKBOARD_WORDS %d' % (self.size // 4),
+                 '#define BLACKBOARD_FLOAT_OFFSET %d // Palavra onde começam os floats' % self.Offset('float32'),
+                 '#define BLACKBOARD_DOUBLE_OFFSET %d // Palavra onde começam os doubles' % self.Offset('float64')]
+        for tp, variable, title in SECTIONS:
+            lines += ['', '//---- %s %s' % (title, '-' * (60 - len(title)))]
+            lines += ['#define %s %d' % (name, index) for name, index in self.fields.get(tp, [])]
+        lines += ['', '//---- Arrays: NOME(n) é o índice do elemento n, de 1 a NOME_COUNT ------------']
+        for base, (tp, names) in sorted(self.arrays.items()):
+            first, step = self._Array(tp, names)
+            lines.append('#define %s(n) (%d + ((n)-1)*%d)' % (base, first, step))
+            lines.append('#define %s_COUNT %d' % (base, len(names)))
+        lines += ['', '//---- Grupos de mudança: contadores e grupo de cada palavra -------------------',
+                  '#define BLACKBOARD_CHANGE_GROUPS %d' % len(self.groups),
+                  'static const int BLACKBOARD_CHANGE_COUNTER[BLACKBOARD_CHANGE_GROUPS] = {%s};' %
+                  ', '.join(str(counter) for group, counter, waiters in self.groups),
+                  'static const int BLACKBOARD_CHANGE_WAITERS[BLACKBOARD_CHANGE_GROUPS] = {%s};' %
+                  ', '.join(str(waiters) for group, counter, waiters in self.groups),
+                  'static const unsigned char BLACKBOARD_CHANGE_GROUP[BLACKBOARD_WORDS] = {']
+        lines += self._Rows(self.WordGroups()) + ['};']
+        lines += ['', '#endif', '']
+        return '\n'.join(lines)
+
+    def _Array(self, tp, names):
+        index = dict(self.fields[tp])
+        first = index[names[0]]
+        step = index[names[1]] - first if len(names) > 1 else 1
+        return first, step
+
+    def _Rows(self, values, width = 32):
+        return ['    %s,' % ', '.join(str(v) for v in values[i:i + width]) for i in xrange(0, len(values), width)]
+
+    def Module(self):
+        lines = ['#coding: utf-8',
+                 '# Gerado por generate_layout.py a partir de blackboard.schema, não edite.',
+                 '',
+                 'LAYOUT_MAGIC = 0x%08x' % MAGIC,
+                 'LAYOUT_VERSION = %d' % self.version,
+                 'LAYOUT_HASH = %d' % self.Hash(),
+                 'SIZE = %d          # Tamanho do segmento em bytes' % self.size,
+                 'FLOAT_OFFSET = %d   # Palavra onde começam os floats' % self.Offset('float32'),
+                 'DOUBLE_OFFSET = %d  # Palavra onde começam os doubles' % self.Offset('float64')]
+        for tp, variable, title in SECTIONS:
+            lines += ['', '%s = {' % variable]
+            lines += ["    '%s': %d," % (name, index) for name, index in self.fields.get(tp, [])]
+            lines.append('}')
+        lines += ['', '# Arrays: nome base -> nomes dos elementos 1..n', 'arrays = {']
+        for base, (tp, names) in sorted(self.arrays.items()):
+            lines.append("    '%s': [%s]," % (base, ', '.join("'%s'" % n for n in names)))
+        lines += ['}', '', '# Grupos de mudança: (nome, contador, contador de quem espera), na ordem dos bits',
+                  'change_groups = [']
+        lines += ["    ('%s', %d, %d)," % group for group in self.groups]
+        lines += [']', '', '# Grupo de mudança de cada palavra do segmento', 'change_group = [']
+        lines += self._Rows(self.WordGroups()) + [']', '']
+        return '\n'.join(lines)
+
+
+def Generate(check = False):
+    with open(SCHEMA) as f:
+        layout = Layout(f.read())
+
+    stale = []
+    for filename, text in ((HEADER, layout.Header()), (MODULE, layout.Module())):
+        current = None
+        if os.path.exists(filename):
+            with open(filename) as f:
+                current = f.read()
+        if current == text:
+            continue
+        stale.append(filename)
+        if not check:
+            with open(filename, 'w') as f:
+                f.write(text)
+    return layout, stale
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Blackboard layout generator', epilog= 'Generates the C and Python layout from blackboard.schema')
+    parser.add_argument('--check', action="store_true", help = 'only checks that the generated files are up to date')
+    args = parser.parse_args()
+
+    try:
+        layout, stale = Generate(args.check)
+    except SchemaError as e:
+        print >> sys.stderr, e
+        sys.exit(2)
+
+    for filename in stale:
+        print ('desatualizado: ' if args.check else 'gerado: ') + os.path.relpath(filename, HERE)
+    print 'layout versão %d, hash %08x, %d bytes' % (layout.version, layout.Hash() & 0xffffffff, layout.size)
+    sys.exit(1 if args.check and stale else 0)
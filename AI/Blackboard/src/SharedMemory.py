@@ -13,27 +13,151 @@
 import ctypes
 import time
 import os
+try:
+    from configparser import ConfigParser
+except ImportError:
+    from ConfigParser import ConfigParser  # ver. < 3.0
 
+# Layout gerado a partir de Blackboard/blackboard.schema (python generate_layout.py)
+import blackboard_layout as layout
+from blackboard_layout import SIZE, FLOAT_OFFSET, DOUBLE_OFFSET
+from blackboard_python import LIBRARIES, PythonLibrary
+
+WORDS = SIZE//4    # Uma marca de tempo (double) por palavra do segmento, em outro segmento
+NEVER = float('inf') # Idade de uma variável que nunca foi escrita
+
+LIBRARY_PATHS = ('../../build/lib/libblackboardpy.so', '../AI/build/lib/libblackboardpy.so')
+
+# Backend padrão, escolhido pela variável de ambiente BLACKBOARD_BACKEND ou pela opção backend
+# da seção [Blackboard] do config.ini: 'ctypes' chama a library em c++ a cada acesso, 'numpy'
+# indexa o segmento diretamente, 'python' faz o mesmo que a library sem precisar compilá-la e
+# 'mmap' usa um arquivo em vez do segmento System V (só entre processos python)
+def default_backend(config_file='../../Control/Data/config.ini'):
+    if 'BLACKBOARD_BACKEND' in os.environ:
+        return os.environ['BLACKBOARD_BACKEND']
+    config = ConfigParser()
+    config.read(config_file)
+    if config.has_option('Blackboard', 'backend'):
+        return config.get('Blackboard', 'backend')
+    return 'ctypes'
+
+# Chave do segmento: BLACKBOARD_KEY no ambiente troca a chave do robô por outra, para rodar os
+# processos sobre um segmento particular (replay.py) sem mexer no blackboard do robô
+def blackboard_key(KEY):
+    return int(os.environ.get('BLACKBOARD_KEY', KEY))
+
+# Segmento criado com outro layout (outra versão do schema ou library desatualizada)-------
+class LayoutError(Exception):
+    pass
+
+# Valores lidos por snapshot, acessados por snap['NOME'] ou snap.NOME-----------------------
+class Snapshot(dict):
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+# Escritas de um grupo, aplicadas juntas ao sair do bloco with-----------------------------
+# As escritas são feitas no próprio objeto (group.write_int(mem, 'NOME', valor), com a mesma
+# assinatura do SharedMemory), sem trocar as funções do SharedMemory, que pode ser usado por
+# outras threads enquanto o grupo está aberto.
+class GroupWrite(object):
+
+    def __init__(self, bkb, mem, name):
+        self.bkb = bkb
+        self.mem = mem
+        self.index = ctypes.c_int(bkb.variable_int[bkb.groups[name][0]])
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    # Guarda as escritas em vez de aplicá-las, para o grupo ficar aberto o menor tempo possível
+    def write_float(self, mem, variable, value):
+        self.pending.append(('write_float', (mem, variable, value)))
+
+    def write_floatDynamic(self, mem, variable, index, value):
+        self.pending.append(('write_floatDynamic', (mem, variable, index, value)))
+
+    def write_int(self, mem, variable, value):
+        self.pending.append(('write_int', (mem, variable, value)))
+
+    def write_double(self, mem, variable, value):
+        self.pending.append(('write_double', (mem, variable, value)))
+
+    def __exit__(self, *exc):
+        pending, self.pending = self.pending, []
+        if exc[0] is not None: # o bloco falhou: um grupo incompleto não é publicado
+            return False
+        self.bkb.testlib.seq_write_begin(self.mem, self.index)
+        try:
+            for name, args in pending: # funções atuais (da classe ou do backend)
+                getattr(self.bkb, name)(*args)
+        finally:
+            self.bkb.testlib.seq_write_end(self.mem, self.index)
+        return False
 
 # Classe do BlackBoard--------------------------------------------------------------------
 class SharedMemory(object):
 # Classe que lê e escreve na memória compartilhada do sistema '''
 
-    def shd_constructor(self,KEY):
+    def shd_constructor(self,KEY,backend=None):
         #print "Start the Class Blackboard"
-        # Usando memoria compartilhada a partir das funções do c++-------------------------------------------------------
-        try:
-            self.testlib = ctypes.CDLL('../../build/lib/libblackboardpy.so') #chama a library que contem as funções em c++
-        except OSError:
-            self.testlib = ctypes.CDLL('../AI/build/lib/libblackboardpy.so') #chama a library que contem as funções em c++
-        self.testlib.using_shared_memory.restype = ctypes.POINTER(ctypes.c_int)
+        backend = backend or default_backend()
+        KEY = blackboard_key(KEY)
+        if backend in LIBRARIES:
+            self.testlib = LIBRARIES[backend]() # as mesmas funções, em python
+        else:
+            self.testlib = self.load_library()
         mem = self.testlib.using_shared_memory(KEY)         #using c++ function
         #print 'python', mem
-        self.testlib.read_float.restype = ctypes.c_float #defining the return type, that case defining float
-        self.testlib.read_int.restype = ctypes.c_int #defining the return type, that case defining int
+        self.check_layout(mem, KEY)
+        if backend == 'numpy':
+            self.numpy_view(mem)
         return mem
         #--------------------------------------------------------------------------------------------------------------------
 
+    # Usando memoria compartilhada a partir das funções do c++-------------------------------------
+    def load_library(self):
+        for path in LIBRARY_PATHS:
+            try:
+                testlib = ctypes.CDLL(path) #chama a library que contem as funções em c++
+                break
+            except OSError:
+                pass
+        else: # sem a library compilada (simulação, testes): as mesmas funções em python
+            print 'libblackboardpy.so not found, using the python backend'
+            return PythonLibrary()
+        testlib.using_shared_memory.restype = ctypes.POINTER(ctypes.c_int)
+        testlib.read_float.restype = ctypes.c_float #defining the return type, that case defining float
+        testlib.read_int.restype = ctypes.c_int #defining the return type, that case defining int
+        testlib.read_double.restype = ctypes.c_double
+        testlib.seq_read_begin.restype = ctypes.c_int
+        testlib.seq_read_retry.restype = ctypes.c_int
+        testlib.wait_for_change.restype = ctypes.c_int
+        testlib.wait_for_groups.restype = ctypes.c_int
+        testlib.blackboard_now.restype = ctypes.c_double
+        testlib.timestamps.restype = ctypes.POINTER(ctypes.c_double)
+        testlib.age_int.restype = ctypes.c_double
+        testlib.age_float.restype = ctypes.c_double
+        testlib.age_double.restype = ctypes.c_double
+        return testlib
+    #-----------------------------------------------------------------------------------------
+
+    # Confere se o segmento tem o layout deste módulo, em vez de corromper os dados------------
+    def check_layout(self, mem, KEY):
+        if not mem: # a library já recusou o segmento
+            raise LayoutError('blackboard %d: segmento com outro layout, veja a mensagem acima' % KEY)
+        header = (ctypes.c_int * FLOAT_OFFSET).from_address(ctypes.addressof(mem.contents))
+        found = (header[self.variable_int['BLACKBOARD_MAGIC']], header[self.variable_int['BLACKBOARD_LAYOUT']],
+                 header[self.variable_int['BLACKBOARD_HASH']])
+        if found != (layout.LAYOUT_MAGIC, layout.LAYOUT_VERSION, layout.LAYOUT_HASH):
+            raise LayoutError('blackboard %d: layout %d (hash %08x) do python diferente do segmento, layout %d (hash %08x);'
+                              ' rode generate_layout.py e recompile a library' % (KEY, layout.LAYOUT_VERSION,
+                              layout.LAYOUT_HASH & 0xffffffff, found[1], found[2] & 0xffffffff))
+    #-----------------------------------------------------------------------------------------
+
     # Criando função que escreve float--------------------------------------------------------
     def write_float(self, mem, variable, value):
         self.testlib.write_float(mem, ctypes.c_int(self.variable_float[variable]), ctypes.c_float(value))
@@ -55,208 +179,254 @@ class SharedMemory(object):
         return self.testlib.read_float(mem, ctypes.c_int(self.variable_float[variable]))
     #-----------------------------------------------------------------------------------------
 
+    # Criando função que lê float--------------------------------------------------------
+    def read_floatDynamic(self, mem, variable, index):
+        return self.testlib.read_float(mem, ctypes.c_int(self.variable_float[variable]+index))
+    #-----------------------------------------------------------------------------------------
+
     # Criando função que lê float--------------------------------------------------------
     def read_int(self, mem, variable):
         return self.testlib.read_int(mem, ctypes.c_int(self.variable_int[variable]))
     #-----------------------------------------------------------------------------------------
 
-    variable_int = {
-    'PLANNING_COMMAND' : 0,
-    'PLANNING_PARAMETER_VEL': 1,
-    'PLANNING_PARAMETER_ANGLE': 2,
-    'IMU_STATE' : 3,
-    'IMU_RESET': 4,
-    'CONTROL_ACTION': 13,
-    'CONTROL_HEIGHT_A': 14,
-    'CONTROL_HEIGHT_B': 15,
-    'CONTROL_HEIGHT_C': 16,
-    'DECISION_ACTION_A': 17,
-    'DECISION_ACTION_B': 18,
-    'DECISION_STATE': 19,
-    'DECISION_POSITION_A': 20,
-    'DECISION_POSITION_B': 21,
-    'DECISION_POSITION_C': 22,
-    'DECISION_BALL_POS': 23,
-    'DECISION_OPP1_POS': 24,
-    'DECISION_OPP2_POS': 25,
-    'DECISION_OPP3_POS': 26,
-    'COM_ACTION_ROBOT1': 27,
-    'COM_ACTION_ROBOT2': 28,
-    'COM_ACTION_ROBOT3': 29,
-    'COM_STATE_ROBOT1': 30,
-    'COM_STATE_ROBOT2': 31,
-    'COM_STATE_ROBOT3': 32,
-    'COM_POS_ROBOT1': 33,
-    'COM_POS_ROBOT2': 34,
-    'COM_POS_ROBOT3': 35,
-    'COM_POS_BALL_ROBOT1': 36,
-    'COM_POS_BALL_ROBOT2': 37,
-    'COM_POS_BALL_ROBOT3': 38,
-    'COM_POS_OPP_A_ROBOT1': 39,
-    'COM_POS_OPP_A_ROBOT2': 40,
-    'COM_POS_OPP_A_ROBOT3': 41,
-    'COM_POS_OPP_A_ROBOT4': 42,
-    'COM_POS_OPP_B_ROBOT1': 43,
-    'COM_POS_OPP_B_ROBOT2': 44,
-    'COM_POS_OPP_B_ROBOT3': 45,
-    'COM_POS_OPP_B_ROBOT4': 46,
-    'COM_POS_OPP_C_ROBOT1': 47,
-    'COM_POS_OPP_C_ROBOT2': 48,
-    'COM_POS_OPP_C_ROBOT3': 49,
-    'COM_POS_OPP_C_ROBOT4': 50,
-    'COM_REFEREE': 51,
-    'LOCALIZATION_X': 52,
-    'LOCALIZATION_Y': 53,
-    'LOCALIZATION_THETA': 54,
-    'VISION_LOST': 57,
-    'DECISION_SEARCH_ON': 58,
-    'DECISION_ACTION_VISION': 59,
-    'VISION_MOTOR1_GOAL': 60,
-    'VISION_MOTOR2_GOAL': 61,
-    'VISION_SEARCH_GOAL': 62,
-    'VISION_LOST_GOAL': 63,
-    'VISION_STATE': 64,
-    'ROBOT_NUMBER': 65,
-    'VISION_pos_servo1': 66,
-    'VISION_pos_servo2': 67,
-    'COM_POS_ORIENT_QUALIT_ROBOT_A': 68,
-    'COM_POS_DIST_QUALIT_ROBOT_A': 69,
-    'COM_POS_ORIENT_QUALIT_ROBOT_B': 70,
-    'COM_POS_DIST_QUALIT_ROBOT_B': 71,
-    'COM_POS_ORIENT_QUALIT_ROBOT_C': 72,
-    'COM_POS_DIST_QUALIT_ROBOT_C': 73,
-    'VISION_DELTA_ORIENT': 74,
-    'LOCALIZATION_FIND_ROBOT': 75,
-    'RECEIVED_ROBOT_SENDING': 76,
-    'RECEIVED_QUAL_ORIENT': 77,
-    'RECEIVED_QUAL_DIST': 78,
-    'RECEIVED_ROBOT_SEEN': 79,
-    'CONTROL_MESSAGES': 80,
-    'ASKED_QUALIT_DIRECT': 81,
-    'ASKED_QUALIT_DISTANCE': 82,
-    'ASKED_RELATED_ROBOT': 83,
-    'CONTROL_MOVING': 84,
-    'ROBOT_VIEW_ROTATE': 100,
-    }
+    # Escreve e lê doubles (float64)-----------------------------------------------------------
+    def write_double(self, mem, variable, value):
+        self.testlib.write_double(mem, ctypes.c_int(self.variable_double[variable]), ctypes.c_double(value))
+
+    def read_double(self, mem, variable):
+        return self.testlib.read_double(mem, ctypes.c_int(self.variable_double[variable]))
+    #-----------------------------------------------------------------------------------------
+
+    # Lê várias variáveis de uma vez, a partir de uma única cópia do segmento-----------------
+    def snapshot(self, mem, keys):
+        copy = (ctypes.c_char * SIZE)()
+        ctypes.memmove(copy, mem, SIZE) # uma única cópia, todos os valores do mesmo instante
+        ints = (ctypes.c_int * FLOAT_OFFSET).from_buffer(copy)
+        floats = (ctypes.c_float * (DOUBLE_OFFSET - FLOAT_OFFSET)).from_buffer(copy, FLOAT_OFFSET*4)
+        doubles = (ctypes.c_double * ((SIZE - DOUBLE_OFFSET*4)//8)).from_buffer(copy, DOUBLE_OFFSET*4)
+        snap = Snapshot()
+        for key in keys:
+            if key in self.variable_int:
+                snap[key] = ints[self.variable_int[key]]
+            elif key in self.variable_float:
+                snap[key] = floats[self.variable_float[key]]
+            else:
+                snap[key] = doubles[self.variable_double[key]]
+        return snap
+
+    def read_many(self, mem, keys):
+        snap = self.snapshot(mem, keys)
+        return [snap[key] for key in keys]
+
+    # Arrays do schema (um elemento por robô, por exemplo), pelo nome base: 'VISION_RBT_DIST'
+    def read_array(self, mem, name):
+        return self.read_many(mem, self.arrays[name])
+
+    def write_array(self, mem, name, values):
+        for key, value in zip(self.arrays[name], values):
+            if key in self.variable_int:
+                self.write_int(mem, key, value)
+            else:
+                self.write_float(mem, key, value)
+    #-----------------------------------------------------------------------------------------
+
+    # Escrita e leitura consistente de grupos de variáveis (seqlock)---------------------------
+    # Um único processo escreve em cada grupo. As escritas feitas pelo objeto de group() são
+    # guardadas e aplicadas juntas no final, entre os incrementos do contador do grupo (nenhuma, se
+    # o bloco with falhar), e read_group() repete a cópia do segmento até que nenhuma escrita do
+    # grupo a tenha interrompido.
+    #
+    # with bkb.group(mem, 'VISION') as group:
+    #     group.write_int(mem, 'VISION_LOST', 0)
+    def group(self, mem, name):
+        return GroupWrite(self, mem, name)
+
+    def write_group(self, mem, name, values):
+        with self.group(mem, name) as group:
+            for key, value in values.items():
+                if key in self.variable_int:
+                    group.write_int(mem, key, value)
+                elif key in self.variable_float:
+                    group.write_float(mem, key, value)
+                else:
+                    group.write_double(mem, key, value)
+
+    def read_group(self, mem, name, keys=None):
+        index = ctypes.c_int(self.variable_int[self.groups[name][0]])
+        if keys is None:
+            keys = self.groups[name][1]
+        while True:
+            seq = self.testlib.seq_read_begin(mem, index)
+            snap = self.snapshot(mem, keys)
+            if not self.testlib.seq_read_retry(mem, index, ctypes.c_int(seq)):
+                return snap
+    #-----------------------------------------------------------------------------------------
+
+    # Espera até que alguma das variáveis mude, em vez de ler de tempos em tempos---------------
+    # Retorna um Snapshot com os novos valores, ou None se passar timeout segundos sem mudanças.
+    # since são os valores já conhecidos (por padrão, os valores no momento da chamada).
+    def wait_for_change(self, mem, keys, timeout, since=None):
+        if since is None:
+            since = self.snapshot(mem, keys)
+        deadline = time.time() + timeout
+        # Só as escritas nos grupos de mudança das variáveis (ver blackboard.schema) acordam
+        mask = 0
+        for key in keys:
+            mask |= 1 << layout.change_group[self._word(key)]
+        counters = ['CHANGE_' + name for name, counter, waiters in layout.change_groups]
+        while True:
+            snap = self.snapshot(mem, counters + list(keys)) # contadores e valores do mesmo instante
+            current = Snapshot((key, snap[key]) for key in keys)
+            if current != since:
+                return current
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            # Dorme até a próxima escrita num desses grupos
+            seen = (ctypes.c_int * len(counters))(*[snap[counter] for counter in counters])
+            self.testlib.wait_for_groups(mem, ctypes.c_int(mask), seen, ctypes.c_int(int(remaining*1000) + 1))
+
+    def _word(self, variable): # Palavra do segmento onde fica a variável
+        if variable in self.variable_int:
+            return self.variable_int[variable]
+        if variable in self.variable_float:
+            return FLOAT_OFFSET + self.variable_float[variable]
+        return DOUBLE_OFFSET + 2*self.variable_double[variable]
+    #-----------------------------------------------------------------------------------------
+
+    # Idade dos valores: cada escrita marca o horário (monotônico) da variável escrita----------
+    # age() retorna os segundos desde a última escrita, inf se nunca foi escrita, e read_fresh()
+    # retorna default quando o valor é mais velho que max_age, para não agir sobre dados parados.
+    def age(self, mem, variable):
+        if variable in self.variable_int:
+            return self.testlib.age_int(mem, ctypes.c_int(self.variable_int[variable]))
+        if variable in self.variable_float:
+            return self.testlib.age_float(mem, ctypes.c_int(self.variable_float[variable]))
+        return self.testlib.age_double(mem, ctypes.c_int(self.variable_double[variable]))
+
+    def read_int_age(self, mem, variable):
+        return self.read_int(mem, variable), self.age(mem, variable)
+
+    def read_float_age(self, mem, variable):
+        return self.read_float(mem, variable), self.age(mem, variable)
+
+    def read_double_age(self, mem, variable):
+        return self.read_double(mem, variable), self.age(mem, variable)
+
+    def read_fresh(self, mem, variable, max_age, default=None):
+        if variable in self.variable_int:
+            value, age = self.read_int_age(mem, variable)
+        elif variable in self.variable_float:
+            value, age = self.read_float_age(mem, variable)
+        else:
+            value, age = self.read_double_age(mem, variable)
+        if age > max_age:
+            return default
+        return value
+    #-----------------------------------------------------------------------------------------
+
+    # Backend numpy: o segmento acessado diretamente, sem chamar a library a cada acesso--------
+    def numpy_view(self, mem):
+        import numpy as np
+        address = ctypes.addressof(mem.contents)
+        self.segment = (ctypes.c_char * SIZE).from_address(address)
+        # Arrays ctypes sobre a mesma memória, para ler e escrever uma variável (mais rápido que numpy)
+        self.int_view = (ctypes.c_int * FLOAT_OFFSET).from_address(address)
+        self.float_view = (ctypes.c_float * (DOUBLE_OFFSET - FLOAT_OFFSET)).from_address(address + FLOAT_OFFSET*4)
+        self.double_view = (ctypes.c_double * ((SIZE - DOUBLE_OFFSET*4)//8)).from_address(address + DOUBLE_OFFSET*4)
+        # Arrays numpy sobre a mesma memória, para operações com várias variáveis
+        self.ints = np.frombuffer(self.segment, dtype=np.int32, count=FLOAT_OFFSET)
+        self.floats = np.frombuffer(self.segment, dtype=np.float32, count=DOUBLE_OFFSET - FLOAT_OFFSET, offset=FLOAT_OFFSET*4)
+        self.doubles = np.frombuffer(self.segment, dtype=np.float64, offset=DOUBLE_OFFSET*4)
+        # Marcas de tempo, no relógio da library: time.time() mais a diferença medida agora
+        stamps = self.testlib.timestamps(mem)
+        self.stamps = (ctypes.c_double * WORDS).from_address(ctypes.addressof(stamps.contents)) if stamps else None
+        self.clock_offset = self.testlib.blackboard_now() - time.time()
+        # As funções passam a indexar a memória, com a mesma assinatura
+        self.write_float = self._numpy_write_float
+        self.write_floatDynamic = self._numpy_write_floatDynamic
+        self.write_int = self._numpy_write_int
+        self.read_float = self._numpy_read_float
+        self.read_floatDynamic = self._numpy_read_floatDynamic
+        self.read_int = self._numpy_read_int
+        self.write_double = self._numpy_write_double
+        self.read_double = self._numpy_read_double
+        self.age = self._numpy_age
+        self.mem = mem
+
+    def _numpy_changed(self, word):
+        # Como a library faz a cada escrita: incrementa o contador do grupo da palavra e a versão,
+        # e acorda quem espera pelo grupo, se houver alguém
+        name, counter, waiters = layout.change_groups[layout.change_group[word]]
+        if self.int_view[waiters] > 0:
+            self.testlib.notify_change(self.mem, ctypes.c_int(word))
+        else:
+            self.int_view[counter] += 1
+            self.int_view[self.variable_int['BLACKBOARD_VERSION']] += 1
+
+    def _numpy_stamp(self, word):
+        if self.stamps is not None:
+            self.stamps[word] = time.time() + self.clock_offset
+
+    def _numpy_age(self, mem, variable):
+        word = self._word(variable)
+        if self.stamps is None or self.stamps[word] == 0:
+            return NEVER
+        return time.time() + self.clock_offset - self.stamps[word]
+
+    def _numpy_write_float(self, mem, variable, value):
+        index = self.variable_float[variable]
+        self.float_view[index] = float(value)
+        self._numpy_stamp(FLOAT_OFFSET + index)
+        self._numpy_changed(FLOAT_OFFSET + index)
+
+    def _numpy_write_floatDynamic(self, mem, variable, index, value):
+        index += self.variable_float[variable]
+        self.float_view[index] = float(value)
+        self._numpy_stamp(FLOAT_OFFSET + index)
+        self._numpy_changed(FLOAT_OFFSET + index)
+
+    def _numpy_write_int(self, mem, variable, value):
+        index = self.variable_int[variable]
+        self.int_view[index] = int(value)
+        self._numpy_stamp(index)
+        self._numpy_changed(index)
+
+    def _numpy_write_double(self, mem, variable, value):
+        index = self.variable_double[variable]
+        self.double_view[index] = float(value)
+        self._numpy_stamp(DOUBLE_OFFSET + 2*index)
+        self._numpy_changed(DOUBLE_OFFSET + 2*index)
+
+    def _numpy_read_double(self, mem, variable):
+        return self.double_view[self.variable_double[variable]]
+
+    def _numpy_read_float(self, mem, variable):
+        return self.float_view[self.variable_float[variable]]
+
+    def _numpy_read_floatDynamic(self, mem, variable, index):
+        return self.float_view[self.variable_float[variable]+index]
+
+    def _numpy_read_int(self, mem, variable):
+        return self.int_view[self.variable_int[variable]]
+    #-----------------------------------------------------------------------------------------
+
+    # Índices de cada variável na sua região do segmento, gerados a partir do schema
+    variable_int = layout.variable_int
+    variable_float = layout.variable_float
+    variable_double = layout.variable_double
+    arrays = layout.arrays
 
-    variable_float = {
-    'IMU_GYRO_X': 1,
-    'IMU_GYRO_Y': 2,
-    'IMU_GYRO_Z': 3,
-    'IMU_ACCEL_X': 4,
-    'IMU_ACCEL_Y': 5,
-    'IMU_ACCEL_Z': 6,
-    'IMU_COMPASS_X': 7,
-    'IMU_COMPASS_Y': 8,
-    'IMU_COMPASS_Z': 9,
-    'IMU_EULER_X': 10,
-    'IMU_EULER_Y': 11,
-    'IMU_EULER_Z': 12,
-    'IMU_QUAT_X': 13,
-    'IMU_QUAT_Y': 14,
-    'IMU_QUAT_Z': 15,
-    'VISION_AREA_SEGMENT': 16,
-    'VISION_BALL_DIST': 17,
-    'VISION_BALL_ANGLE': 18,
-    'VISION_GOAL_DIST': 19,
-    'VISION_GOAL_ANGLE': 20,
-    'VISION_OPP01_DIST': 21,
-    'VISION_OPP02_DIST': 22,
-    'VISION_OPP03_DIST': 23,
-    'VISION_OPP04_DIST': 24,
-    'VISION_OPP05_DIST': 25,
-    'VISION_OPP06_DIST': 26,
-    'VISION_OPP07_DIST': 27,
-    'VISION_OPP08_DIST': 28,
-    'VISION_OPP09_DIST': 29,
-    'VISION_OPP10_DIST': 30,
-    'VISION_OPP11_DIST': 31,
-    'VISION_OPP01_ANGLE': 32,
-    'VISION_OPP02_ANGLE': 33,
-    'VISION_OPP03_ANGLE': 34,
-    'VISION_OPP04_ANGLE': 35,
-    'VISION_OPP05_ANGLE': 36,
-    'VISION_OPP06_ANGLE': 37,
-    'VISION_OPP07_ANGLE': 38,
-    'VISION_OPP08_ANGLE': 39,
-    'VISION_OPP09_ANGLE': 40,
-    'VISION_OPP10_ANGLE': 41,
-    'VISION_OPP11_ANGLE': 42,
-    'VISION_RBT01_DIST': 43,
-    'VISION_RBT02_DIST': 44,
-    'VISION_RBT03_DIST': 45,
-    'VISION_RBT04_DIST': 46,
-    'VISION_RBT05_DIST': 47,
-    'VISION_RBT06_DIST': 48,
-    'VISION_RBT07_DIST': 49,
-    'VISION_RBT08_DIST': 50,
-    'VISION_RBT09_DIST': 51,
-    'VISION_RBT10_DIST': 52,
-    'VISION_RBT11_DIST': 53,
-    'VISION_RBT01_ANGLE': 54,
-    'VISION_RBT02_ANGLE': 55,
-    'VISION_RBT03_ANGLE': 56,
-    'VISION_RBT04_ANGLE': 57,
-    'VISION_RBT05_ANGLE': 58,
-    'VISION_RBT06_ANGLE': 59,
-    'VISION_RBT07_ANGLE': 60,
-    'VISION_RBT08_ANGLE': 61,
-    'VISION_RBT09_ANGLE': 62,
-    'VISION_RBT10_ANGLE': 63,
-    'VISION_RBT11_ANGLE': 64,
-    'VISION_TILT_DEG': 65,
-    'VISION_PAN_DEG': 66,
-    'CBR_COORDINATOR': 67,
-    'CBR_RUN': 68,
-    'LOCALIZATION_BALL_X': 69,
-    'LOCALIZATION_BALL_Y': 70,
-    'LOCALIZATION_RBT01_X': 71,
-    'LOCALIZATION_RBT01_Y': 72,
-    'LOCALIZATION_RBT02_X': 73,
-    'LOCALIZATION_RBT02_Y': 74,
-    'LOCALIZATION_RBT03_X': 75,
-    'LOCALIZATION_RBT03_Y': 76,
-    'LOCALIZATION_RBT04_X': 77,
-    'LOCALIZATION_RBT04_Y': 78,
-    'LOCALIZATION_RBT05_X': 79,
-    'LOCALIZATION_RBT05_Y': 80,
-    'LOCALIZATION_RBT06_X': 81,
-    'LOCALIZATION_RBT06_Y': 82,
-    'LOCALIZATION_RBT07_X': 83,
-    'LOCALIZATION_RBT07_Y': 84,
-    'LOCALIZATION_RBT08_X': 85,
-    'LOCALIZATION_RBT08_Y': 86,
-    'LOCALIZATION_RBT09_X': 87,
-    'LOCALIZATION_RBT09_Y': 88,
-    'LOCALIZATION_RBT10_X': 89,
-    'LOCALIZATION_RBT10_Y': 90,
-    'LOCALIZATION_RBT11_X': 91,
-    'LOCALIZATION_RBT11_Y': 92,
-    'LOCALIZATION_OPP01_X': 93,
-    'LOCALIZATION_OPP01_Y': 94,
-    'LOCALIZATION_OPP02_X': 95,
-    'LOCALIZATION_OPP02_Y': 96,
-    'LOCALIZATION_OPP03_X': 97,
-    'LOCALIZATION_OPP03_Y': 98,
-    'LOCALIZATION_OPP04_X': 99,
-    'LOCALIZATION_OPP04_Y': 100,
-    'LOCALIZATION_OPP05_X': 101,
-    'LOCALIZATION_OPP05_Y': 102,
-    'LOCALIZATION_OPP06_X': 103,
-    'LOCALIZATION_OPP06_Y': 104,
-    'LOCALIZATION_OPP07_X': 105,
-    'LOCALIZATION_OPP07_Y': 106,
-    'LOCALIZATION_OPP08_X': 107,
-    'LOCALIZATION_OPP08_Y': 108,
-    'LOCALIZATION_OPP09_X': 109,
-    'LOCALIZATION_OPP09_Y': 110,
-    'LOCALIZATION_OPP10_X': 111,
-    'LOCALIZATION_OPP10_Y': 112,
-    'LOCALIZATION_OPP11_X': 113,
-    'LOCALIZATION_OPP11_Y': 114,
-    'DECISION_RBT01_DIST_BALL': 115,
-    'DECISION_RBT02_DIST_BALL': 116,
-    'DECISION_RBT03_DIST_BALL': 117,
-    'DECISION_RBT04_DIST_BALL': 118,
+    # Grupos escritos de forma consistente: contador de sequência e variáveis
+    groups = {
+    'VISION': ('SEQ_VISION', ['VISION_BALL_DIST', 'VISION_LOST', 'VISION_PAN_DEG', 'VISION_TILT_DEG']),
+    'LOCALIZATION': ('SEQ_LOCALIZATION', ['LOCALIZATION_X', 'LOCALIZATION_Y', 'LOCALIZATION_THETA',
+                     'LOCALIZATION_COV_XX', 'LOCALIZATION_COV_XY', 'LOCALIZATION_COV_YY', 'LOCALIZATION_COV_THETA',
+                     'LOCALIZATION_BALL_X', 'LOCALIZATION_BALL_Y',
+                     'LOCALIZATION_HYP1_X', 'LOCALIZATION_HYP1_Y', 'LOCALIZATION_HYP1_THETA', 'LOCALIZATION_HYP1_WEIGHT',
+                     'LOCALIZATION_HYP2_X', 'LOCALIZATION_HYP2_Y', 'LOCALIZATION_HYP2_THETA', 'LOCALIZATION_HYP2_WEIGHT']),
+    'IMU': ('SEQ_IMU', ['IMU_GYRO_X', 'IMU_GYRO_Y', 'IMU_GYRO_Z', 'IMU_ACCEL_X', 'IMU_ACCEL_Y', 'IMU_ACCEL_Z',
+            'IMU_COMPASS_X', 'IMU_COMPASS_Y', 'IMU_COMPASS_Z', 'IMU_EULER_X', 'IMU_EULER_Y', 'IMU_EULER_Z',
+            'IMU_QUAT_X', 'IMU_QUAT_Y', 'IMU_QUAT_Z']),
     }
 #------------------------------------------------------------------------------------------
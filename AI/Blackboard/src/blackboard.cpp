@@ -20,6 +20,11 @@ Arquivo fonte contendo as funções que cria ou acopla a memória compartilhada
 #include <sys/ipc.h>
 #include <sys/shm.h>
 #include <stdint.h>
+#include <sched.h>
+#include <time.h>
+#include <linux/futex.h>
+#include <sys/syscall.h>
+#include <math.h>
 #include "blackboard.h"
 
 //#define DEBUG
@@ -29,21 +34,86 @@ Arquivo fonte contendo as funções que cria ou acopla a memória compartilhada
 int *mem ; //Variável que manipula memória compartilhada
 float *memf ; //Variável que manipula memória compartilhada
 
+// Tabelas de horários de cada segmento acoplado por este processo
+#define MAX_SEGMENTS 8
+static int *stamp_mem[MAX_SEGMENTS];
+static double *stamp_table[MAX_SEGMENTS];
+static int stamp_count = 0;
+
 //Depois de criado a memória compartilhada, para verificar se ela realmente foi criada
 // e quantos processos estão utilizando, digite no terminal o comando $ipcs -m
-// será a memoria criada ->   key = 0x0000007b    bytes = 2048
+// será a memoria criada ->   key = 0x0000007b    bytes = BLACKBOARD_SIZE
 // nattch = number of attached processes
 
+double blackboard_now(void)
+{
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + now.tv_nsec * 1e-9;
+}
+
+double* timestamps(int *Mem)
+{
+    int i;
+    for (i = 0; i < stamp_count; i++)
+        if (stamp_mem[i] == Mem)
+            return stamp_table[i];
+    return NULL;
+}
+
+static void stamp(int *Mem, int word)
+{
+    double *table = timestamps(Mem);
+    if (table != NULL)
+        table[word] = blackboard_now();
+}
+
+static double age(int *Mem, int word)
+{
+    double *table = timestamps(Mem);
+    if (table == NULL || table[word] == 0)
+        return HUGE_VAL;
+    return blackboard_now() - table[word];
+}
+
+double age_int(int *Mem, int index)
+{
+    return age(Mem, index);
+}
+
+double age_float(int *Mem, int index)
+{
+    return age(Mem, BLACKBOARD_FLOAT_OFFSET + index);
+}
+
+double age_double(int *Mem, int index)
+{
+    return age(Mem, BLACKBOARD_DOUBLE_OFFSET + 2*index);
+}
+
 void write_int(int *Mem, int index, int valor)
 {
     *(Mem+index) = valor;
+    stamp(Mem, index);
+    notify_change(Mem, index);
 }
 
 void write_float(int *Mem, int index, float valor)
 {
     float* Memf;
-    Memf = (float*)(Mem+125);
+    Memf = (float*)(Mem+BLACKBOARD_FLOAT_OFFSET);
     *(Memf+index) = valor;
+    stamp(Mem, BLACKBOARD_FLOAT_OFFSET + index);
+    notify_change(Mem, BLACKBOARD_FLOAT_OFFSET + index);
+}
+
+void write_double(int *Mem, int index, double valor)
+{
+    double* Memd;
+    Memd = (double*)(Mem+BLACKBOARD_DOUBLE_OFFSET);
+    *(Memd+index) = valor;
+    stamp(Mem, BLACKBOARD_DOUBLE_OFFSET + 2*index);
+    notify_change(Mem, BLACKBOARD_DOUBLE_OFFSET + 2*index);
 }
 
 int read_int(int *Mem, int index)
@@ -54,15 +124,149 @@ int read_int(int *Mem, int index)
 float read_float(int *Mem, int index)
 {
     float* Memf;
-    Memf = (float*)(Mem+125);
+    Memf = (float*)(Mem+BLACKBOARD_FLOAT_OFFSET);
     return *(Memf + index);
 }
 
+double read_double(int *Mem, int index)
+{
+    double* Memd;
+    Memd = (double*)(Mem+BLACKBOARD_DOUBLE_OFFSET);
+    return *(Memd + index);
+}
+
+// Cabeçalho do segmento: o primeiro processo grava o layout, os outros conferem se é o mesmo
+int check_layout(int *Mem)
+{
+    if (*(volatile int*)(Mem+BLACKBOARD_MAGIC) == 0)
+    {
+        *(Mem+BLACKBOARD_LAYOUT) = BLACKBOARD_LAYOUT_VERSION;
+        *(Mem+BLACKBOARD_HASH) = BLACKBOARD_LAYOUT_HASH;
+        __sync_synchronize();
+        if (__sync_bool_compare_and_swap(Mem+BLACKBOARD_MAGIC, 0, BLACKBOARD_LAYOUT_MAGIC))
+            *((double*)(Mem+BLACKBOARD_DOUBLE_OFFSET) + BLACKBOARD_CREATED) = blackboard_now();
+    }
+    __sync_synchronize();
+    if (*(Mem+BLACKBOARD_MAGIC) != BLACKBOARD_LAYOUT_MAGIC ||
+        *(Mem+BLACKBOARD_LAYOUT) != BLACKBOARD_LAYOUT_VERSION ||
+        *(Mem+BLACKBOARD_HASH) != BLACKBOARD_LAYOUT_HASH)
+        return -1;
+    return 0;
+}
+
+// Seqlock: o contador fica ímpar enquanto o grupo está sendo escrito
+void seq_write_begin(int *Mem, int index)
+{
+    __sync_fetch_and_add(Mem+index, 1);
+    __sync_synchronize();
+}
+
+void seq_write_end(int *Mem, int index)
+{
+    __sync_synchronize();
+    __sync_fetch_and_add(Mem+index, 1);
+    notify_change(Mem, index);
+}
+
+int seq_read_begin(int *Mem, int index)
+{
+    int seq;
+    while ((seq = *(volatile int*)(Mem+index)) & 1) // espera o escritor terminar
+        sched_yield();
+    __sync_synchronize();
+    return seq;
+}
+
+int seq_read_retry(int *Mem, int index, int seq)
+{
+    __sync_synchronize();
+    return *(volatile int*)(Mem+index) != seq;
+}
+
+// Notificação de mudanças: cada grupo de variáveis tem um contador, incrementado a cada escrita
+// no grupo, e quem espera dorme num futex sobre a versão com o bit dos grupos que está olhando.
+// O futex só é acordado se houver alguém esperando pelo grupo, então a escrita continua barata.
+void notify_change(int *Mem, int word)
+{
+    int group = BLACKBOARD_CHANGE_GROUP[word];
+    __sync_fetch_and_add(Mem+BLACKBOARD_CHANGE_COUNTER[group], 1);
+    __sync_fetch_and_add(Mem+BLACKBOARD_VERSION, 1);
+    if (*(volatile int*)(Mem+BLACKBOARD_CHANGE_WAITERS[group]) > 0)
+        syscall(SYS_futex, Mem+BLACKBOARD_VERSION, FUTEX_WAKE_BITSET, 0x7fffffff, NULL, NULL, 1 << group);
+}
+
+static void add_waiters(int *Mem, int mask, int count)
+{
+    int group;
+    __sync_fetch_and_add(Mem+BLACKBOARD_WAITERS, count);
+    for (group = 0; group < BLACKBOARD_CHANGE_GROUPS; group++)
+        if (mask & (1 << group))
+            __sync_fetch_and_add(Mem+BLACKBOARD_CHANGE_WAITERS[group], count);
+}
+
+// Dorme até a versão mudar com uma escrita num dos grupos de mask, ou até deadline; seen != NULL
+// dá os contadores já vistos de cada grupo e o retorno são os grupos que mudaram desde então
+static int wait_groups(int *Mem, int mask, const int *seen, int index, int value, const struct timespec *deadline)
+{
+    struct timespec now;
+    int version, group, changed;
+
+    add_waiters(Mem, mask, 1);
+    while (1)
+    {
+        version = *(volatile int*)(Mem+BLACKBOARD_VERSION);
+        __sync_synchronize();
+        changed = 0;
+        for (group = 0; group < BLACKBOARD_CHANGE_GROUPS; group++)
+            if ((mask & (1 << group)) && seen != NULL && *(volatile int*)(Mem+BLACKBOARD_CHANGE_COUNTER[group]) != seen[group])
+                changed |= 1 << group;
+        if (changed || (seen == NULL && *(volatile int*)(Mem+index) != value))
+            break;
+
+        clock_gettime(CLOCK_MONOTONIC, &now);
+        if (now.tv_sec > deadline->tv_sec || (now.tv_sec == deadline->tv_sec && now.tv_nsec >= deadline->tv_nsec))
+            break;
+
+        // Dorme enquanto a versão não mudar; retorna na hora se ela já mudou. Só as escritas
+        // nos grupos de mask acordam (o prazo do FUTEX_WAIT_BITSET é absoluto)
+        syscall(SYS_futex, Mem+BLACKBOARD_VERSION, FUTEX_WAIT_BITSET, version, deadline, NULL, mask);
+    }
+    add_waiters(Mem, mask, -1);
+    return changed;
+}
+
+static void deadline_after(struct timespec *deadline, int timeout_ms)
+{
+    clock_gettime(CLOCK_MONOTONIC, deadline);
+    deadline->tv_sec += timeout_ms / 1000;
+    deadline->tv_nsec += (timeout_ms % 1000) * 1000000L;
+    if (deadline->tv_nsec >= 1000000000L)
+    {
+        deadline->tv_sec++;
+        deadline->tv_nsec -= 1000000000L;
+    }
+}
+
+int wait_for_change(int *Mem, int index, int seen, int timeout_ms)
+{
+    struct timespec deadline;
+    deadline_after(&deadline, timeout_ms);
+    wait_groups(Mem, (1 << BLACKBOARD_CHANGE_GROUPS) - 1, NULL, index, seen, &deadline);
+    return *(volatile int*)(Mem+index);
+}
+
+int wait_for_groups(int *Mem, int mask, const int *seen, int timeout_ms)
+{
+    struct timespec deadline;
+    deadline_after(&deadline, timeout_ms);
+    return wait_groups(Mem, mask, seen, 0, 0, &deadline);
+}
+
 int* using_shared_memory(int KEY)
 {
     // --- Variaveis usada para memoria compartilhada -----
     int shmid ; // identificador da memoria comum //
-    const unsigned short int size = 2048; // tamanho da memória em Bytes
+    const int size = BLACKBOARD_SIZE; // tamanho da memória em Bytes, gerado a partir do schema
     int flag = 0;
     //-----------------------------------------------------
 
@@ -72,6 +276,11 @@ int* using_shared_memory(int KEY)
      //shmget:para criar um segmento de memória compartilhada
      if (( shmid = shmget((key_t)KEY, size,0)) == -1)
      {
+          if (errno == EINVAL) // já existe, menor que este layout
+          {
+              fprintf(stderr, "Blackboard %d: segmento existente menor que o layout (%d bytes), remova com ipcrm -M %d\n", KEY, size, KEY);
+              return NULL;
+          }
           perror("shmget error") ;
           printf("\n Memory will be created \n");
          //return(1) ;
@@ -97,9 +306,33 @@ int* using_shared_memory(int KEY)
           //return (2) ;
      }
 
-     memf = (float*)(mem+125);
+     if (check_layout(mem) != 0)
+     {
+          fprintf(stderr, "Blackboard %d: layout %d (hash %08x) diferente do segmento, layout %d (hash %08x)\n",
+                  KEY, BLACKBOARD_LAYOUT_VERSION, BLACKBOARD_LAYOUT_HASH, *(mem+BLACKBOARD_LAYOUT), *(mem+BLACKBOARD_HASH));
+          shmdt(mem);
+          return NULL;
+     }
+
+     memf = (float*)(mem+BLACKBOARD_FLOAT_OFFSET);
      //---------------------------------------------------------------------
 
+     // Segmento dos horários de escrita, criado junto se ainda não existir
+     if (timestamps(mem) == NULL && stamp_count < MAX_SEGMENTS)
+     {
+        double *table;
+        if (( shmid = shmget((key_t)(KEY + TIMESTAMP_KEY_OFFSET), BLACKBOARD_WORDS*sizeof(double), IPC_CREAT|SHM_R|SHM_W)) == -1)
+            perror("shmget error (timestamps)") ;
+        else if ((table = (double*)shmat(shmid, 0, flag)) == (double*)-1)
+            perror("Impossible linkage! (timestamps)") ;
+        else
+        {
+            stamp_mem[stamp_count] = mem;
+            stamp_table[stamp_count] = table;
+            stamp_count++;
+        }
+     }
+
             /* destruicao do segmento */
             //if ((shmctl(shmid, IPC_RMID, NULL)) == -1){
             // perror("Erro shmctl()");
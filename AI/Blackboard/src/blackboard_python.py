@@ -0,0 +1,285 @@
+#coding: utf-8
+# As mesmas funções de libblackboardpy.so, escritas em python, para rodar a decisão e a visão
+# (simulação, testes) sem compilar nada. PythonLibrary acopla o mesmo segmento System V, com
+# shmget/shmat da libc e o mesmo layout, então processos em python e em c++ continuam
+# conversando. MmapLibrary usa um arquivo em /dev/shm, para máquinas sem System V IPC; nesse
+# caso só os processos em python se enxergam.
+#
+# Diferenças da library: o python não tem operações atômicas, então os contadores (versão,
+# sequência e mudança dos grupos) são incrementados com leitura e escrita; um incremento perdido
+# só atrasa quem espera, que por isso acorda no máximo a cada WAIT_SLICE segundos para conferir
+# os contadores.
+
+import os
+import sys
+import time
+import mmap
+import ctypes
+import ctypes.util
+import platform
+
+from blackboard_layout import SIZE, FLOAT_OFFSET, DOUBLE_OFFSET
+from blackboard_layout import LAYOUT_MAGIC, LAYOUT_VERSION, LAYOUT_HASH, variable_int, variable_double
+from blackboard_layout import change_groups, change_group
+
+WORDS = SIZE//4
+TIMESTAMP_KEY_OFFSET = 1
+
+IPC_CREAT = 0o1000
+SHM_R_W = 0o600
+ENOENT = 2
+EINVAL = 22
+CLOCK_MONOTONIC = 1
+FUTEX_WAIT_BITSET = 9
+FUTEX_WAKE_BITSET = 10
+SYS_FUTEX = {'x86_64': 202, 'i386': 240, 'i686': 240, 'armv7l': 240, 'aarch64': 98}.get(platform.machine())
+WAIT_SLICE = 0.05 # Maior tempo dormindo sem conferir as variáveis, em segundos
+
+MAGIC = variable_int['BLACKBOARD_MAGIC']
+LAYOUT = variable_int['BLACKBOARD_LAYOUT']
+HASH = variable_int['BLACKBOARD_HASH']
+VERSION = variable_int['BLACKBOARD_VERSION']
+WAITERS = variable_int['BLACKBOARD_WAITERS']
+CREATED = variable_double['BLACKBOARD_CREATED']
+ALL_GROUPS = (1 << len(change_groups)) - 1
+
+
+def value(arg): # Os argumentos chegam como ctypes.c_int/c_float, como para a library
+    return getattr(arg, 'value', arg)
+
+
+class timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+class Segment(object): # Arrays ctypes sobre um segmento acoplado
+    def __init__(self, address):
+        self.address = address
+        self.ints = (ctypes.c_int * FLOAT_OFFSET).from_address(address)
+        self.floats = (ctypes.c_float * (DOUBLE_OFFSET - FLOAT_OFFSET)).from_address(address + FLOAT_OFFSET*4)
+        self.doubles = (ctypes.c_double * ((SIZE - DOUBLE_OFFSET*4)//8)).from_address(address + DOUBLE_OFFSET*4)
+        self.stamps = None
+
+
+class PythonLibrary(object): # Segmento System V, o mesmo da library em c++
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        self.libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        self.libc.shmat.restype = ctypes.c_void_p
+        self.libc.syscall.restype = ctypes.c_long
+        self.segments = {} # endereço -> Segment
+
+    def _attach(self, key, size): # Endereço do segmento, criado se ainda não existir
+        shmid = self.libc.shmget(key, size, 0)
+        if shmid == -1 and ctypes.get_errno() == ENOENT:
+            shmid = self.libc.shmget(key, size, IPC_CREAT|SHM_R_W)
+        if shmid == -1:
+            errno = ctypes.get_errno()
+            if errno == EINVAL:
+                raise OSError(errno, 'segmento existente menor que o layout (%d bytes), remova com ipcrm -M %d' % (size, key))
+            raise OSError(errno, 'shmget: ' + os.strerror(errno))
+        address = self.libc.shmat(shmid, None, 0)
+        if address is None or address == ctypes.c_void_p(-1).value:
+            errno = ctypes.get_errno()
+            raise OSError(errno, 'shmat: ' + os.strerror(errno))
+        return address
+
+    def _segment(self, mem):
+        return self.segments[ctypes.addressof(mem.contents)]
+
+    # Criação e cabeçalho----------------------------------------------------------------------
+    def using_shared_memory(self, KEY):
+        KEY = value(KEY)
+        try:
+            segment = Segment(self._attach(KEY, SIZE))
+        except OSError as e:
+            print >> sys.stderr, 'Blackboard %d: %s' % (KEY, e.strerror)
+            return ctypes.POINTER(ctypes.c_int)()
+        mem = ctypes.cast(ctypes.c_void_p(segment.address), ctypes.POINTER(ctypes.c_int))
+        self.segments[segment.address] = segment
+
+        if self.check_layout(mem) != 0:
+            print >> sys.stderr, 'Blackboard %d: layout %d (hash %08x) diferente do segmento, layout %d (hash %08x)' % (
+                KEY, LAYOUT_VERSION, LAYOUT_HASH & 0xffffffff, segment.ints[LAYOUT], segment.ints[HASH] & 0xffffffff)
+            return ctypes.POINTER(ctypes.c_int)()
+
+        try: # Segmento dos horários de escrita
+            segment.stamps = (ctypes.c_double * WORDS).from_address(self._attach(KEY + TIMESTAMP_KEY_OFFSET, WORDS*8))
+        except OSError as e:
+            print >> sys.stderr, 'Blackboard %d (timestamps): %s' % (KEY, e.strerror)
+        return mem
+
+    def check_layout(self, mem):
+        ints = self._segment(mem).ints
+        if ints[MAGIC] == 0: # segmento novo
+            ints[LAYOUT] = LAYOUT_VERSION
+            ints[HASH] = LAYOUT_HASH
+            ints[MAGIC] = LAYOUT_MAGIC
+            self._segment(mem).doubles[CREATED] = self.blackboard_now()
+        if (ints[MAGIC], ints[LAYOUT], ints[HASH]) != (LAYOUT_MAGIC, LAYOUT_VERSION, LAYOUT_HASH):
+            return -1
+        return 0
+
+    # Leitura e escrita------------------------------------------------------------------------
+    def write_int(self, mem, index, valor):
+        index = value(index)
+        self._segment(mem).ints[index] = value(valor)
+        self._stamp(mem, index)
+        self.notify_change(mem, index)
+
+    def write_float(self, mem, index, valor):
+        index = value(index)
+        self._segment(mem).floats[index] = value(valor)
+        self._stamp(mem, FLOAT_OFFSET + index)
+        self.notify_change(mem, FLOAT_OFFSET + index)
+
+    def write_double(self, mem, index, valor):
+        index = value(index)
+        self._segment(mem).doubles[index] = value(valor)
+        self._stamp(mem, DOUBLE_OFFSET + 2*index)
+        self.notify_change(mem, DOUBLE_OFFSET + 2*index)
+
+    def read_int(self, mem, index):
+        return self._segment(mem).ints[value(index)]
+
+    def read_float(self, mem, index):
+        return self._segment(mem).floats[value(index)]
+
+    def read_double(self, mem, index):
+        return self._segment(mem).doubles[value(index)]
+
+    # Seqlock dos grupos-----------------------------------------------------------------------
+    def seq_write_begin(self, mem, index):
+        self._segment(mem).ints[value(index)] += 1
+
+    def seq_write_end(self, mem, index):
+        self._segment(mem).ints[value(index)] += 1
+        self.notify_change(mem, value(index))
+
+    def seq_read_begin(self, mem, index):
+        ints = self._segment(mem).ints
+        index = value(index)
+        while ints[index] & 1: # espera o escritor terminar
+            time.sleep(0)
+        return ints[index]
+
+    def seq_read_retry(self, mem, index, seq):
+        return int(self._segment(mem).ints[value(index)] != value(seq))
+
+    # Espera por mudanças----------------------------------------------------------------------
+    def _futex(self, segment, operation, count, timeout = None, mask = ALL_GROUPS):
+        if SYS_FUTEX is None: # arquitetura desconhecida: quem espera confere a cada WAIT_SLICE
+            if operation == FUTEX_WAIT_BITSET:
+                time.sleep(max(0, timeout.tv_sec + timeout.tv_nsec*1e-9 - self.blackboard_now()))
+            return
+        self.libc.syscall(ctypes.c_long(SYS_FUTEX), ctypes.c_void_p(segment.address + VERSION*4), ctypes.c_int(operation),
+                          ctypes.c_int(count), ctypes.byref(timeout) if timeout is not None else None, None, ctypes.c_int(mask))
+
+    def notify_change(self, mem, word):
+        segment = self._segment(mem)
+        group = change_group[value(word)]
+        name, counter, waiters = change_groups[group]
+        segment.ints[counter] += 1
+        segment.ints[VERSION] += 1
+        if segment.ints[waiters] > 0:
+            self._futex(segment, FUTEX_WAKE_BITSET, 0x7fffffff, mask = 1 << group)
+
+    def _add_waiters(self, segment, mask, count):
+        segment.ints[WAITERS] = max(0, segment.ints[WAITERS] + count)
+        for group, (name, counter, waiters) in enumerate(change_groups):
+            if mask & (1 << group):
+                segment.ints[waiters] = max(0, segment.ints[waiters] + count)
+
+    def _wait(self, mem, mask, changed, timeout_ms): # Dorme até changed() ser verdadeiro ou até o prazo
+        segment = self._segment(mem)
+        deadline = self.blackboard_now() + value(timeout_ms) / 1000.0
+
+        self._add_waiters(segment, mask, 1)
+        try:
+            while True:
+                version = segment.ints[VERSION]
+                if changed(segment):
+                    break
+                now = self.blackboard_now()
+                if now >= deadline:
+                    break
+                until = min(deadline, now + WAIT_SLICE) # o prazo do FUTEX_WAIT_BITSET é absoluto
+                self._futex(segment, FUTEX_WAIT_BITSET, version, timespec(int(until), int((until % 1) * 1e9)), mask)
+        finally:
+            self._add_waiters(segment, mask, -1)
+
+    def wait_for_change(self, mem, index, seen, timeout_ms):
+        index, seen = value(index), value(seen)
+        self._wait(mem, ALL_GROUPS, lambda segment: segment.ints[index] != seen, timeout_ms)
+        return self._segment(mem).ints[index]
+
+    def wait_for_groups(self, mem, mask, seen, timeout_ms):
+        mask = value(mask)
+        groups = [(1 << group, counter, seen[group]) for group, (name, counter, waiters) in enumerate(change_groups)
+                  if mask & (1 << group)]
+        def changed(segment):
+            return sum(bit for bit, counter, old in groups if segment.ints[counter] != old)
+        self._wait(mem, mask, changed, timeout_ms)
+        return changed(self._segment(mem))
+
+    # Horários de escrita----------------------------------------------------------------------
+    def blackboard_now(self):
+        now = timespec()
+        self.libc.clock_gettime(CLOCK_MONOTONIC, ctypes.byref(now))
+        return now.tv_sec + now.tv_nsec * 1e-9
+
+    def timestamps(self, mem):
+        stamps = self._segment(mem).stamps
+        if stamps is None:
+            return ctypes.POINTER(ctypes.c_double)()
+        return ctypes.cast(stamps, ctypes.POINTER(ctypes.c_double))
+
+    def _stamp(self, mem, word):
+        stamps = self._segment(mem).stamps
+        if stamps is not None:
+            stamps[word] = self.blackboard_now()
+
+    def _age(self, mem, word):
+        stamps = self._segment(mem).stamps
+        if stamps is None or stamps[word] == 0:
+            return float('inf')
+        return self.blackboard_now() - stamps[word]
+
+    def age_int(self, mem, index):
+        return self._age(mem, value(index))
+
+    def age_float(self, mem, index):
+        return self._age(mem, FLOAT_OFFSET + value(index))
+
+    def age_double(self, mem, index):
+        return self._age(mem, DOUBLE_OFFSET + 2*value(index))
+
+
+class MmapLibrary(PythonLibrary): # Segmento num arquivo mapeado, sem System V IPC
+
+    def __init__(self, directory = None):
+        super(MmapLibrary, self).__init__()
+        if directory is None:
+            directory = '/dev/shm' if os.path.isdir('/dev/shm') else os.environ.get('TMPDIR', '/tmp')
+        self.directory = directory
+        self.maps = [] # os mapas precisam continuar vivos enquanto o segmento é usado
+
+    def _attach(self, key, size):
+        path = os.path.join(self.directory, 'blackboard_%d' % key)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, SHM_R_W)
+        try:
+            current = os.fstat(fd).st_size
+            if current == 0:
+                os.ftruncate(fd, size) # arquivo novo, lido como zeros
+            elif current < size:
+                raise OSError(EINVAL, 'arquivo existente menor que o layout (%d bytes), remova %s' % (size, path))
+            segment = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.maps.append(segment)
+        return ctypes.addressof(ctypes.c_char.from_buffer(segment))
+
+
+LIBRARIES = {'python': PythonLibrary, 'mmap': MmapLibrary}
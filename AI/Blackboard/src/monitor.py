@@ -0,0 +1,246 @@
+#! /usr/bin/env python
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Monitor do blackboard, no estilo do top: valor atual de cada variável, escritas e mudanças de
+# valor por segundo, tempo desde a última escrita e desde a última mudança. Marca as variáveis que
+# nunca foram escritas e as paradas há mais de --stale segundos. As escritas são contadas pelas
+# marcas de tempo do segmento (amostradas a --rate Hz, então uma variável escrita mais rápido que
+# isso aparece com a taxa da amostragem, marcada com '+'); o total de escritas vem do contador
+# BLACKBOARD_VERSION, que é exato. Escritas que não mudam o valor aparecem em 'mesmas'.
+#
+# python monitor.py                   robô do config.ini (no_player_robofei*100)
+# python monitor.py --key 9900        outro segmento (o do replay.py, por exemplo)
+# python monitor.py --once -d 5       mede 5 s e imprime a tabela, sem curses
+#
+# Teclas: s muda a ordenação, n mostra só as não escritas ou paradas, / filtra pelo nome, q sai.
+
+try:
+    from configparser import ConfigParser
+except ImportError:
+    from ConfigParser import ConfigParser  # ver. < 3.0
+
+import sys
+import time
+import locale
+import ctypes
+import curses
+import argparse
+from collections import deque
+import numpy as np
+
+from SharedMemory import SharedMemory, blackboard_key
+import blackboard_layout as layout
+
+SORTS = ('escritas', 'idade', 'nome')
+
+
+class Monitor(object): # Amostra o segmento e as marcas de tempo e mantém as taxas por variável
+
+    def __init__(self, bkb, mem, window = 5.0):
+        self.bkb = bkb
+        self.mem = mem
+        self.window = window # segundos usados no cálculo das taxas
+
+        # O cabeçalho e os contadores (BLACKBOARD_*, SEQ_*) não são escritos com write_int e
+        # aparecem no resumo; a tabela mostra só as variáveis
+        variables = [(name, 'int', index) for name, index in layout.variable_int.items()] + \
+                    [(name, 'float', layout.FLOAT_OFFSET + index) for name, index in layout.variable_float.items()] + \
+                    [(name, 'double', layout.DOUBLE_OFFSET + 2*index) for name, index in layout.variable_double.items()]
+        variables = sorted(variable for variable in variables if not variable[0].startswith(('BLACKBOARD_', 'SEQ_', 'CHANGE_', 'WAITERS_')))
+        self.names = [name for name, tp, word in variables]
+        self.types = [tp for name, tp, word in variables]
+        self.words = np.array([word for name, tp, word in variables])
+        self.double = np.array([tp == 'double' for tp in self.types])
+
+        address = ctypes.addressof(mem.contents)
+        self.segment = np.frombuffer((ctypes.c_char * layout.SIZE).from_address(address), dtype=np.uint32)
+        stamps = bkb.testlib.timestamps(mem)
+        self.stamps = np.frombuffer((ctypes.c_double * (layout.SIZE // 4)).from_address(ctypes.addressof(stamps.contents)),
+                                    dtype=np.float64) if stamps else None
+        self.version = layout.variable_int['BLACKBOARD_VERSION']
+        self.waiters = layout.variable_int['BLACKBOARD_WAITERS']
+
+        n = len(self.names)
+        self.writes = np.zeros(n, dtype=np.int64)   # escritas vistas desde o início
+        self.changes = np.zeros(n, dtype=np.int64)  # mudanças de valor vistas desde o início
+        self.last_change = np.empty(n)
+        self.last_change.fill(np.nan)
+        self.history = deque() # (horário, escritas, mudanças, versão) dentro da janela
+        self.raw = None
+        self.last_stamps = None
+        self.samples = 0
+
+    def Sample(self):
+        now = self.bkb.testlib.blackboard_now()
+        raw = self.segment.copy()
+        stamps = self.stamps[self.words].copy() if self.stamps is not None else np.zeros(len(self.words))
+        if self.raw is not None:
+            changed = (raw[self.words] != self.raw[self.words]) | \
+                      (self.double & (raw[self.words + self.double] != self.raw[self.words + self.double]))
+            self.changes += changed
+            self.last_change[changed] = now
+            self.writes += stamps != self.last_stamps
+        self.raw, self.last_stamps = raw, stamps
+        self.samples += 1
+
+        self.history.append((now, self.writes.copy(), self.changes.copy(), int(raw.view(np.int32)[self.version])))
+        while len(self.history) > 2 and now - self.history[1][0] >= self.window:
+            self.history.popleft()
+        return now
+
+    def Value(self, i):
+        word = self.words[i]
+        if self.types[i] == 'int':
+            return int(self.raw[word:word+1].view(np.int32)[0])
+        if self.types[i] == 'float':
+            return float(self.raw[word:word+1].view(np.float32)[0])
+        return float(self.raw[word:word+2].view(np.float64)[0])
+
+    def Rates(self): # escritas/s, mudanças/s e escritas/s de todo o blackboard, na janela
+        first, last = self.history[0], self.history[-1]
+        elapsed = last[0] - first[0]
+        if elapsed <= 0:
+            return np.zeros(len(self.names)), np.zeros(len(self.names)), 0.0
+        return (last[1] - first[1]) / elapsed, (last[2] - first[2]) / elapsed, ((last[3] - first[3]) & 0xffffffff) / elapsed
+
+    def Rows(self, now, stale, sort = 'escritas', only_idle = False, pattern = ''):
+        writes, changes, total = self.Rates()
+        rows = []
+        for i, name in enumerate(self.names):
+            if pattern and pattern.upper() not in name:
+                continue
+            stamp = self.last_stamps[i]
+            age = now - stamp if stamp > 0 else float('inf')
+            flag = 'nunca' if stamp == 0 else ('parada' if age > stale else '')
+            if only_idle and not flag:
+                continue
+            rows.append((name, self.types[i], self.Value(i), writes[i], changes[i], age,
+                         now - self.last_change[i], flag))
+        if sort == 'escritas':
+            rows.sort(key=lambda row: (-row[3], row[5], row[0]))
+        elif sort == 'idade':
+            rows.sort(key=lambda row: (row[5], row[0]))
+        return rows, total
+
+    def Summary(self, now, stale, rate, total):
+        written = self.last_stamps > 0
+        idle = written & (now - self.last_stamps > stale)
+        ceiling = rate * 0.9
+        busy = np.sum(self.Rates()[0] >= ceiling)
+        return ('variáveis: %d  escritas: %d  nunca escritas: %d  paradas (> %gs): %d  no limite da amostragem: %d' %
+                (len(self.names), np.sum(written), np.sum(~written), stale, np.sum(idle), busy),
+                'escritas no blackboard: %.1f/s  esperando mudanças: %d  amostragem: %g Hz  janela: %g s' %
+                (total, self.raw.view(np.int32)[self.waiters], rate, self.window))
+
+
+def Format(row, rate):
+    name, tp, value, writes, changes, age, change_age, flag = row
+    def seconds(s):
+        return '-' if s != s or s == float('inf') else ('%.1f' % s if s < 100 else '%d' % s)
+    value = '%d' % value if tp == 'int' else '%.4g' % value
+    same = '%3d%%' % max(0, 100 * (1 - changes / writes)) if writes > 0 else '    '
+    limit = '+' if writes >= rate * 0.9 else ' '
+    return '%-32s %-6s %12s %8.1f%s %8.1f %5s %8s %8s  %s' % (name, tp, value, writes, limit, changes, same,
+                                                             seconds(age), seconds(change_age), flag)
+
+HEADER = '%-32s %-6s %12s %9s %8s %5s %8s %8s  %s' % ('nome', 'tipo', 'valor', 'escr/s', 'mud/s', 'mesmas',
+                                                     'escrita', 'mudou', '')
+
+
+def Screen(window, monitor, args, key):
+    curses.curs_set(0)
+    window.nodelay(True)
+    sort, only_idle, pattern, offset = 0, args.idle, args.filter, 0
+    draw = 0
+    while True:
+        now = monitor.Sample()
+        if now >= draw:
+            draw = now + 1.0 / args.refresh
+            rows, total = monitor.Rows(now, args.stale, SORTS[sort], only_idle, pattern)
+            height, width = window.getmaxyx()
+            window.erase()
+            lines = ['Blackboard %d  layout %d (hash %08x)  ordem: %s%s%s' % (key, layout.LAYOUT_VERSION, layout.LAYOUT_HASH & 0xffffffff,
+                     SORTS[sort], '  só paradas' if only_idle else '', '  filtro: ' + pattern if pattern else '')]
+            lines += monitor.Summary(now, args.stale, args.rate, total)
+            lines += ['', HEADER]
+            offset = max(0, min(offset, len(rows) - (height - len(lines))))
+            lines += [Format(row, args.rate) for row in rows[offset:]]
+            for y, line in enumerate(lines[:height - 1]):
+                window.addnstr(y, 0, line, width - 1, curses.A_REVERSE if y == 4 else 0)
+            window.addnstr(height - 1, 0, 's ordem  n paradas  / filtro  setas rolam  q sai', width - 1, curses.A_DIM)
+            window.refresh()
+
+        c = window.getch()
+        if c in (ord('q'), 27):
+            return
+        elif c == ord('s'):
+            sort = (sort + 1) % len(SORTS)
+        elif c == ord('n'):
+            only_idle = not only_idle
+        elif c == ord('/'):
+            window.nodelay(False)
+            curses.echo()
+            window.addnstr(window.getmaxyx()[0] - 1, 0, 'filtro: ' + ' ' * 40, window.getmaxyx()[1] - 1)
+            pattern = window.getstr(window.getmaxyx()[0] - 1, 8, 40).strip()
+            curses.noecho()
+            window.nodelay(True)
+        elif c == curses.KEY_DOWN:
+            offset += 1
+        elif c == curses.KEY_UP:
+            offset = max(0, offset - 1)
+        elif c == curses.KEY_NPAGE:
+            offset += window.getmaxyx()[0] - 6
+        elif c == curses.KEY_PPAGE:
+            offset = max(0, offset - window.getmaxyx()[0] + 6)
+        if c != -1:
+            draw = 0
+        time.sleep(1.0 / args.rate)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Blackboard monitor', epilog= 'Shows the live values and the write rate of every blackboard variable')
+    parser.add_argument('--key', '-k', type=int, help = 'segment key, no_player_robofei*100 of config.ini by default')
+    parser.add_argument('--backend', help = 'blackboard backend (ctypes, numpy, python or mmap)')
+    parser.add_argument('--rate', '-r', type=float, default=100, help = 'samples per second used to count the writes')
+    parser.add_argument('--refresh', type=float, default=2, help = 'screen updates per second')
+    parser.add_argument('--window', '-w', type=float, default=5, help = 'seconds over which the rates are computed')
+    parser.add_argument('--stale', type=float, default=5, help = 'seconds without writes before a variable is flagged')
+    parser.add_argument('--filter', '-f', default='', help = 'only variables whose name contains this text')
+    parser.add_argument('--idle', action="store_true", help = 'only variables never written or stale')
+    parser.add_argument('--once', action="store_true", help = 'prints the table once, without curses')
+    parser.add_argument('--duration', '-d', type=float, default=2, help = 'seconds measured by --once')
+    args = parser.parse_args()
+
+    key = args.key
+    if key is None:
+        config = ConfigParser()
+        config.read('../../Control/Data/config.ini')
+        key = int(config.get('Communication', 'no_player_robofei'))*100
+
+    bkb = SharedMemory()
+    mem = bkb.shd_constructor(key, args.backend)
+    monitor = Monitor(bkb, mem, args.window)
+
+    if args.once:
+        end = time.time() + args.duration
+        while True:
+            now = monitor.Sample()
+            if time.time() >= end:
+                break
+            time.sleep(1.0 / args.rate)
+        rows, total = monitor.Rows(now, args.stale, 'escritas', args.idle, args.filter)
+        for line in monitor.Summary(now, args.stale, args.rate, total):
+            print line
+        print
+        print HEADER
+        for row in rows:
+            print Format(row, args.rate)
+        sys.exit(0)
+
+    locale.setlocale(locale.LC_ALL, '') # textos em utf-8 no curses
+    try:
+        curses.wrapper(Screen, monitor, args, blackboard_key(key))
+    except KeyboardInterrupt:
+        pass
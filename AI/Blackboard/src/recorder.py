@@ -0,0 +1,280 @@
+#! /usr/bin/env python
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Gravador do blackboard: copia o segmento inteiro (e o horário da última escrita de cada
+# palavra) a uma taxa fixa para um buffer circular pré-alocado, e uma thread separada grava os
+# blocos cheios, comprimidos por coluna, num arquivo. Só lê a memória, sem seqlock e sem esperar
+# por mudanças, então os processos que escrevem no blackboard não fazem nada a mais.
+#
+# python recorder.py --rate 200                       grava até ser interrompido (Ctrl+C)
+# python recorder.py --info arquivo.rec               resumo de uma gravação
+# python recorder.py --chain VISION_LOST DECISION_ACTION_A CONTROL_ACTION arquivo.rec
+#                                                     atraso entre as escritas de cada etapa
+#
+# Arquivo: MAGIC, tamanho do cabeçalho (uint32) e cabeçalho JSON com o layout da gravação, depois
+# blocos 'CHNK', número de amostras, tamanho comprimido (uint32) e zlib de: horários das amostras
+# (float64), cada palavra do segmento ao longo das amostras (uint32) e cada horário de escrita
+# ao longo das amostras (float64). Uma palavra que não muda vira uma sequência repetida, que o
+# zlib reduz a quase nada.
+
+try:
+    from configparser import ConfigParser
+except ImportError:
+    from ConfigParser import ConfigParser  # ver. < 3.0
+
+import os
+import sys
+import zlib
+import json
+import time
+import struct
+import ctypes
+import signal
+import argparse
+import threading
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty  # ver. < 3.0
+import numpy as np
+
+from SharedMemory import SharedMemory
+import blackboard_layout as layout
+
+MAGIC = b'RFBBREC1'
+CHUNK = b'CHNK'
+
+
+class Recorder(object): # Amostra o segmento a uma taxa fixa e grava os blocos numa thread
+
+    def __init__(self, bkb, mem, filename, rate = 200, chunk = None, slots = 8):
+        self.bkb = bkb
+        self.mem = mem
+        self.filename = filename
+        self.period = 1.0 / rate
+        self.chunk = chunk or int(rate) # Amostras por bloco, um segundo por padrão
+        self.words = layout.SIZE // 4
+
+        # Buffer circular: slots blocos, preenchidos pelo amostrador e esvaziados pela thread
+        self.times = np.zeros((slots, self.chunk), dtype=np.float64)
+        self.segment = np.zeros((slots, self.chunk, self.words), dtype=np.uint32)
+        self.stamps = np.zeros((slots, self.chunk, self.words), dtype=np.float64)
+        self.free = Queue()
+        self.full = Queue()
+        for slot in xrange(slots):
+            self.free.put(slot)
+
+        self.address = ctypes.addressof(mem.contents)
+        stamps = bkb.testlib.timestamps(mem)
+        self.stamps_address = ctypes.addressof(stamps.contents) if stamps else None
+
+        self.samples = 0  # Amostras gravadas
+        self.dropped = 0  # Amostras perdidas porque a thread de gravação não deu conta
+        self.late = 0     # Amostras atrasadas mais de um período
+        self.running = False
+
+    def Header(self, rate):
+        return {'layout_version': layout.LAYOUT_VERSION, 'layout_hash': layout.LAYOUT_HASH,
+                'size': layout.SIZE, 'float_offset': layout.FLOAT_OFFSET, 'double_offset': layout.DOUBLE_OFFSET,
+                'variable_int': layout.variable_int, 'variable_float': layout.variable_float,
+                'variable_double': layout.variable_double, 'rate': rate, 'created': time.time()}
+
+    def Run(self, duration = None):
+        self.running = True
+        writer = threading.Thread(target=self._Write, args=(1.0 / self.period,))
+        writer.start()
+        try:
+            self._Sample(duration)
+        finally:
+            self.running = False
+            writer.join()
+
+    def Stop(self):
+        self.running = False
+
+    def _Sample(self, duration):
+        now = self.bkb.testlib.blackboard_now
+        slot, row = None, 0
+        start = next_tick = now()
+
+        try:
+            while self.running and (duration is None or next_tick - start < duration):
+                if slot is None:
+                    try:
+                        slot, row = self.free.get_nowait(), 0
+                    except Empty: # buffer cheio: perde a amostra, mas não atrasa as próximas
+                        self.dropped += 1
+                if slot is not None:
+                    self.times[slot, row] = now()
+                    ctypes.memmove(self.segment[slot, row].ctypes.data, self.address, layout.SIZE)
+                    if self.stamps_address is not None:
+                        ctypes.memmove(self.stamps[slot, row].ctypes.data, self.stamps_address, self.words * 8)
+                    row += 1
+                    if row == self.chunk:
+                        self.full.put((slot, row))
+                        slot = None
+
+                next_tick += self.period
+                delay = next_tick - now()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self.period: # atrasou mais de um período: recomeça a contagem
+                    self.late += 1
+                    next_tick = now()
+        finally: # também ao ser interrompido, grava o bloco incompleto
+            if slot is not None and row > 0:
+                self.full.put((slot, row))
+            self.full.put(None)
+
+    def _Write(self, rate):
+        with open(self.filename, 'wb') as f:
+            header = json.dumps(self.Header(rate)).encode('utf-8')
+            f.write(MAGIC + struct.pack('<I', len(header)) + header)
+            while True:
+                item = self.full.get()
+                if item is None:
+                    break
+                slot, n = item
+                # Colunas: cada palavra ao longo das amostras do bloco
+                data = b''.join((self.times[slot, :n].tobytes(), self.segment[slot, :n].T.tobytes(),
+                                 self.stamps[slot, :n].T.tobytes()))
+                self.free.put(slot)
+                data = zlib.compress(data, 6)
+                f.write(CHUNK + struct.pack('<II', n, len(data)) + data)
+                f.flush()
+                self.samples += n
+
+
+class Recording(object): # Gravação lida de um arquivo, com o layout da época em que foi gravada
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('%s: não é uma gravação do blackboard' % filename)
+            size, = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(size).decode('utf-8'))
+            words = self.header['size'] // 4
+
+            times, segment, stamps = [], [], []
+            while True:
+                head = f.read(12)
+                if len(head) < 12: # fim do arquivo, ou bloco incompleto de uma gravação interrompida
+                    break
+                tag, n, length = struct.unpack('<4sII', head)
+                data = f.read(length)
+                if tag != CHUNK or len(data) < length:
+                    break
+                data = zlib.decompress(data)
+                times.append(np.frombuffer(data, dtype=np.float64, count=n))
+                segment.append(np.frombuffer(data, dtype=np.uint32, count=n*words, offset=n*8).reshape(words, n).T)
+                stamps.append(np.frombuffer(data, dtype=np.float64, count=n*words, offset=n*8 + n*words*4).reshape(words, n).T)
+
+        self.times = np.concatenate(times) if times else np.zeros(0)
+        self.segment = np.concatenate(segment) if segment else np.zeros((0, words), dtype=np.uint32)
+        self.stamps = np.concatenate(stamps) if stamps else np.zeros((0, words))
+        self.variable_int = self.header['variable_int']
+        self.variable_float = self.header['variable_float']
+        self.variable_double = self.header['variable_double']
+
+    def __len__(self):
+        return len(self.times)
+
+    def variables(self):
+        return sorted(list(self.variable_int) + list(self.variable_float) + list(self.variable_double))
+
+    def Word(self, name): # Primeira palavra da variável no segmento
+        if name in self.variable_int:
+            return self.variable_int[name]
+        if name in self.variable_float:
+            return self.header['float_offset'] + self.variable_float[name]
+        return self.header['double_offset'] + 2*self.variable_double[name]
+
+    def Series(self, name): # Valores da variável em cada amostra
+        word = self.Word(name)
+        if name in self.variable_int:
+            return self.segment[:, word].view(np.int32)
+        if name in self.variable_float:
+            return self.segment[:, word].view(np.float32)
+        return np.ascontiguousarray(self.segment[:, word:word+2]).view(np.float64).ravel()
+
+    def Writes(self, name): # Horários distintos das escritas da variável vistos na gravação
+        stamps = self.stamps[:, self.Word(name)]
+        return np.unique(stamps[stamps > 0])
+
+    def Sample(self, i): # Segmento da amostra i, como bytes
+        return self.segment[i].tobytes()
+
+    def Latency(self, cause, effect):
+        # Para cada escrita de cause, tempo até a primeira escrita de effect depois dela
+        first, then = self.Writes(cause), self.Writes(effect)
+        following = np.searchsorted(then, first, side='right')
+        valid = following < len(then)
+        return then[following[valid]] - first[valid]
+
+
+def Info(recording):
+    duration = recording.times[-1] - recording.times[0] if len(recording) > 1 else 0
+    print 'amostras: %d  duração: %.1f s  taxa: %.1f Hz' % (len(recording), duration, recording.header['rate'])
+    if len(recording) > 1:
+        gaps = np.diff(recording.times)
+        print 'intervalo entre amostras: mediana %.2f ms, máximo %.2f ms' % (np.median(gaps)*1e3, np.max(gaps)*1e3)
+    print 'layout %d (hash %08x)' % (recording.header['layout_version'], recording.header['layout_hash'] & 0xffffffff)
+    print
+    print '%-32s %8s %10s' % ('variável', 'escritas', 'taxa (Hz)')
+    for name in recording.variables():
+        writes = len(recording.Writes(name))
+        if writes:
+            print '%-32s %8d %10.1f' % (name, writes, writes / duration if duration > 0 else 0)
+
+def Chain(recording, names):
+    for cause, effect in zip(names, names[1:]):
+        delay = recording.Latency(cause, effect) * 1e3
+        if len(delay) == 0:
+            print '%s -> %s: nenhuma escrita' % (cause, effect)
+            continue
+        print '%s -> %s: %d escritas, mediana %.1f ms, p95 %.1f ms, p99 %.1f ms, máximo %.1f ms' % (
+            cause, effect, len(delay), np.median(delay), np.percentile(delay, 95), np.percentile(delay, 99), np.max(delay))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Blackboard recorder', epilog= 'Samples the whole blackboard at a fixed rate into a compressed file')
+    parser.add_argument('--rate', '-r', type=float, default=200, help = 'samples per second (100-500)')
+    parser.add_argument('--duration', '-d', type=float, help = 'seconds to record, until interrupted by default')
+    parser.add_argument('--output', '-o', help = 'recording file, ../Data/blackboard_<date>.rec by default')
+    parser.add_argument('--backend', help = 'blackboard backend (ctypes, numpy, python or mmap)')
+    parser.add_argument('--info', action="store_true", help = 'prints a summary of a recording')
+    parser.add_argument('--chain', nargs='+', help = 'prints the delay between writes of consecutive variables')
+    parser.add_argument('recording', nargs='?', help = 'recording read by --info and --chain')
+    args = parser.parse_args()
+
+    if args.info or args.chain:
+        recording = Recording(args.recording)
+        if args.info:
+            Info(recording)
+        if args.chain:
+            Chain(recording, args.chain)
+        sys.exit(0)
+
+    config = ConfigParser()
+    config.read('../../Control/Data/config.ini')
+    mem_key = int(config.get('Communication', 'no_player_robofei'))*100
+
+    bkb = SharedMemory()
+    mem = bkb.shd_constructor(mem_key, args.backend)
+
+    output = args.output
+    if output is None:
+        if not os.path.isdir('../Data/'):
+            os.makedirs('../Data/')
+        output = time.strftime('../Data/blackboard_%Y%m%d_%H%M%S.rec')
+
+    recorder = Recorder(bkb, mem, output, args.rate)
+    signal.signal(signal.SIGTERM, lambda *args: recorder.Stop())
+    print 'Recording the blackboard at %g Hz into %s' % (args.rate, output)
+    try:
+        recorder.Run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    print 'Samples: %d  Dropped: %d  Late: %d' % (recorder.samples, recorder.dropped, recorder.late)
@@ -0,0 +1,390 @@
+#! /usr/bin/env python
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Replay de gravações do blackboard (recorder.py) num segmento particular, para reexecutar a
+# decisão ou a localização offline com exatamente as mesmas entradas. As variáveis são escritas
+# com as funções do SharedMemory, pelos mesmos nomes, então os processos não percebem diferença:
+# cada escrita marca o horário, acorda quem espera e os grupos continuam consistentes.
+#
+# python replay.py arquivo.rec --speed 1             em tempo real, num segmento com chave --key
+# python replay.py arquivo.rec --speed 0             o mais rápido possível
+# python replay.py arquivo.rec --step                um passo (amostra) a cada Enter
+# python replay.py arquivo.rec --behavior NaiveIMU --trace a.json --profile
+#                                                    reexecuta a decisão a cada amostra
+# python replay.py arquivo.rec --localization --seed 0 --trace a.json
+# python replay.py --diff a.json b.json              compara as saídas de duas versões do código
+#
+# Sem --behavior e --localization os processos rodam à parte sobre o mesmo segmento:
+# BLACKBOARD_KEY=9900 python decision.py -n
+#
+# Uma variável é reescrita sempre que a gravação mostra uma nova escrita dela, mesmo com o mesmo
+# valor, e o horário de escrita no segmento é o da gravação, deslocado para o início do replay:
+# em tempo real, bkb.age() dos processos à parte é o mesmo da gravação.
+#
+# Na reexecução o módulo time do código testado é trocado pelo relógio da gravação: time.time()
+# é o horário da amostra e time.sleep() não espera, e bkb.age() é medido nesse relógio, então as
+# idades são as da gravação em qualquer velocidade e passo a passo. As variáveis que o código
+# escreve passam a ser dele e não são mais sobrescritas pela gravação.
+
+import os
+import sys
+import json
+import time
+import random
+import ctypes
+import argparse
+import cProfile
+import pstats
+import numpy as np
+
+from SharedMemory import SharedMemory, WORDS, NEVER
+from recorder import Recording
+
+KEY = 9900 # Segmento do replay, longe das chaves dos robôs (no_player_robofei*100)
+HERE = os.path.dirname(os.path.abspath(__file__))
+DECISION = os.path.join(HERE, '../../Decision/src')
+LOCALIZATION = os.path.join(HERE, '../../Localization/src')
+
+
+class ReplayClock(object): # Substitui o módulo time do código reexecutado
+    def __init__(self, start):
+        self.now = start
+        self.monotonic = 0 # horário da amostra no relógio das marcas de tempo do segmento
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        pass
+
+    def __getattr__(self, name): # strftime, localtime...
+        return getattr(time, name)
+
+
+class Trace(object): # Escritas do código reexecutado, marcadas com o passo do replay
+
+    writers = ('write_int', 'write_float', 'write_floatDynamic', 'write_double')
+
+    def __init__(self):
+        self.bkb = None
+        self.step = 0
+        self.writes = []     # (passo, variável, valor)
+        self.written = set() # variáveis escritas pelo código, que o replay deixa de escrever
+
+    def Class(self, base): # SharedMemory que se registra no trace ao acoplar o segmento
+        trace = self
+        class Traced(base):
+            def shd_constructor(self, *args, **kwargs):
+                mem = base.shd_constructor(self, *args, **kwargs)
+                trace.Attach(self)
+                return mem
+        return Traced
+
+    def Attach(self, bkb):
+        self.bkb = bkb
+        self.floats = dict((index, name) for name, index in bkb.variable_float.items())
+        for name in self.writers: # por cima das funções da classe ou do backend (GroupWrite aplica o grupo por elas)
+            bkb.__dict__[name] = self._Wrap(name, getattr(bkb, name))
+
+    def _Wrap(self, writer, write):
+        def traced(mem, variable, *args):
+            name = variable
+            if writer == 'write_floatDynamic':
+                name = self.floats.get(self.bkb.variable_float[variable] + args[0], variable)
+            self.written.add(name)
+            self.writes.append((self.step, name, float(args[-1])))
+            return write(mem, variable, *args)
+        return traced
+
+    def Save(self, filename, info):
+        info = dict(info, writes=self.writes)
+        with open(filename, 'w') as f:
+            json.dump(info, f)
+
+
+class Replay(object): # Escreve as amostras de uma gravação no segmento, passo a passo
+
+    def __init__(self, recording, bkb, mem, skip = ()):
+        self.recording = recording
+        self.bkb = bkb
+        self.mem = mem
+        self.skip = tuple(skip) # prefixos de variáveis que o replay não escreve
+        self.outputs = set()    # variáveis do código reexecutado (Trace.written)
+
+        # Variáveis da gravação que ainda existem no layout atual, menos o cabeçalho e os contadores
+        current = set(bkb.variable_int) | set(bkb.variable_float) | set(bkb.variable_double)
+        self.names = [name for name in recording.variables() if name in current
+                      and not name.startswith(('BLACKBOARD_', 'SEQ_', 'CHANGE_', 'WAITERS_'))]
+        self.matrix = np.column_stack([recording.Series(name).astype(np.float64) for name in self.names]) \
+                      if self.names and len(recording) else np.zeros((len(recording), len(self.names)))
+        self.previous = np.empty(len(self.names))
+        self.previous.fill(np.nan)
+        self.missing = sorted(set(recording.variables()) - current)
+
+        # Horário da última escrita de cada variável em cada amostra (0: nunca escrita), e a
+        # tabela de horários do segmento, onde eles são escritos deslocados de offset
+        self.stamps = recording.stamps[:, [recording.Word(name) for name in self.names]] \
+                      if self.names and len(recording) else np.zeros((len(recording), len(self.names)))
+        self.previous_stamps = np.empty(len(self.names))
+        self.previous_stamps.fill(np.nan)
+        table = bkb.testlib.timestamps(mem)
+        self.table = (ctypes.c_double * WORDS).from_address(ctypes.addressof(table.contents)) if table else None
+        self.offset = self.Start(0)
+
+    def __len__(self):
+        return len(self.recording)
+
+    def Time(self, i): # Horário da amostra i, no relógio de parede da gravação
+        return self.recording.header['created'] + self.recording.times[i] - self.recording.times[0]
+
+    def Start(self, first): # Deslocamento que leva a amostra first para agora, no relógio do segmento
+        return self.bkb.testlib.blackboard_now() - (self.recording.times[first] if len(self) else 0)
+
+    def Now(self, i): # Horário da amostra i no relógio do segmento
+        return self.recording.times[i] + self.offset
+
+    def Stamp(self, name, stamp): # Troca o horário da última escrita da variável
+        if self.table is not None:
+            self.table[self.bkb._word(name)] = stamp
+
+    def Age(self, name, now): # Idade da variável no horário now do relógio do segmento
+        stamp = self.table[self.bkb._word(name)] if self.table is not None else 0
+        return NEVER if stamp == 0 else now - stamp
+
+    def Reset(self): # Zera as variáveis, para que nada de uma execução anterior sobre no segmento
+        for name in self.bkb.variable_int:
+            if not name.startswith(('BLACKBOARD_', 'SEQ_', 'CHANGE_', 'WAITERS_')):
+                self.bkb.write_int(self.mem, name, 0)
+        for name in self.bkb.variable_float:
+            self.bkb.write_float(self.mem, name, 0)
+        for name in self.bkb.variable_double:
+            if not name.startswith('BLACKBOARD_'):
+                self.bkb.write_double(self.mem, name, 0)
+        if self.table is not None: # nenhuma variável escrita até a primeira amostra
+            ctypes.memset(self.table, 0, ctypes.sizeof(self.table))
+        self.previous.fill(np.nan) # a primeira amostra escreve todas as variáveis
+        self.previous_stamps.fill(np.nan)
+
+    def Apply(self, i): # Escreve as variáveis que mudaram ou foram reescritas desde a amostra anterior
+        row, stamps = self.matrix[i], self.stamps[i]
+        same = ((row == self.previous) | (np.isnan(row) & np.isnan(self.previous))) & (stamps == self.previous_stamps)
+        self.previous, self.previous_stamps = row, stamps
+        values, written = {}, {}
+        for j in np.flatnonzero(~same):
+            name = self.names[j]
+            if name in self.outputs or name.startswith(self.skip):
+                continue
+            values[name] = int(row[j]) if name in self.bkb.variable_int else float(row[j])
+            written[name] = stamps[j] + self.offset if stamps[j] > 0 else 0
+
+        changed = dict(values)
+        for group, (seq, keys) in self.bkb.groups.items():
+            part = dict((key, values.pop(key)) for key in keys if key in values)
+            if part:
+                self.bkb.write_group(self.mem, group, part)
+        for name, value in sorted(values.items()):
+            if name in self.bkb.variable_int:
+                self.bkb.write_int(self.mem, name, value)
+            elif name in self.bkb.variable_float:
+                self.bkb.write_float(self.mem, name, value)
+            else:
+                self.bkb.write_double(self.mem, name, value)
+        for name, stamp in written.items(): # o horário da gravação, no lugar do horário da escrita
+            self.Stamp(name, stamp)
+        return changed
+
+    def Run(self, speed = 1.0, callback = None, interactive = False, first = 0, last = None):
+        # speed 1 é tempo real, 2 duas vezes mais rápido, 0 sem esperar entre as amostras
+        times = self.recording.times
+        last = len(self) if last is None else min(last, len(self))
+        start = time.time()
+        self.offset = self.Start(first)
+        for i in xrange(first, last):
+            if interactive:
+                if raw_input('passo %d/%d (%.3f s), Enter continua, q sai: ' % (i, last, times[i] - times[0])).strip() == 'q':
+                    break
+            elif speed > 0:
+                delay = start + (times[i] - times[first]) / speed - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            changed = self.Apply(i)
+            if interactive and i == first:
+                print '    estado inicial: %d variáveis' % len(changed)
+            elif interactive:
+                for name, value in sorted(changed.items()):
+                    print '    %-32s %g' % (name, value)
+            if callback is not None:
+                callback(i)
+
+
+class Rerun(object): # Código reexecutado no mesmo processo, a cada passo do replay
+
+    def __init__(self, replay, target, seed = 0):
+        self.replay = replay
+        self.clock = ReplayClock(replay.Time(0) if len(replay) else time.time())
+        self.trace = Trace()
+        np.random.seed(seed)
+        random.seed(seed)
+
+        if target == 'localization':
+            os.chdir(LOCALIZATION)
+            sys.path.insert(0, os.getcwd())
+            import localization
+            localization.time = self.clock
+            localization.SharedMemory = self.trace.Class(localization.SharedMemory)
+            loc = localization.Localization()
+            self.step = loc.Cycle
+        else:
+            os.chdir(DECISION)
+            sys.path.insert(0, os.getcwd())
+            import behavior
+            behavior.time = self.clock
+            behavior.SharedMemory = self.trace.Class(behavior.SharedMemory)
+            if not isinstance(getattr(behavior, target, None), type):
+                raise ValueError('behavior.py não tem o comportamento %s' % target)
+            robot = getattr(behavior, target)()
+            self.step = lambda: robot.decision(robot.get_referee() if robot.get_referee_usage() == 'yes' else 2)
+
+        # As escritas do construtor (valores iniciais) ficam no trace, mas o replay continua
+        # escrevendo essas variáveis, como os outros processos faziam durante a gravação
+        self.trace.written.clear()
+        replay.outputs = self.trace.written
+        # As idades vistas pelo código seguem o relógio da gravação, não o tempo do replay
+        self.trace.bkb.age = lambda mem, variable: replay.Age(variable, self.clock.monotonic)
+        self.durations = []
+        self.profiler = None
+
+    def Profile(self):
+        self.profiler = cProfile.Profile()
+
+    def __call__(self, i):
+        self.clock.now = self.replay.Time(i)
+        self.clock.monotonic = self.replay.Now(i)
+        self.trace.step = i
+        writes = len(self.trace.writes)
+        start = time.time()
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            self.step()
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.durations.append(time.time() - start)
+            for step, name, value in self.trace.writes[writes:]: # escritas do código, no horário da amostra
+                self.replay.Stamp(name, self.clock.monotonic)
+
+    def Summary(self):
+        if self.durations:
+            durations = np.array(self.durations) * 1e3
+            print 'passos: %d  tempo por passo: média %.2f ms, p95 %.2f ms, máximo %.2f ms' % (
+                len(durations), durations.mean(), np.percentile(durations, 95), durations.max())
+        print 'escritas: %d em %d variáveis: %s' % (len(self.trace.writes), len(self.trace.written),
+                                                   ', '.join(sorted(self.trace.written)))
+        if self.profiler is not None:
+            pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(25)
+
+
+def Diff(first, second, tolerance = 1e-4):
+    # Compara o estado das saídas passo a passo; retorna o número de passos com diferenças
+    def by_step(trace):
+        steps = {}
+        for step, name, value in trace['writes']:
+            steps.setdefault(step, {})[name] = value # vale a última escrita do passo
+        return steps
+
+    def equal(a, b):
+        if a is None or b is None:
+            return a is b
+        return a == b or abs(a - b) <= tolerance or (a != a and b != b)
+
+    a, b = by_step(first), by_step(second)
+    state_a, state_b = {}, {}
+    mismatches = {} # variável -> passos diferentes
+    differing = 0
+    for step in xrange(max(first['steps'], second['steps'])):
+        state_a.update(a.get(step, {}))
+        state_b.update(b.get(step, {}))
+        wrong = [name for name in set(state_a) | set(state_b) if not equal(state_a.get(name), state_b.get(name))]
+        if wrong and not differing:
+            print 'primeira diferença no passo %d (%.3f s):' % (step, first['times'][step] if step < len(first['times']) else 0)
+            for name in sorted(wrong):
+                print '    %-32s %s != %s' % (name, state_a.get(name), state_b.get(name))
+        for name in wrong:
+            mismatches.setdefault(name, []).append(step)
+        differing += bool(wrong)
+
+    if not differing:
+        print 'saídas iguais em %d passos (tolerância %g)' % (max(first['steps'], second['steps']), tolerance)
+        return 0
+    print
+    print '%-32s %8s %10s' % ('variável', 'passos', 'primeiro')
+    for name, steps in sorted(mismatches.items()):
+        print '%-32s %8d %10d' % (name, len(steps), steps[0])
+    print 'passos diferentes: %d de %d' % (differing, max(first['steps'], second['steps']))
+    return differing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Blackboard replay', epilog= 'Replays a recording into a private blackboard segment, optionally re-running the decision or the localization on it')
+    parser.add_argument('recording', nargs='?', help = 'recording made by recorder.py')
+    parser.add_argument('--key', '-k', type=int, default=KEY, help = 'key of the private segment (default %d)' % KEY)
+    parser.add_argument('--backend', help = 'blackboard backend (ctypes, numpy, python or mmap)')
+    parser.add_argument('--speed', '-s', type=float, default=1.0, help = '1 is real time, 2 twice as fast, 0 as fast as possible')
+    parser.add_argument('--step', action="store_true", help = 'waits for Enter before each sample')
+    parser.add_argument('--first', type=int, default=0, help = 'first sample replayed')
+    parser.add_argument('--last', type=int, help = 'sample where the replay stops')
+    parser.add_argument('--skip', nargs='+', default=[], help = 'prefixes of variables that are not replayed')
+    parser.add_argument('--behavior', '-b', help = 'behavior class of behavior.py re-run at each sample (Naive, NaiveIMU, ...)')
+    parser.add_argument('--localization', '-l', action="store_true", help = 're-runs the localization filter at each sample')
+    parser.add_argument('--seed', type=int, default=0, help = 'random seed of the re-run code')
+    parser.add_argument('--profile', '-p', action="store_true", help = 'profiles the re-run code')
+    parser.add_argument('--trace', '-t', help = 'saves the writes of the re-run code to a JSON file')
+    parser.add_argument('--diff', nargs=2, metavar=('A', 'B'), help = 'compares two traces saved with --trace')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help = 'largest difference taken as equal by --diff')
+    args = parser.parse_args()
+
+    if args.diff:
+        traces = []
+        for filename in args.diff:
+            with open(filename) as f:
+                traces.append(json.load(f))
+        sys.exit(1 if Diff(traces[0], traces[1], args.tolerance) else 0)
+
+    if args.recording is None:
+        parser.error('a recording is required')
+    recording = Recording(args.recording)
+    source = os.path.abspath(args.recording) # antes de Rerun mudar de diretório
+    trace = os.path.abspath(args.trace) if args.trace else None
+
+    # O segmento particular vale também para o código reexecutado e para processos filhos
+    os.environ['BLACKBOARD_KEY'] = str(args.key)
+    bkb = SharedMemory()
+    mem = bkb.shd_constructor(args.key, args.backend)
+    replay = Replay(recording, bkb, mem, args.skip)
+    replay.Reset()
+    if replay.missing:
+        print 'fora do layout atual, não reproduzidas: ' + ', '.join(replay.missing)
+
+    rerun = None
+    if args.behavior or args.localization:
+        rerun = Rerun(replay, 'localization' if args.localization else args.behavior, args.seed)
+        if args.profile:
+            rerun.Profile()
+
+    print 'Replaying %d samples of %s into blackboard %d' % (len(recording), args.recording, args.key)
+    try:
+        replay.Run(args.speed, rerun, args.step, args.first, args.last)
+    except KeyboardInterrupt:
+        pass
+
+    if rerun is not None:
+        rerun.Summary()
+        if trace:
+            steps = len(rerun.durations) and rerun.trace.step + 1
+            rerun.trace.Save(trace, {'recording': source, 'target': args.behavior or 'localization',
+                                     'seed': args.seed, 'steps': steps,
+                                     'times': list(recording.times[:steps] - recording.times[0])})
+            print 'trace: ' + trace
@@ -147,6 +147,8 @@ int leia()
 	
 	const int mem_key = (int)reader.GetInteger("Communication","no_player_robofei",-1024)*100;
     	int* mem = using_shared_memory(mem_key);
+	if (mem == NULL) // Segmento com outro layout
+		return(1);
 
 	//fiz separado pois estávamos tendo problema com tipos de variáveis.
 	    SERVER = strcpy((char*)malloc(arqIP.length()+1), arqIP.c_str());
@@ -52,5 +52,4 @@ while True:
     print "received message:", data
     data1 = data.split()
     if data1[0] == '2':  #code #2 - receives distance value
-        bkb.write_floatDynamic(mem,'DECISION_RBT01_DIST_BALL',int(data1[1])-1,float(data1[2]))
-    time.sleep(1)
\ No newline at end of file
+        bkb.write_floatDynamic(mem,'DECISION_RBT01_DIST_BALL',int(data1[1])-1,float(data1[2]))
\ No newline at end of file
@@ -36,11 +36,19 @@ UDP_PORT2 = 1232
 UDP_PORT3 = 1233
 UDP_PORT4 = 1234
 
+#decision asks for a message (CONTROL_MESSAGES = 2) in every cycle, tens of times per second;
+#the messages go out at most once per SEND_INTERVAL seconds, as when this loop polled every second
+SEND_INTERVAL = 1.0
+last_send = 0
 
 bkb.write_int(mem, 'CONTROL_MESSAGES', 0)
 
 while(True):
     if bkb.read_int(mem,'CONTROL_MESSAGES') == 2: #code #2 - sends distance value
+        remaining = last_send + SEND_INTERVAL - time.time()
+        if remaining > 0: #sent recently: waits and sends the newest distance
+            time.sleep(remaining)
+            continue
         message = '2' + ' ' + str(bkb.read_int(mem,'ROBOT_NUMBER')) + ' ' + str(bkb.read_floatDynamic(mem,'DECISION_RBT01_DIST_BALL',bkb.read_int(mem,'ROBOT_NUMBER')-1))
         #message = str(bkb.read_int(mem,'ROBOT_NUMBER')) + ' ' + str(bkb.read_int(mem,'SEND_ACTION'))
         print "message:", message
@@ -50,5 +58,6 @@ while(True):
         sock.sendto(message, (UDP_IP, UDP_PORT2))
         sock.sendto(message, (UDP_IP, UDP_PORT3))
         sock.sendto(message, (UDP_IP, UDP_PORT4))
+        last_send = time.time()
         bkb.write_int(mem,'CONTROL_MESSAGES',0)
-    time.sleep(1)
+    bkb.wait_for_change(mem, ['CONTROL_MESSAGES'], 1) #wakes up when decision asks for a message
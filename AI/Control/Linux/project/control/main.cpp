@@ -83,6 +83,8 @@ int main(int argc, char **argv)
 
       //Acopla ou cria a memoria compartilhada
     int *mem = using_shared_memory(ini->getd("Communication","no_player_robofei",-1024) * 100); //0 for real robot
+    if (mem == NULL) // Segmento com outro layout
+        return 1;
 
     bool stop_gait = true;
     char *Servoport;
@@ -17,7 +17,7 @@ except ImportError:
 #looking for the library SharedMemory
 import sys
 sys.path.append('../../Blackboard/src/')
-from SharedMemory import SharedMemory 
+from SharedMemory import SharedMemory, NEVER
 
 import time
 from math import degrees
@@ -50,6 +50,11 @@ class TreatingRawData(object):
 
         self.flag_move_ac = False        
 
+        #maximum age (s) of the vision data, only checked when [Decision] max_vision_age is set
+        self.max_vision_age = None
+        if self.config.has_option('Decision', 'max_vision_age'):
+            self.max_vision_age = self.config.getfloat('Decision', 'max_vision_age')
+
         print
         print 'Raw data - read (get) and write (set) methods'
         print
@@ -88,6 +93,14 @@ class TreatingRawData(object):
         time.sleep(1)
         return self.bkb.read_int(self.mem,'VISION_LOST')
 
+    def vision_is_stale(self):
+        # True when the vision has not written for a while (stopped or frozen process). A vision that
+        # never wrote VISION_LOST (vision.py, or before the first frame) is not treated as stale.
+        if self.max_vision_age is None:
+            return False
+        age = self.bkb.age(self.mem, 'VISION_LOST')
+        return age != NEVER and age > self.max_vision_age
+
         
     def set_vision_search(self):
         return self.bkb.write_int(self.mem,'DECISION_SEARCH_ON', 1)
@@ -331,7 +344,10 @@ class NaiveIMU(TreatingRawData):
         
         elif referee == 2 or (referee == 21 and self.kickoff_ctrl != 0):  # play
             self.bkb.write_int(self.mem,'CONTROL_MESSAGES',0)
-            if self.get_search_status() == 1: # 1 - vision lost
+            if self.vision_is_stale():
+                print 'vision stale'
+                self.set_stand_still()
+            elif self.get_search_status() == 1: # 1 - vision lost
                 print 'vision lost'
                 self.set_stand_still()
                 #self.set_vision_search()
@@ -347,18 +363,21 @@ class NaiveIMU(TreatingRawData):
 
                 self.bkb.write_int(self.mem,'CONTROL_MESSAGES',2)
 
-                print 'dist Robot 1: ',self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL')
-                print 'dist Robot 2: ',self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL')
-                print 'dist Robot 3: ',self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL')
-                print 'dist Robot 4: ',self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL')
+                #reads all distances at once, so they all come from the same instant
+                dist = self.bkb.read_many(self.mem,['DECISION_RBT01_DIST_BALL','DECISION_RBT02_DIST_BALL','DECISION_RBT03_DIST_BALL','DECISION_RBT04_DIST_BALL'])
 
-                if self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL'):
+                print 'dist Robot 1: ',dist[0]
+                print 'dist Robot 2: ',dist[1]
+                print 'dist Robot 3: ',dist[2]
+                print 'dist Robot 4: ',dist[3]
+
+                if dist[0] < dist[1] and dist[0] < dist[2] and dist[0] < dist[3]:
                     self.bkb.write_float(self.mem,'CBR_COORDINATOR',1)
-                elif self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL'):
+                elif dist[1] < dist[0] and dist[1] < dist[2] and dist[1] < dist[3]:
                     self.bkb.write_float(self.mem,'CBR_COORDINATOR',2)
-                elif self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL'):
+                elif dist[2] < dist[1] and dist[2] < dist[0] and dist[2] < dist[3]:
                     self.bkb.write_float(self.mem,'CBR_COORDINATOR',3)
-                elif self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT02_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT03_DIST_BALL') and self.bkb.read_float(self.mem,'DECISION_RBT04_DIST_BALL') < self.bkb.read_float(self.mem,'DECISION_RBT01_DIST_BALL'):
+                elif dist[3] < dist[1] and dist[3] < dist[2] and dist[3] < dist[0]:
                     self.bkb.write_float(self.mem,'CBR_COORDINATOR',4)
                 else:
                     self.bkb.write_float(self.mem,'CBR_COORDINATOR',float(self.bkb.read_int(self.mem,'ROBOT_NUMBER')))
@@ -487,7 +506,10 @@ class NaiveIMUDecTurning(TreatingRawData):
                 self.bkb.write_int(self.mem, 'DECISION_ACTION_A', 0) # Writing in the memory
                 self.flag_move_ac=False
                     
-            if self.get_search_status() == 1: # 1 - vision lost
+            if self.vision_is_stale():
+                print 'vision stale'
+                self.set_stand_still()
+            elif self.get_search_status() == 1: # 1 - vision lost
                 print 'vision lost'
                 self.set_stand_still()
                 #self.set_vision_search()
@@ -17,6 +17,7 @@
 
 #import parser for arguments    
 import argparse
+import time
 
 from behavior import *
 
@@ -64,15 +65,35 @@ else:
     robot = Ordinary()
 
 
+#variables that change the decision: the loop waits for them instead of polling. The IMU is left out,
+#its orientation is noisy and written at the IMU rate: a turn is only taken as a change past a deadband
+inputs = ['COM_REFEREE', 'VISION_LOST', 'VISION_BALL_DIST', 'VISION_PAN_DEG',
+          'DECISION_RBT01_DIST_BALL', 'DECISION_RBT02_DIST_BALL', 'DECISION_RBT03_DIST_BALL', 'DECISION_RBT04_DIST_BALL']
+MIN_PERIOD = 0.05          #at most 20 decisions per second, as the old polling loop
+MAX_PERIOD = 0.5           #decides again at least every 0.5 s
+ORIENTATION_PERIOD = 0.1   #how often the orientation is checked while waiting
+ORIENTATION_DEADBAND = 10  #degrees turned since the last decision that count as a change
+last = robot.bkb.snapshot(robot.mem, inputs)
+
+def turned(heading):
+    return abs((robot.get_orientation() - heading + 180) % 360 - 180) > ORIENTATION_DEADBAND
+
 #loop
 while True:
+    start = time.time()
 
     if robot.get_referee_usage() == 'yes':
         robot.decision(robot.get_referee()) #will read the referee 
     else:
         robot.decision(2) #always on play 
-   
-    time.sleep(0.05) 
-    
-    
-    
+    heading = robot.get_orientation()
+
+    #wakes up as soon as an input changes or the robot turns, but not before MIN_PERIOD
+    time.sleep(max(0, start + MIN_PERIOD - time.time()))
+    while time.time() < start + MAX_PERIOD:
+        changed = robot.bkb.wait_for_change(robot.mem, inputs, min(ORIENTATION_PERIOD, start + MAX_PERIOD - time.time()), last)
+        if changed is not None:
+            last = changed
+            break
+        if turned(heading):
+            break
@@ -226,6 +226,7 @@ bool handleResetService(um7::Comms* sensor,
  */
 void publishMsgs(um7::Registers& r)
 {
+    seq_write_begin(mem, SEQ_IMU);
 
     write_float(mem, IMU_GYRO_X, r.gyro.get_scaled(1)/10);
     write_float(mem, IMU_GYRO_Y, r.gyro.get_scaled(0)/10);
@@ -247,6 +248,8 @@ void publishMsgs(um7::Registers& r)
     write_float(mem, IMU_QUAT_Y, r.quat.get_scaled(1));
     write_float(mem, IMU_QUAT_Z, -r.quat.get_scaled(3));
 
+    seq_write_end(mem, SEQ_IMU);
+
 }
 
 
@@ -265,6 +268,8 @@ int main(int argc, char **argv)
     }
     const int mem_key = (int)reader.GetInteger("Communication","no_player_robofei",-1024)*100;
     int* mem = using_shared_memory(mem_key);
+    if (mem == NULL) // Segmento com outro layout
+        return 1;
 
     write_int(mem, IMU_RESET, 0);
 
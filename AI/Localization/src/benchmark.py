@@ -0,0 +1,310 @@
+#! /usr/bin/env python
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Headless benchmark of the localization filter. Generates seeded robot trajectories on the
+# 1040x740 field with their measure streams, in the same formats used by ObservationModel,
+# runs the filter over them and prints speed and accuracy as JSON.
+#
+# The filter starts from uniform particles and, by default, sees only the static landmarks and
+# the orientation: the ball and the teammates are known exactly by the scenario and would pin the
+# pose at the first step, so the convergence time would measure nothing. --dynamic adds them back,
+# and --kidnap moves the robot to a random pose at the given step, measuring the convergence from it.
+#
+# python benchmark.py --engine both --particles 1000 --steps 200 --seed 1 --output result.json
+
+import sys
+import json
+import time
+import argparse
+import random as rnd
+from math import *
+import numpy as np
+
+from particle import Particle, NormalizeLogWeights
+from particleset import ParticleSet, FromParticles
+from resampling import Resampler, KLDSampler
+from landmarkgrid import LandmarkGrid
+from clustering import PoseClustering
+from field import STATIC_LANDMARKS, GOAL_POST, FIELD_LENGTH, FIELD_WIDTH
+
+MEASURE_TYPES = {0: 'orientation', 1: 'landmark_distance', 2: 'landmark_angle', 3: 'ball', 4: 'friend'}
+
+
+class Scenario: # Seeded robot trajectory and the measures seen along it
+    def __init__(self, seed, steps = 200, dt = 0.1, fov = 120, max_range = 600, speed = 15, turn = 30,
+                 distance_sigma = 30, angle_sigma = 0.2, orientation_sigma = 0.2, odometry_error = 0.2,
+                 dynamic = False, kidnap = None):
+        self.seed = seed
+        self.dt = dt
+        self.kidnap = kidnap # Step at which the robot is moved without the filter knowing
+        random = np.random.RandomState(seed)
+
+        # Ball and teammates, known by the robot as dynamic landmarks {x, y, sigma}
+        ball = (random.uniform(100, 940), random.uniform(100, 640), 20)
+        friends = [(random.uniform(100, 940), random.uniform(100, 640), 30) for i in xrange(2)]
+        self.dynamic_landmarks = [ball, friends]
+
+        self.poses = []    # True pose at each step {x, y, r}
+        self.odometry = [] # Noisy motion read at each step {forward, rotation}
+        self.measures = [] # Measures at each step
+
+        x, y, r = random.uniform(100, 940), random.uniform(100, 640), random.uniform(0, 360)
+        for i in xrange(steps):
+            if i == kidnap:
+                x, y, r = random.uniform(100, 940), random.uniform(100, 640), random.uniform(0, 360)
+
+            # Walks forward while turning slowly, turning back to the field near its borders
+            rotation = random.normal(0, turn * dt)
+            ahead = (x + 100*cos(radians(r)), y + 100*sin(radians(r)))
+            if not (70 < ahead[0] < FIELD_LENGTH-70 and 70 < ahead[1] < FIELD_WIDTH-70):
+                rotation += turn * dt * 2
+            forward = speed * dt * random.uniform(0.5, 1.5)
+
+            r = (r + rotation) % 360
+            x += forward * cos(radians(r))
+            y += forward * sin(radians(r))
+
+            self.poses.append((x, y, r))
+            self.odometry.append((forward * (1 + random.normal(0, odometry_error)),
+                                  rotation + random.normal(0, odometry_error * abs(rotation) + 0.5)))
+
+            measures = [[0, r + degrees(random.normal(0, orientation_sigma/2)), orientation_sigma]]
+
+            for t in xrange(1, len(STATIC_LANDMARKS)): # Landmarks of known type, unknown number
+                for lm in STATIC_LANDMARKS[t]:
+                    d = hypot(lm[0]-x, lm[1]-y)
+                    bearing = degrees(atan2(lm[1]-y, lm[0]-x))
+                    if d < max_range and abs((bearing - r + 180) % 360 - 180) < fov/2:
+                        measures.append([1, t+1, 0, d + random.normal(0, distance_sigma/2), distance_sigma])
+                        measures.append([2, t+1, 0, bearing + 180 + degrees(random.normal(0, angle_sigma/2)), angle_sigma])
+
+            border = min(x, FIELD_LENGTH-x, y, FIELD_WIDTH-y)
+            measures.append([1, 1, 0, border + random.normal(0, distance_sigma/2), distance_sigma])
+
+            for obj, tp in ([(ball, 3)] + [(f, 4) for f in friends]) if dynamic else []:
+                d = hypot(obj[0]-x, obj[1]-y)
+                bearing = degrees(atan2(obj[1]-y, obj[0]-x))
+                if d < max_range and abs((bearing - r + 180) % 360 - 180) < fov/2:
+                    measures.append([tp, d + random.normal(0, distance_sigma/2), bearing + degrees(random.normal(0, 0.05))])
+
+            self.measures.append(measures)
+
+
+class ListFilter: # Filter over a list of Particle objects
+    name = 'particle'
+
+    def __init__(self, n, grid = None, log = False, moving_error = 5, rotation_error = 3):
+        self.particles = [Particle() for i in xrange(n)]
+        for p in self.particles:
+            p.SetErrors(moving_error, rotation_error)
+        self.grid = grid
+        self.log = log
+        self.resampler = Resampler()
+
+    def __len__(self):
+        return len(self.particles)
+
+    def Motion(self, forward, rotation):
+        for p in self.particles:
+            p.MotionModel(forward*cos(radians(p.r)), forward*sin(radians(p.r)), rotation)
+
+    def Observation(self, measures, dynamic_landmarks):
+        for p in self.particles:
+            p.ObservationModel(measures, STATIC_LANDMARKS, dynamic_landmarks, self.grid, self.log)
+        if self.log: # Weights relative to their sum, so they do not underflow
+            NormalizeLogWeights(self.particles)
+
+    def Resample(self):
+        self.particles = self.resampler.Resample(self.particles)
+
+    def Arrays(self):
+        s = FromParticles(self.particles)
+        return s.x, s.y, s.r, s.w
+
+
+class SetFilter: # Filter over a ParticleSet
+    name = 'set'
+
+    def __init__(self, n, grid = None, log = False, moving_error = 5, rotation_error = 3, kld = False):
+        self.particles = ParticleSet(n)
+        self.particles.SetErrors(moving_error, rotation_error)
+        self.particles.SetGrid(grid)
+        self.particles.SetLogDomain(log)
+        self.kld = KLDSampler(max_particles = n) if kld else None
+        self.resampler = Resampler()
+
+    def __len__(self):
+        return len(self.particles)
+
+    def Motion(self, forward, rotation):
+        r = np.radians(self.particles.r)
+        self.particles.MotionModel(forward*np.cos(r), forward*np.sin(r), rotation)
+
+    def Observation(self, measures, dynamic_landmarks):
+        self.particles.ObservationModel(measures, STATIC_LANDMARKS, dynamic_landmarks)
+
+    def Resample(self):
+        if self.kld is not None:
+            total = self.particles.Normalize()
+            if not self.particles.log:
+                total = np.log(total) if total > 0 else -np.inf
+            self.kld.Resample(self.particles, log_likelihood = total - np.log(len(self.particles)))
+        else:
+            self.resampler.Resample(self.particles)
+
+    def Arrays(self):
+        p = self.particles
+        return p.x, p.y, p.r, p.w
+
+
+ENGINES = {'particle': ListFilter, 'set': SetFilter}
+
+
+def Run(filter, scenario, clustering, threshold = 50, hold = 10):
+    # Runs the filter over a scenario, returning the time spent in each stage and the errors
+    times = {'motion': 0.0, 'observation': 0.0, 'resampling': 0.0, 'estimate': 0.0}
+    position_errors = []
+    angle_errors = []
+    particle_updates = 0
+
+    for i in xrange(len(scenario.poses)):
+        start = time.time()
+        filter.Motion(*scenario.odometry[i])
+        times['motion'] += time.time() - start
+
+        start = time.time()
+        filter.Observation(scenario.measures[i], scenario.dynamic_landmarks)
+        times['observation'] += time.time() - start
+        particle_updates += len(filter)
+
+        start = time.time()
+        best = clustering.Best(*filter.Arrays())
+        times['estimate'] += time.time() - start
+
+        start = time.time()
+        filter.Resample()
+        times['resampling'] += time.time() - start
+
+        x, y, r = scenario.poses[i]
+        if best is None:
+            position_errors.append(float('inf'))
+            angle_errors.append(180.0)
+        else:
+            position_errors.append(hypot(best[0]-x, best[1]-y))
+            angle_errors.append(abs((best[2] - r + 180) % 360 - 180))
+
+    # Steps from the start (or the kidnapping) until the error stays under the threshold for hold steps
+    first = scenario.kidnap or 0
+    converged = None
+    for i in xrange(first, len(position_errors) - hold + 1):
+        if max(position_errors[i:i+hold]) < threshold:
+            converged = i - first
+            break
+
+    after = position_errors[first + converged:] if converged is not None else []
+    filter_time = times['motion'] + times['observation'] + times['resampling']
+    return {
+        'seed': scenario.seed,
+        'steps': len(scenario.poses),
+        'times': times,
+        'particles_per_second': particle_updates / filter_time if filter_time > 0 else None,
+        'rmse_position': sqrt(np.mean(np.square(position_errors))),
+        'rmse_angle': sqrt(np.mean(np.square(angle_errors))),
+        'rmse_position_converged': sqrt(np.mean(np.square(after))) if after else None,
+        'convergence_step': converged,
+        'convergence_time': converged * scenario.dt if converged is not None else None,
+        'final_particles': len(filter),
+    }
+
+def SyntheticMeasures(scenario, distance_sigma = 30, angle_sigma = 0.2, orientation_sigma = 0.2):
+    # One measure of each type in MEASURE_TYPES, taken from the first pose whether the object is in view
+    # or not, so every type is timed even when the trajectory never sees it
+    x, y, r = scenario.poses[0]
+    ball, friends = scenario.dynamic_landmarks
+    def seen(obj):
+        return hypot(obj[0]-x, obj[1]-y), degrees(atan2(obj[1]-y, obj[0]-x))
+    d, bearing = seen(STATIC_LANDMARKS[GOAL_POST-1][0])
+    return {0: [0, r, orientation_sigma],
+            1: [1, GOAL_POST, 0, d, distance_sigma],
+            2: [2, GOAL_POST, 0, bearing + 180, angle_sigma],
+            3: [3] + list(seen(ball)),
+            4: [4] + list(seen(friends[0]))}
+
+def MeasureCost(engine, n, scenario, grid = None, log = False, repeat = 3):
+    # Time of ObservationModel per particle for each measure type alone, in microseconds
+    cost = {}
+    for tp, m in sorted(SyntheticMeasures(scenario).items()):
+        filter = ENGINES[engine](n, grid, log)
+        best = float('inf')
+        for i in xrange(repeat):
+            start = time.time()
+            filter.Observation([m], scenario.dynamic_landmarks)
+            best = min(best, time.time() - start)
+        cost[MEASURE_TYPES[tp]] = best / n * 1e6
+    return cost
+
+def Benchmark(engines = ('set',), particles = 1000, steps = 200, seed = 1, trajectories = 3,
+              grid = False, log = False, kld = False, threshold = 50, dynamic = False, kidnap = None):
+    rnd.seed(seed)
+    np.random.seed(seed)
+
+    landmark_grid = LandmarkGrid(STATIC_LANDMARKS, path = '../Data/') if grid else None
+    clustering = PoseClustering()
+    scenarios = [Scenario(seed + i, steps, dynamic = dynamic, kidnap = kidnap) for i in xrange(trajectories)]
+
+    result = {
+        'config': {'particles': particles, 'steps': steps, 'seed': seed, 'trajectories': trajectories,
+                   'grid': grid, 'log': log, 'kld': kld, 'threshold': threshold, 'dynamic': dynamic,
+                   'kidnap': kidnap},
+        'engines': {},
+    }
+    for engine in engines:
+        runs = []
+        for scenario in scenarios:
+            if engine == 'set':
+                filter = SetFilter(particles, landmark_grid, log, kld = kld)
+            else:
+                filter = ListFilter(particles, landmark_grid, log)
+            runs.append(Run(filter, scenario, clustering, threshold))
+
+        converged = [r['convergence_time'] for r in runs if r['convergence_time'] is not None]
+        result['engines'][engine] = {
+            'particles_per_second': float(np.mean([r['particles_per_second'] for r in runs])),
+            'measure_cost_us': MeasureCost(engine, particles, scenarios[0], landmark_grid, log),
+            'rmse_position': float(np.mean([r['rmse_position'] for r in runs])),
+            'rmse_angle': float(np.mean([r['rmse_angle'] for r in runs])),
+            'converged': len(converged),
+            'convergence_time': float(np.mean(converged)) if converged else None,
+            'runs': runs,
+        }
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Localization benchmark', epilog= 'Prints speed and accuracy of the filter as JSON')
+    parser.add_argument('--engine', '-e', default='set', choices=['set', 'particle', 'both'], help = 'filter implementation')
+    parser.add_argument('--particles', '-n', type=int, default=1000, help = 'number of particles')
+    parser.add_argument('--steps', '-s', type=int, default=200, help = 'steps of each trajectory')
+    parser.add_argument('--seed', type=int, default=1, help = 'seed of the first trajectory')
+    parser.add_argument('--trajectories', '-t', type=int, default=3, help = 'number of trajectories')
+    parser.add_argument('--grid', action="store_true", help = 'uses the landmark grid')
+    parser.add_argument('--log', action="store_true", help = 'uses log-domain weights')
+    parser.add_argument('--kld', action="store_true", help = 'uses KLD-sampling (set engine only)')
+    parser.add_argument('--threshold', type=float, default=50, help = 'position error of convergence, in centimeters')
+    parser.add_argument('--dynamic', action="store_true", help = 'also measures the ball and the teammates, which pin the pose')
+    parser.add_argument('--kidnap', '-k', type=int, help = 'moves the robot to a random pose at this step')
+    parser.add_argument('--output', '-o', help = 'writes the JSON to a file instead of the standard output')
+    args = parser.parse_args()
+
+    engines = ['set', 'particle'] if args.engine == 'both' else [args.engine]
+    result = Benchmark(engines, args.particles, args.steps, args.seed, args.trajectories,
+                       args.grid, args.log, args.kld, args.threshold, args.dynamic, args.kidnap)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    else:
+        json.dump(result, sys.stdout, indent=2, sort_keys=True)
+        print
@@ -0,0 +1,119 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import numpy as np
+
+
+class PoseClustering: # Grid-hashed mode seeking over the particle posterior
+    # The particles are hashed into cells of {bandwidth, bandwidth, angle_bandwidth} and the cell
+    # weights are smoothed with a 3x3x3 box kernel. Like mean-shift on that density, every cell
+    # climbs to its heaviest neighbour until it reaches a local maximum, which is a mode. The cost
+    # is linear in the number of particles and in the number of cells, never pairwise, and the
+    # mirrored modes of the symmetric field end up as separate hypotheses.
+
+    def __init__(self, bandwidth = 50, angle_bandwidth = 45, k = 3, width = 1040, height = 740):
+        self.bandwidth = float(bandwidth)             # Cell size of the positions, in centimeters
+        self.angle_bandwidth = float(angle_bandwidth) # Cell size of the orientations, in degrees
+        self.k = k                                    # Number of hypotheses returned
+
+        self.nx = int(np.ceil(width / self.bandwidth))
+        self.ny = int(np.ceil(height / self.bandwidth))
+        self.nr = int(np.ceil(360 / self.angle_bandwidth))
+
+        self.hypotheses = [] # Last hypotheses {x, y, theta, weight}, best first
+        self.labels = None   # Hypothesis of each particle in the last call, -1 if not in the k best
+
+    def Cluster(self, x, y, r, w):
+        # Returns the k best pose hypotheses as (x, y, theta, weight), weights summing up to one
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        r = np.asarray(r, dtype=np.float64) % 360
+        w = np.asarray(w, dtype=np.float64)
+
+        total = np.sum(w)
+        if len(x) == 0 or not total > 0:
+            self.hypotheses = []
+            self.labels = np.full(len(x), -1, dtype=np.int64)
+            return self.hypotheses
+        w = w / total
+
+        # Hashes the particles into cells, the ones out of the field go to the border cells
+        i = np.clip(np.floor(x / self.bandwidth).astype(np.int64), 0, self.nx - 1)
+        j = np.clip(np.floor(y / self.bandwidth).astype(np.int64), 0, self.ny - 1)
+        k = np.floor(r / self.angle_bandwidth).astype(np.int64) % self.nr
+        cell = (i * self.ny + j) * self.nr + k
+        size = self.nx * self.ny * self.nr
+        hist = np.bincount(cell, w, size).reshape(self.nx, self.ny, self.nr)
+
+        # Smoothed density, padded with zeros in the positions and wrapped in the orientation
+        padded = np.pad(hist, ((1, 1), (1, 1), (0, 0)), 'constant')
+        padded = np.concatenate((padded[:, :, -1:], padded, padded[:, :, :1]), axis=2)
+        offsets = [(0, 0, 0)] + [(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1)
+                                 if (a, b, c) != (0, 0, 0)] # Itself first, so ties keep the cell
+        density = np.sum([padded[1+a:1+a+self.nx, 1+b:1+b+self.ny, 1+c:1+c+self.nr]
+                          for a, b, c in offsets], axis=0)
+
+        # Each cell points to its neighbour with the greatest density
+        ci, cj, ck = np.meshgrid(np.arange(self.nx), np.arange(self.ny), np.arange(self.nr), indexing='ij')
+        dpad = np.pad(density, ((1, 1), (1, 1), (0, 0)), 'constant', constant_values=-1)
+        dpad = np.concatenate((dpad[:, :, -1:], dpad, dpad[:, :, :1]), axis=2)
+        around = np.array([dpad[1+a:1+a+self.nx, 1+b:1+b+self.ny, 1+c:1+c+self.nr] for a, b, c in offsets])
+        best = np.argmax(around, axis=0)
+        steps = np.array(offsets)[best]
+        parent = (((ci + steps[..., 0]) * self.ny + (cj + steps[..., 1])) * self.nr +
+                  (ck + steps[..., 2]) % self.nr).ravel()
+
+        # Follows the pointers up to the local maxima
+        while True:
+            climbed = parent[parent]
+            if np.array_equal(climbed, parent):
+                break
+            parent = climbed
+
+        # Pose of the particles of each mode
+        roots, label = np.unique(parent[cell], return_inverse=True)
+        n = len(roots)
+        mw = np.bincount(label, w, n)
+        safe = np.where(mw > 0, mw, 1)
+        mx = np.bincount(label, w*x, n) / safe
+        my = np.bincount(label, w*y, n) / safe
+        mc = np.bincount(label, w*np.cos(np.radians(r)), n)
+        ms = np.bincount(label, w*np.sin(np.radians(r)), n)
+        mt = np.degrees(np.arctan2(ms, mc)) % 360
+
+        # Merges the modes split by a plateau of the density, the heaviest first
+        merged = np.arange(n)
+        order = np.argsort(-mw)
+        for a in xrange(n):
+            for b in xrange(a):
+                p, q = order[a], order[b]
+                if merged[q] != q:
+                    continue
+                if (np.hypot(mx[p] - mx[q], my[p] - my[q]) < self.bandwidth and
+                        abs((mt[p] - mt[q] + 180) % 360 - 180) < self.angle_bandwidth):
+                    merged[p] = q
+                    break
+        return self._Ranked(x, y, r, w, merged[label])
+
+    def _Ranked(self, x, y, r, w, label): # Builds the k heaviest hypotheses from the particles' modes
+        n = np.max(label) + 1
+        mw = np.bincount(label, w, n)
+        safe = np.where(mw > 0, mw, 1)
+        mx = np.bincount(label, w*x, n) / safe
+        my = np.bincount(label, w*y, n) / safe
+        mt = np.degrees(np.arctan2(np.bincount(label, w*np.sin(np.radians(r)), n),
+                                   np.bincount(label, w*np.cos(np.radians(r)), n))) % 360
+
+        order = [j for j in np.argsort(-mw)[:self.k] if mw[j] > 0]
+        rank = np.full(n, -1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        self.labels = rank[label]
+        self.hypotheses = [(mx[j], my[j], mt[j], mw[j]) for j in order]
+        return self.hypotheses
+
+    def Best(self, x, y, r, w): # Only the most likely hypothesis
+        hypotheses = self.Cluster(x, y, r, w)
+        if len(hypotheses) == 0:
+            return None
+        return hypotheses[0]
@@ -0,0 +1,23 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Field layout used by the localization, in centimeters. The lines form a 900x600 field
+# centred in a 1040x740 area, with X growing from the defense goal to the attack goal.
+
+FIELD_LENGTH = 1040 # Size in X, borders included
+FIELD_WIDTH = 740   # Size in Y, borders included
+
+# Static landmarks grouped by the landmark type used in the measures (type = index + 1).
+# Type 1 is the field border, which Particle.ObservationModel computes from the field size.
+STATIC_LANDMARKS = [
+    [],                                             # 1 - Field border
+    [(70, 370), (970, 370)],                        # 2 - Goals: defense, attack
+    [(70, 240), (70, 500), (970, 240), (970, 500)], # 3 - Goal posts
+    [(520, 370)],                                   # 4 - Centre mark
+]
+
+# Landmark types
+BORDER = 1
+GOAL = 2
+GOAL_POST = 3
+CENTRE = 4
@@ -0,0 +1,100 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import os
+import hashlib
+import numpy as np
+
+
+class LandmarkGrid: # Precomputed distance/bearing lookup tables for the static landmarks
+    # For every landmark type (1..len(static_landmarks)) and for all landmarks together (type 0),
+    # each table holds, over a grid of the field, the smallest difference between the measure and
+    # the distance/bearing of every landmark of that type. Since Gauss decreases with that difference,
+    # the best landmark likelihood becomes a single lookup instead of a scan of all landmarks.
+
+    def __init__(self, static_landmarks, resolution = 10, distance_resolution = 10, angle_resolution = 5,
+                 path = '../Data/', width = 1040, height = 740):
+        self.resolution = float(resolution)                   # Size of a grid cell
+        self.distance_resolution = float(distance_resolution) # Step of the measured distances
+        self.angle_resolution = float(angle_resolution)       # Step of the measured angles, in degrees
+        self.width = width
+        self.height = height
+
+        self.nx = int(np.ceil(width / self.resolution)) + 1
+        self.ny = int(np.ceil(height / self.resolution)) + 1
+        self.nd = int(np.ceil(np.hypot(width, height) / self.distance_resolution)) + 2
+        self.na = int(np.ceil(360 / self.angle_resolution)) + 1
+
+        # Landmark groups, indexed by the landmark type used in the measures
+        groups = [[lm for tp in static_landmarks for lm in tp]] + [list(tp) for tp in static_landmarks]
+
+        # Name of the files, changing whenever landmarks or resolutions change
+        key = repr((groups, self.resolution, self.distance_resolution, self.angle_resolution, width, height))
+        name = 'landmark_grid_' + hashlib.md5(key.encode('utf-8')).hexdigest()[:12]
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self.distance = []
+        self.bearing = []
+        for t in xrange(len(groups)):
+            self.distance.append(self._Load(os.path.join(path, '%s_d%d.npy' % (name, t)), self._BuildDistance, groups[t]))
+            self.bearing.append(self._Load(os.path.join(path, '%s_a%d.npy' % (name, t)), self._BuildBearing, groups[t]))
+
+    def _Load(self, filename, build, landmarks): # Memory maps a table, building it only if missing
+        if not os.path.exists(filename):
+            np.save(filename, build(landmarks))
+        return np.load(filename, mmap_mode='r')
+
+    def _Cells(self): # Field coordinates of the grid cells
+        x = np.arange(self.nx) * self.resolution
+        y = np.arange(self.ny) * self.resolution
+        return np.meshgrid(x, y, indexing='ij')
+
+    def _BuildDistance(self, landmarks):
+        x, y = self._Cells()
+        table = np.full((self.nd, self.nx, self.ny), 1e6, dtype=np.float32) # Far enough for groups without landmarks
+        for lm in landmarks:
+            d = np.hypot(x-lm[0], y-lm[1])
+            for k in xrange(self.nd):
+                np.minimum(table[k], np.abs(d - k*self.distance_resolution), out=table[k])
+        return table
+
+    def _BuildBearing(self, landmarks):
+        x, y = self._Cells()
+        table = np.full((self.na, self.nx, self.ny), np.pi, dtype=np.float32)
+        for lm in landmarks:
+            t = np.arctan2(y-lm[1], x-lm[0])
+            for k in xrange(self.na):
+                diff = np.abs(np.angle(np.exp(1j * (t - np.radians(k*self.angle_resolution)))))
+                np.minimum(table[k], diff, out=table[k])
+        return table
+
+    def Distance(self, landmark_type, x, y, reference_distance):
+        # Smallest |hypot(x-lx, y-ly) - reference_distance| over the landmarks of the given type
+        k = np.clip(reference_distance / self.distance_resolution, 0, self.nd - 1)
+        return self._Lookup(self.distance[landmark_type], x, y, k)
+
+    def Bearing(self, landmark_type, x, y, reference_angle):
+        # Smallest angle between atan2(y-ly, x-lx) and reference_angle (radians) over the landmarks of the given type
+        k = (np.degrees(reference_angle) % 360) / self.angle_resolution
+        return self._Lookup(self.bearing[landmark_type], x, y, k)
+
+    def _Lookup(self, table, x, y, k):
+        # Bilinear interpolation on the field, linear between the two closest measure steps.
+        # Positions outside the field use the closest border cell.
+        fx = np.clip(np.asarray(x, dtype=np.float64) / self.resolution, 0, self.nx - 1)
+        fy = np.clip(np.asarray(y, dtype=np.float64) / self.resolution, 0, self.ny - 1)
+        i = np.minimum(fx.astype(np.int64), self.nx - 2)
+        j = np.minimum(fy.astype(np.int64), self.ny - 2)
+        tx = fx - i
+        ty = fy - j
+
+        k0 = min(int(k), table.shape[0] - 2)
+        tk = k - k0
+
+        value = 0
+        for plane, wk in ((table[k0], 1 - tk), (table[k0+1], tk)):
+            value = value + wk * ((1-tx) * (1-ty) * plane[i, j] + tx * (1-ty) * plane[i+1, j] +
+                                  (1-tx) * ty * plane[i, j+1] + tx * ty * plane[i+1, j+1])
+        return value
@@ -0,0 +1,295 @@
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Localization process: runs the particle filter over the vision and IMU data read from the
+# blackboard and publishes the estimated pose at a fixed rate, so the decision does not need
+# to poll the vision by itself.
+
+try:
+    from configparser import ConfigParser
+except ImportError:
+    from ConfigParser import ConfigParser  # ver. < 3.0
+
+#looking for the library SharedMemory
+import sys
+sys.path.append('../../Blackboard/src/')
+import argparse
+from SharedMemory import SharedMemory
+
+import time
+from math import degrees, radians, cos, sin
+import numpy as np
+
+from particleset import ParticleSet
+from resampling import KLDSampler
+from landmarkgrid import LandmarkGrid
+from clustering import PoseClustering
+from field import STATIC_LANDMARKS, GOAL, FIELD_LENGTH, FIELD_WIDTH
+
+# Default values, used for the options missing in the [Localization] section of config.ini
+DEFAULTS = {
+    'frequency': '10',             # Cycles per second
+    'target_time': '0.07',         # Deadline of each cycle, in seconds
+    'min_particles': '300',
+    'max_particles': '5000',
+    'orientation': 'yes',          # Uses the IMU orientation
+    'orientation_offset': '0',     # Field orientation when the IMU reads zero, in degrees
+    'orientation_sigma': '0.2',
+    'goal_distance_sigma': '60',
+    'goal_angle_sigma': '0.3',
+    'robot_sigma': '40',
+    'moving_error': '3',           # Diffusion of the particles in each cycle, in centimeters
+    'rotation_error': '2',         # Diffusion of the particles in each cycle, in degrees
+    'walk_speed': '10',            # Odometry of the walking actions, in centimeters per second
+    'sidle_speed': '5',
+    'turn_speed': '20',            # Odometry of the turning actions, in degrees per second
+    'fall_moving_error': '50',     # Diffusion added when the robot falls
+    'fall_rotation_error': '45',
+    'cluster_bandwidth': '50',     # Cell size of the pose clustering, in centimeters
+    'cluster_angle_bandwidth': '45',
+    'view_rate': '2',              # Frames per second of the particle window, when shown
+}
+
+# DECISION_ACTION_A codes and the motion they produce {forward, left, rotation}, in speed units
+ACTIONS = {
+    1: (1, 0, 0),  # Walk forward
+    2: (0, 0, 1),  # Turn left
+    3: (0, 0, -1), # Turn right
+    6: (0, 1, 0),  # Sidle left
+    7: (0, -1, 0), # Sidle right
+    8: (0.5, 0, 0), # Walk forward slow
+}
+
+
+class Localization(object): # Particle filter fed by the blackboard
+
+    def __init__(self, config_file = '../../Control/Data/config.ini'):
+        self.config = ConfigParser(DEFAULTS)
+        self.config.read(config_file)
+        if not self.config.has_section('Localization'):
+            self.config.add_section('Localization')
+
+        self.mem_key = int(self.config.get('Communication', 'no_player_robofei'))*100
+
+        #Instantiate the BlackBoard's class:
+        self.bkb = SharedMemory()
+        self.mem = self.bkb.shd_constructor(self.mem_key)
+
+        self.period = 1.0 / self.getfloat('frequency')
+        self.target_time = min(self.getfloat('target_time'), self.period)
+        self.max_particles = self.getint('max_particles')
+
+        self.kld = KLDSampler(min_particles = self.getint('min_particles'), max_particles = self.max_particles)
+
+        self.particles = ParticleSet(self.max_particles)
+        self.particles.SetLogDomain()
+        self.particles.SetGrid(LandmarkGrid(STATIC_LANDMARKS, path = '../Data/'))
+
+        self.clustering = PoseClustering(self.getfloat('cluster_bandwidth'), self.getfloat('cluster_angle_bandwidth'), k = 2)
+
+        self.fallen = False
+        self.last = time.time()
+
+        # Seconds per KLD candidate, measured in the last cycles; a first resampling of a scratch set
+        # gives the initial value, so the first cycle keeps its deadline too
+        scratch = ParticleSet(self.max_particles)
+        before = time.time()
+        KLDSampler(min_particles = self.kld.min_particles, max_particles = self.max_particles).Resample(scratch)
+        self.resample_cost = (time.time() - before) / self.max_particles
+        self.skipped = 0          # Measures left out of the last cycle by the deadline
+
+        # Last estimate
+        self.pose = (FIELD_LENGTH/2, FIELD_WIDTH/2, 0)
+        self.covariance = np.zeros((2, 2))
+        self.theta_variance = 0
+        self.hypotheses = []
+
+    def getfloat(self, option):
+        return self.config.getfloat('Localization', option)
+
+    def getint(self, option):
+        return self.config.getint('Localization', option)
+
+    def Heading(self): # Robot orientation in the field, in degrees
+        return degrees(self.bkb.read_float(self.mem, 'IMU_EULER_Z')) + self.getfloat('orientation_offset')
+
+    def Measures(self): # Builds the measures of this cycle from the blackboard
+        measures = []
+        friends = []
+
+        use_imu = self.config.get('Localization', 'orientation') == 'yes'
+        heading = self.Heading() if use_imu else None
+
+        if heading is not None:
+            measures.append([0, heading, self.getfloat('orientation_sigma')])
+
+        if self.bkb.read_int(self.mem, 'VISION_LOST_GOAL') == 0:
+            dist = self.bkb.read_float(self.mem, 'VISION_GOAL_DIST')
+            if dist > 0:
+                measures.append([1, GOAL, 0, dist, self.getfloat('goal_distance_sigma')])
+                if heading is not None:
+                    # Direction from the goal to the robot
+                    angle = heading + self.bkb.read_float(self.mem, 'VISION_GOAL_ANGLE') + 180
+                    measures.append([2, GOAL, 0, angle, self.getfloat('goal_angle_sigma')])
+
+        if heading is not None: # Teammates seen by the vision, at the positions they publish
+            for i in xrange(1, 12):
+                x = self.bkb.read_float(self.mem, 'LOCALIZATION_RBT%02d_X' % i)
+                y = self.bkb.read_float(self.mem, 'LOCALIZATION_RBT%02d_Y' % i)
+                if x != 0 or y != 0:
+                    friends.append((x, y, self.getfloat('robot_sigma')))
+
+            for i in xrange(1, 12):
+                dist = self.bkb.read_float(self.mem, 'VISION_RBT%02d_DIST' % i)
+                if dist > 0 and friends:
+                    measures.append([4, dist, heading + self.bkb.read_float(self.mem, 'VISION_RBT%02d_ANGLE' % i)])
+
+        return measures, [(0, 0, 0), friends]
+
+    def Motion(self, dt): # Moves the particles using the action sent to the control
+        moving = self.getfloat('moving_error')
+        rotation = self.getfloat('rotation_error')
+
+        fallen = self.bkb.read_int(self.mem, 'IMU_STATE') != 0 # Nonzero while fallen, as read by the control
+        if fallen and not self.fallen:
+            moving += self.getfloat('fall_moving_error')
+            rotation += self.getfloat('fall_rotation_error')
+        self.fallen = fallen
+
+        forward = left = turn = 0
+        if not fallen and self.bkb.read_int(self.mem, 'CONTROL_MOVING') != 0:
+            f, l, t = ACTIONS.get(self.bkb.read_int(self.mem, 'DECISION_ACTION_A'), (0, 0, 0))
+            forward = f * self.getfloat('walk_speed') * dt
+            left = l * self.getfloat('sidle_speed') * dt
+            turn = t * self.getfloat('turn_speed') * dt
+
+        p = self.particles
+        p.SetErrors(moving, rotation)
+        r = np.radians(p.r)
+        p.MotionModel(forward*np.cos(r) - left*np.sin(r), forward*np.sin(r) + left*np.cos(r), turn)
+
+    def Estimate(self): # Pose of the best cluster, with its covariance
+        p = self.particles
+        self.hypotheses = self.clustering.Cluster(p.x, p.y, p.r, p.w)
+        if len(self.hypotheses) == 0:
+            return self.pose
+        near = self.clustering.labels == 0
+
+        w = p.w[near] / np.sum(p.w[near])
+        x = np.sum(w * p.x[near])
+        y = np.sum(w * p.y[near])
+        dx = p.x[near] - x
+        dy = p.y[near] - y
+        self.covariance = np.array([[np.sum(w*dx*dx), np.sum(w*dx*dy)],
+                                    [np.sum(w*dx*dy), np.sum(w*dy*dy)]])
+
+        # Circular mean and variance of the orientation
+        c = np.sum(w * np.cos(np.radians(p.r[near])))
+        s = np.sum(w * np.sin(np.radians(p.r[near])))
+        theta = degrees(np.arctan2(s, c)) % 360
+        length = min(max(np.hypot(c, s), 1e-12), 1)
+        self.theta_variance = degrees(np.sqrt(-2 * np.log(length)))**2
+
+        self.pose = (x, y, theta)
+        return self.pose
+
+    def Publish(self): # Writes the whole estimate at once, so readers never mix two cycles
+        with self.bkb.group(self.mem, 'LOCALIZATION') as group:
+            self._Write(group)
+
+    def _Write(self, group):
+        x, y, theta = self.pose
+        group.write_int(self.mem, 'LOCALIZATION_X', int(round(x)))
+        group.write_int(self.mem, 'LOCALIZATION_Y', int(round(y)))
+        group.write_int(self.mem, 'LOCALIZATION_THETA', int(round(theta)))
+        group.write_float(self.mem, 'LOCALIZATION_COV_XX', self.covariance[0][0])
+        group.write_float(self.mem, 'LOCALIZATION_COV_XY', self.covariance[0][1])
+        group.write_float(self.mem, 'LOCALIZATION_COV_YY', self.covariance[1][1])
+        group.write_float(self.mem, 'LOCALIZATION_COV_THETA', self.theta_variance)
+
+        for i in xrange(2): # Two best hypotheses, so the decision can tell the mirrored modes apart
+            hx, hy, ht, hw = self.hypotheses[i] if i < len(self.hypotheses) else (0, 0, 0, 0)
+            group.write_float(self.mem, 'LOCALIZATION_HYP%d_X' % (i+1), hx)
+            group.write_float(self.mem, 'LOCALIZATION_HYP%d_Y' % (i+1), hy)
+            group.write_float(self.mem, 'LOCALIZATION_HYP%d_THETA' % (i+1), ht)
+            group.write_float(self.mem, 'LOCALIZATION_HYP%d_WEIGHT' % (i+1), hw)
+
+        vision = self.bkb.read_group(self.mem, 'VISION') # Ball and head of the same frame
+        if vision.VISION_LOST == 0: # Ball seen from the estimated pose
+            angle = radians(theta + vision.VISION_PAN_DEG)
+            group.write_float(self.mem, 'LOCALIZATION_BALL_X', x + vision.VISION_BALL_DIST*cos(angle))
+            group.write_float(self.mem, 'LOCALIZATION_BALL_Y', y + vision.VISION_BALL_DIST*sin(angle))
+
+    def AdaptParticleCap(self, elapsed):
+        # Adaptive cap on the number of particles KLD-sampling may use: shrinks after a cycle took
+        # longer than target_time and grows back while the cycles are fast. The deadline in Cycle
+        # bounds each cycle; this cap keeps the following ones from having to cut anything.
+        if elapsed > self.target_time:
+            self.kld.max_particles = max(self.kld.min_particles, int(self.kld.max_particles * 0.8))
+        elif elapsed < 0.5 * self.target_time:
+            self.kld.max_particles = min(self.max_particles, int(self.kld.max_particles * 1.1) + 1)
+
+    def Cycle(self):
+        start = time.time()
+        deadline = start + self.target_time
+        dt = start - self.last
+        self.last = start
+
+        self.Motion(dt)
+
+        # The orientation and the static landmarks are always weighed; the teammates seen, only
+        # while the cycle is inside its deadline
+        measures, dynamic_landmarks = self.Measures()
+        static = [m for m in measures if m[0] <= 2]
+        dynamic = [m for m in measures if m[0] > 2]
+        self.particles.ObservationModel(static, STATIC_LANDMARKS, dynamic_landmarks)
+        self.skipped = len(dynamic)
+        if dynamic and time.time() < deadline:
+            logw = self.particles.logw
+            self.particles.ObservationModel(dynamic, STATIC_LANDMARKS, dynamic_landmarks)
+            self.particles.logw += logw # Log domain: the densities of both passes add up
+            self.skipped = 0
+        total = self.particles.Normalize()
+
+        # The pose is published before the resampling, so it is never late because of it
+        self.Estimate()
+        self.Publish()
+
+        # Draws only as many KLD candidates as fit in the time left (min_particles at least)
+        limit = max(deadline - time.time(), 0) / self.resample_cost
+        before = time.time()
+        self.kld.Resample(self.particles, log_likelihood = total - np.log(len(self.particles)), limit = limit)
+        cost = (time.time() - before) / self.kld.stats['candidates']
+        self.resample_cost = 0.8 * self.resample_cost + 0.2 * cost
+
+        elapsed = time.time() - start
+        self.AdaptParticleCap(elapsed)
+        return elapsed
+
+
+if __name__ == '__main__':
+    print
+    print '################### Localization #########################'
+    print
+
+    parser = argparse.ArgumentParser(description='Robot localization', epilog= 'Publishes the pose estimated by the particle filter')
+    parser.add_argument('--view', '-v', action="store_true", help = 'shows the particles in a window')
+    args = parser.parse_args()
+
+    loc = Localization()
+
+    view = None
+    if args.view:
+        from visualiser import Visualiser
+        view = Visualiser(loc.getfloat('view_rate'))
+
+    while True:
+        start = time.time()
+        elapsed = loc.Cycle()
+        if view is not None:
+            view.Update(loc.particles, loc.pose)
+            if view.closed: # Window closed by the user: runs on without it
+                view = None
+        print 'Pose: %4d %4d %4d  Particles: %5d  Time: %.3f' % (loc.pose[0], loc.pose[1], loc.pose[2], len(loc.particles), elapsed)
+        time.sleep(max(0, loc.period - (time.time() - start)))
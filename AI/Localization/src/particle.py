@@ -4,7 +4,6 @@ __license__ = "GNU General Public License v3.0"
 
 from math import *
 import random as rnd
-import pygame
 
 
 class Particle: # Class implementing a particle
@@ -25,6 +24,7 @@ class Particle: # Class implementing a particle
             self.r = r                     # Starts at a given orientation
 
         self.w = 1 # Particle's weight
+        self.logw = 0 # Particle's log-weight, used in the log domain
 
         self.rotation_sigma = 0 # Used for errors
         self.moving_sigma = 0   # Used for errors
@@ -41,13 +41,17 @@ class Particle: # Class implementing a particle
         self.y += y_motion # Moves in Y
         self.r += rotation # Rotates
 
-    def ObservationModel(self, measures, static_landmarks, dynamic_landmarks):
-        self.w = 1 # Initializes particles weight
+    def ObservationModel(self, measures, static_landmarks, dynamic_landmarks, grid = None, log = False): # grid is an optional LandmarkGrid
+        if log: # Adds log-densities into self.logw instead of multiplying densities into self.w
+            gauss, angle_likelihood, bdgauss, none = LogGauss, LogAngleLikelihood, LogBDGauss, -float('inf')
+        else:
+            gauss, angle_likelihood, bdgauss, none = Gauss, AngleLikelihood, BDGauss, 0
+        likelihoods = [] # Likelihood of each measure
 
         for m in measures: # For each measure
 
             if m[0] == 0: # Likelihood of orientation {type, reference_angle, sigma}
-                self.w *= AngleLikelihood(radians(self.r), radians(m[1]), m[2])
+                likelihoods.append(angle_likelihood(radians(self.r), radians(m[1]), m[2]))
 
             elif m[0] == 1: # Likelihood of static landmarks {type, landmark_type, landmark_number, reference_distance, sigma}
 
@@ -56,49 +60,55 @@ class Particle: # Class implementing a particle
                     if m[2] != 0: # If it is known which landmark
                         # Just compute the likelihood
                         d = hypot(self.x-static_landmarks[m[1]-1][m[2]-1][0], self.y-static_landmarks[m[1]-1][m[2]-1][1])
-                        self.w *= Gauss(d, m[3], m[4])
+                        likelihoods.append(gauss(d, m[3], m[4]))
+
+                    elif grid is not None: # Looks the closest landmark of given type up
+                        likelihoods.append(gauss(float(grid.Distance(m[1], self.x, self.y, m[3])), 0, m[4]))
 
                     else: # Try all landmarks of given type
-                        w = 0
+                        w = none
                         for lm in static_landmarks[m[1]-1]:
                             d = hypot(self.x-lm[0], self.y-lm[1])
-                            p = Gauss(d, m[3], m[4])
+                            p = gauss(d, m[3], m[4])
                             if p > w: # Assumes the one with the greatest likelihood is the seen landmark
                                 w = p
-                        self.w *= w
+                        likelihoods.append(w)
 
                 elif m[1] == 1: # If it is a field border landmark
-                    w = 0
+                    w = none
                     if m[2] == 0: # If it is a unknown border
                         distances = [self.x, 1040-self.x, self.y, 740-self.y]
                         for d in distances: # Tests all border
-                            p = Gauss(d, m[3], m[4])
+                            p = gauss(d, m[3], m[4])
                             if p > w: # Gets the one with the greatest likelihood
                                 w = p
 
                     elif m[2] == 1: # It is the defense goal side
-                        w = Gauss(self.x, m[3], m[4])
+                        w = gauss(self.x, m[3], m[4])
 
                     elif m[2] == 2: # It is the attack goal side
-                        w = Gauss(1040-self.x, m[3], m[4])
+                        w = gauss(1040-self.x, m[3], m[4])
 
                     elif m[2] == 3: # It is the left side
-                        w = Gauss(self.y, m[3], m[4])
+                        w = gauss(self.y, m[3], m[4])
 
                     elif m[2] == 4: # It is the right side
-                        w = Gauss(740-self.y, m[3], m[4])
-                    self.w *= w
+                        w = gauss(740-self.y, m[3], m[4])
+                    likelihoods.append(w)
+
 
+                elif grid is not None: # Looks the closest static landmark up
+                    likelihoods.append(gauss(float(grid.Distance(0, self.x, self.y, m[3])), 0, m[4]))
 
                 else: # Try all static landmarks
-                    w = 0
+                    w = none
                     for tp in static_landmarks:
                         for lm in tp:
                             d = hypot(self.x-lm[0], self.y-lm[1])
-                            p = Gauss(d, m[3], m[4])
+                            p = gauss(d, m[3], m[4])
                             if p > w: # Assumes the one with the greatest likelihood is the seen landmark
                                 w = p
-                    self.w *= w
+                    likelihoods.append(w)
 
             elif m[0] == 2: # Likelihood of static landmarks using angles {type, landmark_type, landmark_number, reference_angle, sigma}
 
@@ -107,48 +117,56 @@ class Particle: # Class implementing a particle
                     if m[2] != 0: # If it is known which landmark
                         # Just compute the likelihood
                         t = atan2(self.y-static_landmarks[m[1]-1][m[2]-1][1], self.x-static_landmarks[m[1]-1][m[2]-1][0])
-                        self.w *= AngleLikelihood(t, radians(m[3]), m[4])
+                        likelihoods.append(angle_likelihood(t, radians(m[3]), m[4]))
+
+                    elif grid is not None: # Looks the closest landmark of given type up
+                        a = float(grid.Bearing(m[1], self.x, self.y, radians(m[3])))
+                        likelihoods.append(gauss(2 * sin(a / 2), 0, m[4]))
 
                     else: # Try all landmarks of given type
-                        w = 0
+                        w = none
                         for lm in static_landmarks[m[1]-1]:
                             t = atan2(self.y-lm[1], self.x-lm[0])
-                            p = AngleLikelihood(t, radians(m[3]), m[4])
+                            p = angle_likelihood(t, radians(m[3]), m[4])
                             if p > w: # Assumes the one with the greatest likelihood is the seen landmark
                                 w = p
-                        self.w *= w
+                        likelihoods.append(w)
 
                 elif m[1] == 1: # If it is a field border landmark
-                    w = 0
+                    w = none
                     if m[2] == 0: # If it is a unknown border
                         angles = [180-self.r, -self.r, 90-self.r, -90-self.r]
                         for a in angles: # Tests all border
-                            p = AngleLikelihood(radians(a), radians(m[3]), m[4])
+                            p = angle_likelihood(radians(a), radians(m[3]), m[4])
                             if p > w: # Gets the one with the greatest likelihood
                                 w = p
 
                     elif m[2] == 1: # It is the defense goal side
-                        w = AngleLikelihood(radians(180-self.r), radians(m[3]), m[4])
+                        w = angle_likelihood(radians(180-self.r), radians(m[3]), m[4])
 
                     elif m[2] == 2: # It is the attack goal side
-                        w = AngleLikelihood(radians(-self.r), radians(m[3]), m[4])
+                        w = angle_likelihood(radians(-self.r), radians(m[3]), m[4])
 
                     elif m[2] == 3: # It is the left side
-                        w = AngleLikelihood(radians(90-self.r), radians(m[3]), m[4])
+                        w = angle_likelihood(radians(90-self.r), radians(m[3]), m[4])
 
                     elif m[2] == 4: # It is the right side
-                        w = AngleLikelihood(radians(-90-self.r), radians(m[3]), m[4])
-                    self.w *= w
+                        w = angle_likelihood(radians(-90-self.r), radians(m[3]), m[4])
+                    likelihoods.append(w)
+
+                elif grid is not None: # Looks the closest static landmark up
+                    a = float(grid.Bearing(0, self.x, self.y, radians(m[3])))
+                    likelihoods.append(gauss(2 * sin(a / 2), 0, m[4]))
 
                 else: # Try all static landmarks
-                    w = 0
+                    w = none
                     for tp in static_landmarks:
                         for lm in tp:
                             t = atan2(self.y-lm[1], self.x-lm[0])
-                            p = AngleLikelihood(t, radians(m[3]), m[4])
+                            p = angle_likelihood(t, radians(m[3]), m[4])
                             if p > w: # Assumes the one with the greatest likelihood is the seen landmark
                                 w = p
-                    self.w *= w
+                    likelihoods.append(w)
 
             elif m[0] == 3: # Likelihood of the ball {type, distance, angle}
 
@@ -162,7 +180,7 @@ class Particle: # Class implementing a particle
                 bsigma = dynamic_landmarks[0][2]
 
                 # Compute likelihood
-                self.w *= BDGauss([x,y], [bx,by], bsigma)
+                likelihoods.append(bdgauss([x,y], [bx,by], bsigma))
 
             elif m[0] == 4: # Likelihood of the friendly robots {type, distance, angle}
 
@@ -173,14 +191,22 @@ class Particle: # Class implementing a particle
                 # For all friendly robots computing their respectives
                 w = []
                 for rbt in dynamic_landmarks[1]:
-                    w.append(BDGauss([x,y], [rbt[0],rbt[1]], rbt[2]))
+                    w.append(bdgauss([x,y], [rbt[0],rbt[1]], rbt[2]))
 
                 # Gets the maximum one
-                self.w *= max(w)
+                likelihoods.append(max(w))
 
             elif m[0] == 5: # Likelihood of the opponent robots {type, distance, angle}
                 pass
 
+        if log:
+            self.logw = fsum(likelihoods)
+            self.w = exp(self.logw)
+        else:
+            self.w = 1 # Initializes particles weight
+            for l in likelihoods:
+                self.w *= l
+
 
 
 
@@ -188,7 +214,8 @@ class Particle: # Class implementing a particle
         self.moving_sigma = moving_error
         self.rotation_sigma = rotation_error
 
-    def Draw(self, where):
+    def Draw(self, where): # Drawing only, the filter never loads pygame
+        import pygame
         px = 5 * cos(radians(self.r)) + self.x
         py = 5 * sin(radians(self.r)) + self.y
 
@@ -216,4 +243,38 @@ def BDGauss(x, mu, sigma):
         else:
             return 0
     else:
-        return  exp(-hypot(x[0]-mu[0], x[1]-mu[1])**2/(2*sigma**2))/sqrt(2*pi*sigma**2)
\ No newline at end of file
+        return  exp(-hypot(x[0]-mu[0], x[1]-mu[1])**2/(2*sigma**2))/sqrt(2*pi*sigma**2)
+
+def LogGauss(x, mu, sigma): # Logarithm of Gauss
+    if sigma == 0:
+        if x == mu:
+            return 0
+        else:
+            return -float('inf')
+    else:
+        return -(x-mu)**2/(2 * sigma**2) - log(2*pi * sigma**2)/2
+
+def LogAngleLikelihood(alpha, theta, sigma): # Logarithm of AngleLikelihood, angles in radians
+    x, y = cos(alpha), sin(alpha)
+    xr, yr = cos(theta), sin(theta)
+    return LogGauss(hypot(x-xr, y-yr), 0, sigma)
+
+def LogBDGauss(x, mu, sigma): # Logarithm of BDGauss
+    if sigma == 0:
+        if x[0] == mu[0] and x[1] == mu[1]:
+            return 0
+        else:
+            return -float('inf')
+    else:
+        return -hypot(x[0]-mu[0], x[1]-mu[1])**2/(2*sigma**2) - log(2*pi*sigma**2)/2
+
+def NormalizeLogWeights(particles): # Normalizes the log-weights of a list of particles through log-sum-exp
+    m = max(p.logw for p in particles)
+    if m == -float('inf'): # Every particle got zero, restarts from uniform weights
+        for p in particles:
+            p.w = 1.0 / len(particles)
+        return -float('inf')
+    total = m + log(fsum(exp(p.logw - m) for p in particles))
+    for p in particles:
+        p.w = exp(p.logw - total)
+    return total
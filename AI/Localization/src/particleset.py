@@ -0,0 +1,267 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import numpy as np
+
+from particle import Particle
+
+
+class ParticleSet: # Class implementing a whole set of particles as contiguous arrays
+    def __init__(self, n = 1000, x = '', y = '', r = ''): # Constructor
+        if x == '':
+            self.x = np.random.randint(70, 970, n).astype(np.float64) # Starts at random X positions
+        else:
+            self.x = np.full(n, x, dtype=np.float64)                  # Starts at a given X position
+
+        if y == '':
+            self.y = np.random.randint(70, 670, n).astype(np.float64) # Starts at random Y positions
+        else:
+            self.y = np.full(n, y, dtype=np.float64)                  # Starts at a given Y position
+
+        if r == '':
+            self.r = np.random.randint(0, 360, n).astype(np.float64) # Starts at random orientations
+        else:
+            self.r = np.full(n, r, dtype=np.float64)                 # Starts at a given orientation
+
+        self.w = np.ones(n)     # Particles' weights
+        self.logw = np.zeros(n) # Particles' log-weights, used in the log domain
+
+        self.rotation_sigma = 0 # Used for errors
+        self.moving_sigma = 0   # Used for errors
+
+        self.grid = None # Optional LandmarkGrid used for the unknown landmarks
+
+        self.SetLogDomain(False)
+
+    def __len__(self):
+        return len(self.x)
+
+    def MotionModel(self, x_motion = 0, y_motion = 0, rotation = 0):
+        n = len(self.x)
+
+        # Moves every particle, adding independent motion errors to each one
+        self.x += x_motion + np.random.normal(0, self.moving_sigma, n)
+        self.y += y_motion + np.random.normal(0, self.moving_sigma, n)
+        self.r += rotation + np.random.normal(0, self.rotation_sigma, n)
+
+    def ObservationModel(self, measures, static_landmarks, dynamic_landmarks):
+        likelihoods = [] # Likelihood of each measure, for all particles at once
+
+        for m in measures: # For each measure
+
+            if m[0] == 0: # Likelihood of orientation {type, reference_angle, sigma}
+                likelihoods.append(self.angle_likelihood(np.radians(self.r), np.radians(m[1]), m[2]))
+
+            elif m[0] == 1: # Likelihood of static landmarks {type, landmark_type, landmark_number, reference_distance, sigma}
+                likelihoods.append(self._DistanceLikelihood(m, static_landmarks))
+
+            elif m[0] == 2: # Likelihood of static landmarks using angles {type, landmark_type, landmark_number, reference_angle, sigma}
+                likelihoods.append(self._AngleLikelihood(m, static_landmarks))
+
+            elif m[0] == 3: # Likelihood of the ball {type, distance, angle}
+                x, y = self._Seen(m)
+                bx, by, bsigma = dynamic_landmarks[0][0], dynamic_landmarks[0][1], dynamic_landmarks[0][2]
+                likelihoods.append(self.bdgauss(x, y, bx, by, bsigma))
+
+            elif m[0] == 4: # Likelihood of the friendly robots {type, distance, angle}
+                x, y = self._Seen(m)
+                w = [self.bdgauss(x, y, rbt[0], rbt[1], rbt[2]) for rbt in dynamic_landmarks[1]]
+                likelihoods.append(np.max(w, axis=0)) # Gets the maximum one
+
+            elif m[0] == 5: # Likelihood of the opponent robots {type, distance, angle}
+                pass
+
+        if self.log: # Adds the log-densities
+            self.logw = np.zeros(len(self.x))
+            for l in likelihoods:
+                self.logw += l
+            top = np.max(self.logw) if len(self.logw) > 0 else 0
+            if top == -np.inf:
+                top = 0
+            self.w = np.exp(self.logw - top) # Weights relative to the best particle, never all underflowing
+        else: # Multiplies the densities
+            self.w = np.ones(len(self.x))
+            for l in likelihoods:
+                self.w *= l
+
+    def _Seen(self, m): # Position of an object seen at {distance, angle} from every particle
+        x = self.x + m[1] * np.cos(np.radians(m[2]))
+        y = self.y + m[1] * np.sin(np.radians(m[2]))
+        return x, y
+
+    def _DistanceLikelihood(self, m, static_landmarks):
+        if m[1] != 0 and m[1] != 1: # If it is known what kind of static landmark
+            if m[2] != 0: # If it is known which landmark
+                lm = static_landmarks[m[1]-1][m[2]-1]
+                return self.gauss(np.hypot(self.x-lm[0], self.y-lm[1]), m[3], m[4])
+
+            # Try all landmarks of given type
+            landmarks = static_landmarks[m[1]-1]
+            group = m[1]
+
+        elif m[1] == 1: # If it is a field border landmark
+            if m[2] == 0: # If it is a unknown border
+                distances = [self.x, 1040-self.x, self.y, 740-self.y]
+            elif m[2] == 1: # It is the defense goal side
+                distances = [self.x]
+            elif m[2] == 2: # It is the attack goal side
+                distances = [1040-self.x]
+            elif m[2] == 3: # It is the left side
+                distances = [self.y]
+            elif m[2] == 4: # It is the right side
+                distances = [740-self.y]
+            else:
+                return self._Impossible()
+            return np.max([self.gauss(d, m[3], m[4]) for d in distances], axis=0)
+
+        else: # Try all static landmarks
+            landmarks = [lm for tp in static_landmarks for lm in tp]
+            group = 0
+
+        if self.grid is not None: # Looks the closest landmark up instead of trying all of them
+            return self.gauss(self.grid.Distance(group, self.x, self.y, m[3]), 0, m[4])
+
+        # Assumes the one with the greatest likelihood is the seen landmark
+        w = self._Impossible()
+        for lm in landmarks:
+            np.maximum(w, self.gauss(np.hypot(self.x-lm[0], self.y-lm[1]), m[3], m[4]), out=w)
+        return w
+
+    def _AngleLikelihood(self, m, static_landmarks):
+        theta = np.radians(m[3])
+
+        if m[1] != 0 and m[1] != 1: # If it is known what kind of static landmark
+            if m[2] != 0: # If it is known which landmark
+                lm = static_landmarks[m[1]-1][m[2]-1]
+                return self.angle_likelihood(np.arctan2(self.y-lm[1], self.x-lm[0]), theta, m[4])
+
+            # Try all landmarks of given type
+            landmarks = static_landmarks[m[1]-1]
+            group = m[1]
+
+        elif m[1] == 1: # If it is a field border landmark
+            if m[2] == 0: # If it is a unknown border
+                angles = [180-self.r, -self.r, 90-self.r, -90-self.r]
+            elif m[2] == 1: # It is the defense goal side
+                angles = [180-self.r]
+            elif m[2] == 2: # It is the attack goal side
+                angles = [-self.r]
+            elif m[2] == 3: # It is the left side
+                angles = [90-self.r]
+            elif m[2] == 4: # It is the right side
+                angles = [-90-self.r]
+            else:
+                return self._Impossible()
+            return np.max([self.angle_likelihood(np.radians(a), theta, m[4]) for a in angles], axis=0)
+
+        else: # Try all static landmarks
+            landmarks = [lm for tp in static_landmarks for lm in tp]
+            group = 0
+
+        if self.grid is not None: # Looks the closest landmark up instead of trying all of them
+            return self.gauss(2 * np.sin(self.grid.Bearing(group, self.x, self.y, theta) / 2), 0, m[4])
+
+        # Assumes the one with the greatest likelihood is the seen landmark
+        w = self._Impossible()
+        for lm in landmarks:
+            np.maximum(w, self.angle_likelihood(np.arctan2(self.y-lm[1], self.x-lm[0]), theta, m[4]), out=w)
+        return w
+
+    def _Impossible(self): # Likelihood of a measure that no particle can explain
+        if self.log:
+            return np.full(len(self.x), -np.inf)
+        return np.zeros(len(self.x))
+
+    def Normalize(self):
+        # Makes the weights sum up to one, returning their previous sum.
+        # In the log domain it uses log-sum-exp and returns the logarithm of that sum.
+        if self.log:
+            top = np.max(self.logw) if len(self.logw) > 0 else -np.inf
+            if top == -np.inf:
+                self.w = np.full(len(self.x), 1.0 / max(len(self.x), 1)) # Every particle got zero, restarts from uniform weights
+                return -np.inf
+            total = top + np.log(np.sum(np.exp(self.logw - top)))
+            self.w = np.exp(self.logw - total)
+            return total
+
+        total = np.sum(self.w)
+        if total > 0:
+            self.w /= total
+        else:
+            self.w[:] = 1.0 / len(self.w) # Every particle got zero, restarts from uniform weights
+        return total
+
+    def Assign(self, x, y, r): # Replaces the particles, with uniform weights
+        self.x = x
+        self.y = y
+        self.r = r
+        self.w = np.full(len(self.x), 1.0 / max(len(self.x), 1))
+        self.logw = np.zeros(len(self.x))
+
+    def Select(self, indexes): # Keeps only the given particles, with repetitions and uniform weights
+        self.Assign(self.x[indexes], self.y[indexes], self.r[indexes])
+
+    def SetErrors(self, moving_error = 0, rotation_error = 0):
+        self.moving_sigma = moving_error
+        self.rotation_sigma = rotation_error
+
+    def SetGrid(self, grid = None): # Uses a LandmarkGrid for the unknown landmarks, or none at all
+        self.grid = grid
+
+    def SetLogDomain(self, log = True): # Accumulates log-densities instead of densities, avoiding underflow
+        self.log = log
+        if log:
+            self.gauss, self.angle_likelihood, self.bdgauss = ArrayLogGauss, ArrayLogAngleLikelihood, ArrayLogBDGauss
+        else:
+            self.gauss, self.angle_likelihood, self.bdgauss = ArrayGauss, ArrayAngleLikelihood, ArrayBDGauss
+
+    def ToParticles(self): # Converts the set into a list of Particle objects
+        particles = []
+        for i in xrange(len(self.x)):
+            p = Particle(self.x[i], self.y[i], self.r[i])
+            p.w = self.w[i]
+            p.logw = self.logw[i]
+            p.SetErrors(self.moving_sigma, self.rotation_sigma)
+            particles.append(p)
+        return particles
+
+def FromParticles(particles): # Builds a ParticleSet from a list of Particle objects
+    s = ParticleSet(0)
+    s.x = np.array([p.x for p in particles], dtype=np.float64)
+    s.y = np.array([p.y for p in particles], dtype=np.float64)
+    s.r = np.array([p.r for p in particles], dtype=np.float64)
+    s.w = np.array([p.w for p in particles], dtype=np.float64)
+    s.logw = np.array([p.logw for p in particles], dtype=np.float64)
+    if len(particles) > 0:
+        s.SetErrors(particles[0].moving_sigma, particles[0].rotation_sigma)
+    return s
+
+def ArrayGauss(x, mu, sigma): # Same as Gauss, for arrays
+    if sigma == 0:
+        return (x == mu).astype(np.float64)
+    else:
+        return np.exp(-(x-mu)**2/(2 * sigma**2))/np.sqrt(2*np.pi * sigma**2)
+
+def ArrayAngleLikelihood(alpha, theta, sigma): # Same as AngleLikelihood, for arrays (angles in radians)
+    return ArrayGauss(np.hypot(np.cos(alpha)-np.cos(theta), np.sin(alpha)-np.sin(theta)), 0, sigma)
+
+def ArrayBDGauss(x, y, mux, muy, sigma): # Same as BDGauss, for arrays of X and Y
+    if sigma == 0:
+        return ((x == mux) & (y == muy)).astype(np.float64)
+    else:
+        return np.exp(-((x-mux)**2 + (y-muy)**2)/(2*sigma**2))/np.sqrt(2*np.pi*sigma**2)
+
+def ArrayLogGauss(x, mu, sigma): # Same as LogGauss, for arrays
+    if sigma == 0:
+        return np.where(x == mu, 0.0, -np.inf)
+    else:
+        return -(x-mu)**2/(2 * sigma**2) - np.log(2*np.pi * sigma**2)/2
+
+def ArrayLogAngleLikelihood(alpha, theta, sigma): # Same as LogAngleLikelihood, for arrays (angles in radians)
+    return ArrayLogGauss(np.hypot(np.cos(alpha)-np.cos(theta), np.sin(alpha)-np.sin(theta)), 0, sigma)
+
+def ArrayLogBDGauss(x, y, mux, muy, sigma): # Same as LogBDGauss, for arrays of X and Y
+    if sigma == 0:
+        return np.where((x == mux) & (y == muy), 0.0, -np.inf)
+    else:
+        return -((x-mux)**2 + (y-muy)**2)/(2*sigma**2) - np.log(2*np.pi*sigma**2)/2
@@ -0,0 +1,187 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import numpy as np
+
+from particle import Particle
+from particleset import ParticleSet
+
+
+def NormalizedWeights(w): # Returns the weights summing up to one
+    w = np.asarray(w, dtype=np.float64)
+    total = np.sum(w)
+    if total > 0:
+        return w / total
+    return np.full(len(w), 1.0 / max(len(w), 1)) # Every particle got zero, uses uniform weights
+
+def EffectiveSampleSize(w): # Number of particles that are actually contributing to the posterior
+    w = NormalizedWeights(w)
+    return 1.0 / np.sum(w**2)
+
+def SystematicResample(w, n = None): # One random offset shared by N evenly spaced pointers
+    w = NormalizedWeights(w)
+    if n is None:
+        n = len(w)
+    positions = (np.arange(n) + np.random.uniform()) / n
+    return _Select(w, positions)
+
+def StratifiedResample(w, n = None): # One random pointer inside each of N evenly sized strata
+    w = NormalizedWeights(w)
+    if n is None:
+        n = len(w)
+    positions = (np.arange(n) + np.random.uniform(size=n)) / n
+    return _Select(w, positions)
+
+def ResidualResample(w, n = None): # Deterministic copies for the integer part, systematic for the residuals
+    w = NormalizedWeights(w)
+    if n is None:
+        n = len(w)
+    copies = np.floor(n * w).astype(np.int64)
+    indexes = np.repeat(np.arange(len(w)), copies)
+
+    left = n - len(indexes)
+    if left > 0:
+        residual = n * w - copies
+        indexes = np.concatenate((indexes, SystematicResample(residual, left)))
+    return indexes
+
+def _Select(w, positions): # Indexes of the particles hit by sorted pointers in [0, 1)
+    cumulative = np.cumsum(w)
+    cumulative[-1] = 1.0 # Avoids pointers falling out because of rounding errors
+    return np.searchsorted(cumulative, positions, side='right')
+
+METHODS = {
+    'systematic': SystematicResample,
+    'stratified': StratifiedResample,
+    'residual': ResidualResample,
+}
+
+
+class Resampler: # Class that resamples the particles only when the posterior needs it
+    def __init__(self, method = 'systematic', threshold = 0.5):
+        self.method = METHODS[method] # Resampling algorithm
+        self.threshold = threshold    # Resamples when ESS < threshold * N
+        self.ess = 0                  # Effective sample size of the last call
+        self.resampled = False        # If the last call resampled
+
+    def NeedsResample(self, w):
+        self.ess = EffectiveSampleSize(w)
+        return self.ess < self.threshold * len(w)
+
+    def Resample(self, particles): # Works both with a ParticleSet and with a list of Particle
+        if isinstance(particles, list):
+            w = [p.w for p in particles]
+        else:
+            w = particles.w
+
+        self.resampled = len(w) > 0 and self.NeedsResample(w)
+        if not self.resampled:
+            return particles
+
+        indexes = self.method(w)
+
+        if not isinstance(particles, list):
+            particles.Select(indexes)
+            return particles
+
+        resampled = []
+        for i in indexes:
+            p = Particle(particles[i].x, particles[i].y, particles[i].r)
+            p.SetErrors(particles[i].moving_sigma, particles[i].rotation_sigma)
+            p.color = particles[i].color
+            resampled.append(p)
+        return resampled
+
+
+class KLDSampler: # Class that resamples adapting the number of particles through KLD-sampling
+    def __init__(self, min_particles = 300, max_particles = 10000, epsilon = 0.05, z = 2.326,
+                 bin_size = (20, 20, 15), alpha_slow = 0.01, alpha_fast = 0.2):
+        self.min_particles = min_particles # Lower bound of the set size
+        self.max_particles = max_particles # Upper bound of the set size
+        self.epsilon = epsilon             # Maximum KL-divergence between sampled and true posterior
+        self.z = z                         # Upper standard normal quantile, 2.326 for 99% confidence
+        self.bin_size = bin_size           # Size of the histogram bins {x, y, degrees}
+
+        # Short and long term averages of the measure likelihood, used to detect kidnapping.
+        # They are kept as logarithms, so they work with likelihoods that would underflow.
+        self.alpha_slow = alpha_slow
+        self.alpha_fast = alpha_fast
+        self.log_w_slow = None
+        self.log_w_fast = None
+
+        self.stats = {} # Statistics of the last cycle, for logging
+
+    def Required(self, k): # Number of particles needed when the samples fall into k bins
+        k = np.asarray(k, dtype=np.float64)
+        a = 2 / (9 * np.maximum(k - 1, 1))
+        n = (k - 1) / (2 * self.epsilon) * (1 - a + np.sqrt(a) * self.z)**3
+        return np.clip(np.where(k > 1, np.ceil(n), 0), self.min_particles, self.max_particles).astype(np.int64)
+
+    def Resample(self, particles, likelihood = None, log_likelihood = None, limit = None):
+        # Resamples a ParticleSet in place. likelihood is the mean measure likelihood of the cycle
+        # (weights sum over the number of particles, before normalization), or log_likelihood its
+        # logarithm; when given, random particles are injected as it falls below its long term
+        # average, so the set spreads out and grows back after the robot is kidnapped. limit caps the
+        # candidates drawn in this call (the time left in the cycle), never below min_particles.
+        n_before = len(particles)
+        m = self.max_particles if limit is None else int(min(self.max_particles, max(self.min_particles, limit)))
+
+        if likelihood is not None:
+            log_likelihood = np.log(likelihood) if likelihood > 0 else -np.inf
+
+        random_ratio = 0
+        if log_likelihood is not None:
+            if self.log_w_slow is None or self.log_w_slow == -np.inf:
+                self.log_w_slow = self.log_w_fast = log_likelihood
+            else:
+                self.log_w_slow = np.logaddexp(np.log1p(-self.alpha_slow) + self.log_w_slow, np.log(self.alpha_slow) + log_likelihood)
+                self.log_w_fast = np.logaddexp(np.log1p(-self.alpha_fast) + self.log_w_fast, np.log(self.alpha_fast) + log_likelihood)
+            if self.log_w_slow > -np.inf:
+                random_ratio = max(0, 1 - np.exp(self.log_w_fast - self.log_w_slow))
+
+        # Candidates drawn from the posterior, in random order so any prefix is a fair sample
+        candidates = SystematicResample(particles.w, m)
+        np.random.shuffle(candidates)
+
+        # Replaces some candidates by particles spread over the whole field
+        injected = np.random.binomial(m, random_ratio) if random_ratio > 0 else 0
+        x = particles.x[candidates]
+        y = particles.y[candidates]
+        r = particles.r[candidates]
+        if injected > 0:
+            spread = ParticleSet(injected)
+            x[:injected], y[:injected], r[:injected] = spread.x, spread.y, spread.r
+            perm = np.random.permutation(m)
+            x, y, r = x[perm], y[perm], r[perm]
+
+        # Number of distinct histogram bins after each prefix of the candidates
+        bins = (np.floor(x / self.bin_size[0]).astype(np.int64) * 100000 +
+                np.floor(y / self.bin_size[1]).astype(np.int64)) * 1000 + \
+               np.floor((r % 360) / self.bin_size[2]).astype(np.int64)
+        first = np.zeros(m, dtype=np.int64)
+        first[np.unique(bins, return_index=True)[1]] = 1
+        k = np.cumsum(first)
+
+        # Smallest prefix that is large enough for the bins it covers
+        enough = np.nonzero(np.arange(1, m + 1) >= self.Required(k))[0]
+        n = enough[0] + 1 if len(enough) > 0 else m
+
+        particles.Assign(x[:n], y[:n], r[:n])
+
+        self.stats = {
+            'particles_before': n_before,
+            'particles': n,
+            'candidates': m,
+            'bins': int(k[n-1]),
+            'injected': int(np.sum(perm[:n] < injected)) if injected > 0 else 0,
+            'random_ratio': random_ratio,
+            'log_w_slow': self.log_w_slow,
+            'log_w_fast': self.log_w_fast,
+        }
+        return particles
+
+    def Reset(self, particles): # Spreads the set over the whole field, e.g. after a fall
+        spread = ParticleSet(self.max_particles)
+        particles.Assign(spread.x, spread.y, spread.r)
+        self.log_w_slow = self.log_w_fast = None
+        return particles
@@ -0,0 +1,90 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+# Optional window showing the particles. pygame is only imported when a Visualiser is created,
+# so the filter itself never loads SDL. The whole set is rasterized with NumPy and shown in a
+# single blit, at most rate times per second whatever the rate of the filter.
+
+import time
+import numpy as np
+
+from field import FIELD_LENGTH, FIELD_WIDTH
+
+FIELD_COLOR = (0, 120, 0)
+LINE_COLOR = (255, 255, 255)
+PARTICLE_COLOR = (0, 0, 0)
+POSE_COLOR = (255, 0, 0)
+
+
+def FieldRaster(width = FIELD_LENGTH, height = FIELD_WIDTH): # Background image, indexed [x, y]
+    image = np.empty((width, height, 3), dtype=np.uint8)
+    image[:] = FIELD_COLOR
+    image[70:971, [70, 670]] = LINE_COLOR # Side lines
+    image[[70, 520, 970], 70:671] = LINE_COLOR # Goal lines and half-way line
+    t = np.linspace(0, 2*np.pi, 360)
+    image[(520 + 75*np.cos(t)).astype(int), (370 + 75*np.sin(t)).astype(int)] = LINE_COLOR # Centre circle
+    return image
+
+def ParticleRaster(background, x, y, w = None): # Draws every particle as a pixel, darker for greater weights
+    image = background.copy()
+    x = np.asarray(x).astype(np.int64)
+    y = np.asarray(y).astype(np.int64)
+    inside = (x >= 0) & (x < image.shape[0]) & (y >= 0) & (y < image.shape[1])
+    x, y = x[inside], y[inside]
+
+    if w is None:
+        image[x, y] = PARTICLE_COLOR
+        return image
+
+    w = np.asarray(w, dtype=np.float64)[inside]
+    top = np.max(w) if len(w) > 0 else 0
+    shade = w / top if top > 0 else np.ones(len(w))
+    image[x, y] = (image[x, y] * (1 - shade[:, None])).astype(np.uint8) # Blends towards black
+    return image
+
+
+class Visualiser: # Window drawing a ParticleSet at a limited rate
+    def __init__(self, rate = 2, scale = 0.75, title = 'Localization'):
+        import pygame # Only here, so nothing graphical is loaded unless requested
+        self.pygame = pygame
+
+        self.period = 1.0 / rate # Minimum time between two frames
+        self.last = 0
+        self.scale = scale
+
+        pygame.init()
+        self.size = (int(FIELD_LENGTH * scale), int(FIELD_WIDTH * scale))
+        self.screen = pygame.display.set_mode(self.size)
+        pygame.display.set_caption(title)
+        self.background = FieldRaster()
+        self.closed = False # The window was closed: nothing else is drawn
+
+    def Update(self, particles, pose = None): # Draws only if the last frame is old enough
+        if self.closed:
+            return False
+        now = time.time()
+        if now - self.last < self.period:
+            return False
+        self.last = now
+
+        for event in self.pygame.event.get(): # Keeps the window responsive
+            if event.type == self.pygame.QUIT: # Closes only the window, the filter goes on
+                self.pygame.display.quit()
+                self.closed = True
+                return False
+
+        image = ParticleRaster(self.background, particles.x, particles.y, particles.w)
+        surface = self.pygame.surfarray.make_surface(image)
+        if self.scale != 1:
+            surface = self.pygame.transform.scale(surface, self.size)
+        self.screen.blit(surface, (0, 0))
+
+        if pose is not None:
+            px, py = int(pose[0] * self.scale), int(pose[1] * self.scale)
+            ex = px + int(15 * np.cos(np.radians(pose[2])))
+            ey = py + int(15 * np.sin(np.radians(pose[2])))
+            self.pygame.draw.circle(self.screen, POSE_COLOR, (px, py), 5, 0)
+            self.pygame.draw.line(self.screen, POSE_COLOR, (px, py), (ex, ey), 2)
+
+        self.pygame.display.flip()
+        return True
@@ -10,6 +10,7 @@ from math import log,exp,tan,radians
 
 from BallVision import *
 from PanTilt import *
+from capture import Capture
 
 import sys
 
@@ -45,7 +46,7 @@ parser.add_argument('--head', '--he', action="store_true", help = 'Configurando
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
-def statusBall(positionballframe):
+def statusBall(positionballframe, group):
 	global lista
 	if positionballframe[0] == 0:
 		lista = []
@@ -88,14 +89,14 @@ def statusBall(positionballframe):
 			if len(lista) >= 20:
 				lista.pop(0)
 			dist_media = float(sum(lista)/len(lista))
-		bkb.write_float(Mem, 'VISION_BALL_DIST', dist_media)
-		bkb.write_int(Mem,'VISION_LOST', 0)
+		group.write_float(Mem, 'VISION_BALL_DIST', dist_media)
+		group.write_int(Mem,'VISION_LOST', 0)
 		
 		
 #		print "Bola encontrada = " + str(bkb.read_int('VISION_LOST_BALL'))
 #		print "Posicao servo 1 tilt = " + str(bkb.read_int('VISION_MOTOR1_ANGLE'))
 	else:
-	    bkb.write_int(Mem,'VISION_LOST', 1)
+	    group.write_int(Mem,'VISION_LOST', 1)
 #	    print "Bola Perdida = " + str(bkb.read_int('VISION_LOST_BALL'))
 
 	    
@@ -177,7 +178,7 @@ resolutions = readResolutions(ball.Config)
 atualres = len(resolutions)/2 -1
 razao = pow(minRadio/maxRadio, 1.0/len(resolutions))
 
-cap = cv2.VideoCapture(0) #Abrindo camera
+cap = Capture(0) #Abrindo camera, capturando numa thread separada
 
 ret = cap.set(3,resolutions[atualres,0])
 ret = cap.set(4,resolutions[atualres,1])
@@ -187,18 +188,23 @@ if args.withoutservo == False:
 os.system("v4l2-ctl -d /dev/video0 -c focus_auto=0 && v4l2-ctl -d /dev/video0 -c focus_absolute=0")
 
 while True:
-	#Salva o frame
-	
-	for i in xrange(0,3):
-		ret, frame = cap.read()
+	#Frame mais novo da camera, sem esperar pelos antigos
+	ret, frame = cap.read()
+	if not ret:
+		print "Sem imagem da camera"
+		continue
 	
 	positionballframe = ball.detect(frame,np.array([resolutions[atualres,0],resolutions[atualres,1]]))
 	
 	#status
-	statusBall(positionballframe)
+	#ball and head values of this frame are published together, so decision never mixes two frames
+	with bkb.group(Mem, 'VISION') as group:
+		statusBall(positionballframe, group)
+		
+		if args.withoutservo == False:
+			posheadball = head.mov(positionballframe,posheadball,Mem, group)
 	
 	if args.withoutservo == False:
-		posheadball = head.mov(positionballframe,posheadball,Mem, bkb)
 		if head.checkComm() == False:
 			print "Out of communication with servos!"
 			break
@@ -0,0 +1,128 @@
+#coding: utf-8
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import time
+import threading
+import cv2
+
+# Camera capture on a separate thread, so the time spent processing a frame is not added to the
+# capture latency. The thread writes each frame into one of three preallocated buffers and the
+# consumer always gets the newest one; frames it never got to see are counted as dropped. With a
+# video file instead of a camera the thread waits for the consumer and no frame is dropped.
+#
+#   cap = Capture(0)
+#   ret, frame = cap.read()  # newest frame, valid until the next call to read()
+#   cap.timestamp, cap.sequence, cap.dropped
+class Capture(object):
+
+# --- Class initializer ---------------------------------------------------------------------------
+
+    def __init__(self, source=0, buffers=3, latest=None):
+        # Camera (index), video file (name) or an already opened cv2.VideoCapture.
+        self.cap = source if hasattr(source, 'grab') else cv2.VideoCapture(source)
+        # Latest frame wins for cameras; video files are read frame by frame.
+        self.latest = not isinstance(source, basestring) if latest is None else latest
+        # Preallocated buffers: the newest frame, the one held by the consumer and the one being written.
+        self.frames = [None] * max(buffers, 3)
+        self.stamps = [0.0] * len(self.frames)
+        self.newest = None  # Buffer with the newest frame.
+        self.reading = None # Buffer held by the consumer, untouched until the next read().
+        self.fresh = False  # The newest frame was not read yet.
+        self.written = 0    # Frames captured.
+        self.dropped = 0    # Frames captured and never read.
+        self.sequence = 0   # Number of the frame returned by read().
+        self.timestamp = 0  # Capture time (time.time()) of the frame returned by read().
+        self.ok = True
+        self.generation = 0 # Incremented by set(): frames grabbed before it are discarded.
+        # The device is used by the thread and by set()/get() from the consumer.
+        self.device = threading.Lock()
+        self.changed = threading.Condition()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._Grab)
+        self.thread.daemon = True
+        self.thread.start()
+
+# --- Capture thread ------------------------------------------------------------------------------
+
+    def _Grab(self):
+        while self.running:
+            with self.changed:
+                # Video file: waits until the consumer takes the last frame.
+                while not self.latest and self.fresh and self.running:
+                    self.changed.wait(0.1)
+                slot = [i for i in xrange(len(self.frames)) if i != self.newest and i != self.reading][0]
+
+            with self.device:
+                generation = self.generation
+                ok = self.cap.grab()
+                stamp = time.time() # closer to the exposure than after retrieve()
+                if ok:
+                    ok, frame = self.cap.retrieve(self.frames[slot]) if self.frames[slot] is not None else self.cap.retrieve()
+            if not ok:
+                with self.changed:
+                    self.ok = False
+                    self.changed.notify_all()
+                if not self.latest: # end of the video file
+                    return
+                time.sleep(0.01)
+                continue
+
+            with self.changed:
+                # retrieve() allocates a new array when the resolution changes
+                self.frames[slot] = frame
+                self.stamps[slot] = stamp
+                if generation != self.generation: # captured with the old settings
+                    self.dropped += 1
+                    continue
+                if self.fresh:
+                    self.dropped += 1
+                self.newest, self.fresh, self.ok = slot, True, True
+                self.written += 1
+                self.changed.notify_all()
+
+# --- Same interface as cv2.VideoCapture ----------------------------------------------------------
+
+    def read(self, timeout=1.0):
+        # Returns the newest frame not read yet, waiting for it up to timeout seconds.
+        deadline = time.time() + timeout
+        with self.changed:
+            while not self.fresh and self.ok and self.running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+            if not self.fresh:
+                return False, None
+            self.reading, self.fresh = self.newest, False
+            self.sequence = self.written
+            self.timestamp = self.stamps[self.reading]
+            self.changed.notify_all()
+            return True, self.frames[self.reading]
+
+    def set(self, prop, value):
+        with self.device:
+            ret = self.cap.set(prop, value)
+            self.generation += 1
+        with self.changed:
+            # The frame waiting to be read was captured with the old settings (resolution).
+            if self.fresh:
+                self.fresh = False
+                self.dropped += 1
+        return ret
+
+    def get(self, prop):
+        with self.device:
+            return self.cap.get(prop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.running = False
+        with self.changed:
+            self.changed.notify_all()
+        self.thread.join(1.0)
+        with self.device:
+            self.cap.release()
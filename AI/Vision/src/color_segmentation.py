@@ -3,6 +3,12 @@
 import cv2
 import cv2.cv as cv
 import numpy as np
+from ConfigParser import ConfigParser
+from colortable import ColorTable, ReadClasses, SaveClasses
+
+CONFIG = '../Data/config.ini'
+# Color of each class in the 'classes' window (BGR)
+COLORS = [(0, 128, 255), (0, 255, 255), (0, 200, 0), (255, 0, 0), (255, 0, 255), (0, 0, 255), (255, 255, 255), (128, 128, 128)]
 
 def nothing(x,y):
     pass
@@ -16,6 +22,13 @@ cv2.createTrackbar('S_High','image',255,255,nothing)
 cv2.createTrackbar('V_Low','image',0,255,nothing)
 cv2.createTrackbar('V_High','image',255,255,nothing)
 
+#color classes saved in the config and their lookup table (the same used by the running vision)
+config = ConfigParser()
+config.read(CONFIG)
+classes = ReadClasses(config)
+table = ColorTable(classes)
+current = 'orange' #class saved by the s key
+
 cap = cv2.VideoCapture(0)
 
 while(1):
@@ -53,6 +66,9 @@ while(1):
     # Bitwise-AND mask and original image
     res = cv2.bitwise_and(frame,frame, mask=dilation)
 
+    #all the saved classes at once, with a single lookup
+    cv2.imshow('classes', table.Paint(table.Classify(hsv), COLORS))
+
     momento = cv2.moments(img)
     try:
         cx = int(momento['m10']/momento['m00'])
@@ -70,7 +86,8 @@ while(1):
     cv2.putText(img,'v for violet',(30,110), font, 0.5, 160)
     cv2.putText(img,'r for red',(30,130), font, 0.5, 160)
     cv2.putText(img,'b for blue',(30,150), font, 0.5, 160)
-    cv2.putText(img,'Esc for exit',(30,170), font, 0.5, 160)
+    cv2.putText(img,'s to save as ' + current,(30,170), font, 0.5, 160)
+    cv2.putText(img,'Esc for exit',(30,190), font, 0.5, 160)
 
     cv2.imshow('image',img)
     cv2.imshow('frame',frame)
@@ -81,20 +98,34 @@ while(1):
     if k ==  98: #b - blue
         cv2.setTrackbarPos('H_High', 'image', 130)
         cv2.setTrackbarPos('H_Low', 'image', 75)
+        current = 'blue'
     if k ==  111: #o - orange
         cv2.setTrackbarPos('H_High', 'image', 22)
         cv2.setTrackbarPos('H_Low', 'image', 0)
+        current = 'orange'
     if k ==  121: #y - yellow
         cv2.setTrackbarPos('H_High', 'image', 38)
         cv2.setTrackbarPos('H_Low', 'image', 22)
+        current = 'yellow'
     if k ==  103: #g - green
         cv2.setTrackbarPos('H_High', 'image', 92)
         cv2.setTrackbarPos('H_Low', 'image', 75)     
+        current = 'green'
     if k ==  118: #v - violet
         cv2.setTrackbarPos('H_High', 'image', 160)
         cv2.setTrackbarPos('H_Low', 'image', 130)  
+        current = 'violet'
     if k ==  114: #r - red
         cv2.setTrackbarPos('H_High', 'image', 179)
         cv2.setTrackbarPos('H_Low', 'image', 160) 
+        current = 'red'
+    if k == 115: #s - saves the current range as the current class
+        limits = (h_low, h_high, s_low, s_high, v_low, v_high)
+        classes = [(name, limits if name == current else old) for name, old in classes]
+        if current not in [name for name, old in classes]:
+            classes.append((current, limits))
+        SaveClasses(CONFIG, classes)
+        table = ColorTable(classes)
+        print 'saved', current, limits
 
 cv2.destroyAllWindows()
@@ -0,0 +1,66 @@
+__author__ = "RoboFEI-HT"
+__license__ = "GNU General Public License v3.0"
+
+import os
+import numpy as np
+
+from runningvision import ColorClasses
+
+
+# Ranges used when the config has no [Color Classes] section: the presets of color_segmentation.py
+DEFAULT_CLASSES = [('orange', (0, 22, 0, 255, 0, 255)), ('yellow', (22, 38, 0, 255, 0, 255)),
+                   ('green', (75, 92, 0, 255, 0, 255))]
+
+
+def ReadClasses(config, section = 'Color Classes'):
+    # Each option is a class: name = h_low h_high s_low s_high v_low v_high
+    if not config.has_section(section):
+        return list(DEFAULT_CLASSES)
+    return [(name, tuple(int(v) for v in config.get(section, name).split()[:6])) for name in config.options(section)]
+
+
+def SaveClasses(filename, classes, section = 'Color Classes'):
+    # Rewrites only this section, keeping the rest of the file and its comments as they are
+    lines, skipping = [], False
+    if os.path.exists(filename):
+        for line in open(filename):
+            if line.strip().startswith('['):
+                skipping = line.strip() == '[%s]' % section
+            if not skipping:
+                lines.append(line)
+    while lines and not lines[-1].strip():
+        lines.pop()
+    lines.append('\n[%s]\n' % section)
+    for name, limits in classes:
+        lines.append('%s = %s\t;h_low h_high s_low s_high v_low v_high\n' % (name, ' '.join(str(int(v)) for v in limits)))
+    with open(filename, 'w') as f:
+        f.writelines(lines)
+
+
+class ColorTable(ColorClasses): # Named color classes of the config
+    # Built on the lookup table of the running vision, so the calibration shows exactly the pixels
+    # the vision classifies: one bit per class, all classes at once in a single pass.
+
+    def __init__(self, classes):
+        ColorClasses.__init__(self)
+        self.classes = list(classes)               # [(name, (h_low, h_high, s_low, s_high, v_low, v_high))]
+        self.names = [name for name, limits in self.classes]
+        if len(self.classes) > 8:
+            raise ValueError('at most 8 color classes, %d given' % len(self.classes))
+        self.update(dict((1 << k, (limits[0::2], limits[1::2])) for k, (name, limits) in enumerate(self.classes)))
+
+    def Bit(self, name):
+        return 1 << self.names.index(name)
+
+    def Classify(self, hsv): # Bits of the classes of each pixel of a HSV image
+        return self.apply(hsv)
+
+    def Mask(self, labels, name): # Mask of one class, 0 or 255 like cv2.inRange
+        return self.mask(labels, self.Bit(name))
+
+    def Paint(self, labels, colors): # BGR image with each pixel painted with the color of its first class
+        palette = np.zeros((1 << len(self.classes), 3), dtype=np.uint8)
+        for value in xrange(1, len(palette)):
+            first = (value & -value).bit_length() - 1
+            palette[value] = colors[first % len(colors)]
+        return palette[labels & (len(palette) - 1)]
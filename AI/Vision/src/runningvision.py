@@ -1,12 +1,122 @@
 import cv2
 import numpy as np
 from math import *
+from capture import Capture
+
+# This class predicts where a segmented target will be in the next frame.
+class Tracker:
+# --- Class initializer ---------------------------------------------------------------------------
+
+    def __init__(self, misses=5, margin=0.3, growth=1.5, smoothing=0.5):
+        # Region of interest (x0, y0, x1, y1) searched in the next frame, None for the full frame.
+        self.roi = None
+        # Centroid, bounding box size and velocity (pixels per frame) of the target.
+        self.center = None
+        self.size = None
+        self.velocity = (0.0, 0.0)
+        # Consecutive frames without the target, and how many are tolerated before a full search.
+        self.misses = 0
+        self.max_misses = misses
+        # Extra border around the target, as a fraction of its size.
+        self.margin = margin
+        # Growth of the region for each consecutive miss.
+        self.growth = growth
+        # Weight of the last movement in the velocity estimate.
+        self.smoothing = smoothing
+
+# --- Region to be searched in a frame with the given shape ---------------------------------------
+
+    def Predict(self, shape):
+        if self.center is None:
+            self.roi = None
+            return None
+        h, w = shape[:2]
+        # Moves the region with the target and grows it with the speed and with each miss.
+        cx = self.center[0] + self.velocity[0] * (self.misses + 1)
+        cy = self.center[1] + self.velocity[1] * (self.misses + 1)
+        scale = (1 + self.margin) * pow(self.growth, self.misses)
+        rx = self.size[0] * scale / 2 + abs(self.velocity[0]) * (self.misses + 1)
+        ry = self.size[1] * scale / 2 + abs(self.velocity[1]) * (self.misses + 1)
+        self.roi = (max(0, int(cx - rx)), max(0, int(cy - ry)), min(w, int(cx + rx) + 1), min(h, int(cy + ry) + 1))
+        if self.roi[2] - self.roi[0] < 2 or self.roi[3] - self.roi[1] < 2: # predicted out of the frame
+            self.Reset()
+        return self.roi
+
+# --- Refreshes the estimate with the bounding box (x, y, w, h) found, or None ---------------------
+
+    def Update(self, box):
+        if box is None:
+            self.misses += 1
+            if self.misses > self.max_misses: # Lost: goes back to the full frame search.
+                self.Reset()
+            return
+        x, y, w, h = box
+        center = (x + w / 2.0, y + h / 2.0)
+        if self.center is not None:
+            # Movement since the last detection, divided by the frames in between.
+            n = self.misses + 1
+            vx = (center[0] - self.center[0]) / n
+            vy = (center[1] - self.center[1]) / n
+            self.velocity = (self.smoothing * vx + (1 - self.smoothing) * self.velocity[0],
+                             self.smoothing * vy + (1 - self.smoothing) * self.velocity[1])
+        self.center = center
+        self.size = (w, h)
+        self.misses = 0
+
+    def Reset(self):
+        self.roi = None
+        self.center = None
+        self.size = None
+        self.velocity = (0.0, 0.0)
+        self.misses = 0
+
+# This class segments every challenge color at once, with a lookup table from HSV to classes.
+class ColorClasses:
+    # Bit of each challenge in the class plane.
+    MAIN = 1
+    STEP = 2
+    SWERVE = 4
+
+# --- Class initializer ---------------------------------------------------------------------------
+
+    def __init__(self):
+        # For each channel value, the bits of the classes whose range contains it (cv2.LUT format).
+        # A pixel belongs to a class when its three channels do, the same test as cv2.inRange.
+        self.lut = np.zeros((1, 256, 3), dtype=np.uint8)
+        # Limits used to build the table, to rebuild it only when they change.
+        self.key = None
+
+# --- Rebuilds the table if any limit changed, returns True if it did ---------------------------
+
+    def update(self, limits):
+        # limits: {bit: (lower, upper)}, with the HSV limits of each class.
+        key = tuple((bit, tuple(lower), tuple(upper)) for bit, (lower, upper) in sorted(limits.items()))
+        if key == self.key:
+            return False
+        self.lut[:] = 0
+        for bit, (lower, upper) in limits.items():
+            for c in range(3):
+                # An empty range (lower > upper, as after a reset) leaves the class empty.
+                self.lut[0, max(int(lower[c]), 0):min(int(upper[c]), 255) + 1, c] |= bit
+        self.key = key
+        return True
+
+# --- Class plane of a HSV image: one pass for all classes ---------------------------------------
+
+    def apply(self, hsv):
+        h, s, v = cv2.split(cv2.LUT(hsv, self.lut))
+        return cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+
+# --- Mask (0 or 255, as cv2.inRange) of one class ------------------------------------------------
+
+    def mask(self, bits, bit):
+        return cv2.compare(cv2.bitwise_and(bits, bit), 0, cv2.CMP_NE)
 
 # This class is the vision implementation used for the Humanoid Robot Running Competition.
 class RunVision:
 # --- Class initializer ---------------------------------------------------------------------------
     
-    def __init__ (self, blur=51, show=True, radius=10, threshold=10, scale=1, video=0):
+    def __init__ (self, blur=51, show=True, radius=10, threshold=10, scale=1, video=0, tracking=True, misses=5):
         # Vars used through the entire application.
         # Limits for color segmentation of the main running task.
         self.main_lower = np.array([255, 255, 255])
@@ -33,14 +143,26 @@ class RunVision:
         self.pos = (None, None)
         # Radius used to select the colors for segmentation.
         self.rad = radius
+        # Weights of the pixels around a click (gaussian, sigma^2 = 9), computed once.
+        offsets = np.arange(self.rad) - int(self.rad/2)
+        self.kernel = np.exp(-(offsets[:, np.newaxis]**2 + offsets[np.newaxis, :]**2) / 18.0)
         # Threshold from the mean color for segmentation.
         self.thrs = threshold
         # Screen scalation factor.
         self.scl = scale
 
-        # Load Camera
-        self.cap = cv2.VideoCapture(video)
-        # self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 0)
+        # Segmentation of all the challenge colors, shared by the calibrations and the detectors.
+        self.classes = ColorClasses()
+        # Class plane of the current frame, computed once.
+        self.bits = None
+
+        # Tracking mode: after finding the track or the stripe, only a region around it is processed.
+        self.tracking = tracking
+        self.main_tracker = Tracker(misses)
+        self.step_tracker = Tracker(misses)
+
+        # Load Camera, captured on a separate thread (newest frame for cameras, every frame for files).
+        self.cap = Capture(video)
 
 # --- This method resets the segmentions limits ---------------------------------------------------
     
@@ -57,15 +179,59 @@ class RunVision:
 
 # --- Function that captures frames and applies segmentation --------------------------------------
     
-    def capture(self):
+    # full=False leaves the blur and the HSV conversion to region(), only where they are needed.
+    def capture(self, full=True):
         try:
             # self.img = cv2.imread('zxcvb.jpg') # Get image from camera
-            _, self.img = self.cap.read()
-            self.imgblur = cv2.medianBlur(self.img, self.blur) # Blurs image
-            self.hsv = cv2.cvtColor(self.imgblur, cv2.COLOR_BGR2HSV) # Convert to HSV
+            _, self.img = self.cap.read() # Newest frame, kept by the capture until the next read
+            self.imgblur = None
+            self.hsv = None
+            self.bits = None
+            if full:
+                self.imgblur = cv2.medianBlur(self.img, self.blur) # Blurs image
+                self.hsv = cv2.cvtColor(self.imgblur, cv2.COLOR_BGR2HSV) # Convert to HSV
         except:
             print "Error on frame initialization."
 
+# --- HSV image of a region (x0, y0, x1, y1) of the frame, or of the full frame for None ----------
+
+    def region(self, roi):
+        if self.hsv is None and (roi is None or not self.tracking):
+            # Full frame search: computed once per frame and shared by all the segmentations.
+            self.imgblur = cv2.medianBlur(self.img, self.blur)
+            self.hsv = cv2.cvtColor(self.imgblur, cv2.COLOR_BGR2HSV)
+        if roi is None or not self.tracking:
+            return self.hsv, (0, 0)
+        x0, y0, x1, y1 = roi
+        if self.hsv is not None:
+            return self.hsv[y0:y1, x0:x1], (x0, y0)
+        # Blurs a border of half the kernel around the region, so it matches the full frame blur.
+        b = self.blur / 2
+        h, w = self.img.shape[:2]
+        bx0, by0, bx1, by1 = max(0, x0 - b), max(0, y0 - b), min(w, x1 + b), min(h, y1 + b)
+        blur = cv2.medianBlur(self.img[by0:by1, bx0:bx1], self.blur)
+        return cv2.cvtColor(blur[y0-by0:y1-by0, x0-bx0:x1-bx0], cv2.COLOR_BGR2HSV), (x0, y0)
+
+# --- Class plane of a region (x0, y0, x1, y1) of the frame, or of the full frame for None --------
+
+    def segment(self, roi):
+        # The calibration changes the limits at any time; the table follows them.
+        if self.classes.update({ColorClasses.MAIN: (self.main_lower, self.main_upper),
+                                ColorClasses.STEP: (self.step_lower, self.step_upper),
+                                ColorClasses.SWERVE: (self.swerve_lower, self.swerve_upper)}):
+            self.bits = None
+        if self.bits is None and (roi is None or not self.tracking):
+            # Full frame: computed once per frame (and per calibration change) for all the classes.
+            hsv, _ = self.region(None)
+            self.bits = self.classes.apply(hsv)
+        if roi is None or not self.tracking:
+            return self.bits, (0, 0)
+        x0, y0, x1, y1 = roi
+        if self.bits is not None:
+            return self.bits[y0:y1, x0:x1], (x0, y0)
+        hsv, offset = self.region(roi)
+        return self.classes.apply(hsv), offset
+
 # --- Mouse Events --------------------------------------------------------------------------------
 
     def Segment(self, event, x, y, flags, param):
@@ -73,71 +239,48 @@ class RunVision:
         if event == cv2.EVENT_MOUSEMOVE:
             self.pos = (int(x / self.scl), int(y / self.scl))
 
-        # Executed when a click happens
-        if event == cv2.EVENT_LBUTTONDOWN:
+        # Samples on each click, and while the button is held down over the color (drag).
+        if event == cv2.EVENT_LBUTTONDOWN or (event == cv2.EVENT_MOUSEMOVE and flags & cv2.EVENT_FLAG_LBUTTON):
             # Gets x and y from scaled image.
             x = int(x / self.scl)
             y = int(y / self.scl)
 
-            # Vector with the weights.
-            P = np.array([])
-            # Vector with the weighed sum of the HSV values of the point.
-            hM = np.array([])
-            sM = np.array([])
-            vM = np.array([])
+            # Weighed mean of the HSV values around the point.
+            mean = self.sample(x, y)
+            if mean is None:
+                return
 
-            # Iterates through all points around the click to compute their weighs.
-            for i in range(self.rad):
-                for j in range(self.rad):
-                    try:
-                        # Relative x and y positions.
-                        ai = x + i - int(self.rad/2)
-                        aj = y + j - int(self.rad/2)
-                        # Computes the weight.
-                        aP = exp(-(pow(x-ai,2)+pow(y-aj,2))/18)
-                        # Gets the HSV values from the point.
-                        aC = self.hsv[aj][ai]
-                        # Saves everything on the vectors.
-                        P = np.append(P, aP)
-                        hM = np.append(hM, aC[0] * aP)
-                        sM = np.append(sM, aC[1] * aP)
-                        vM = np.append(vM, aC[2] * aP)
-                    except:
-                        pass
-
-            # Computes the normalizing factor.
-            N = np.sum(P)
-            # Computes the weighed sum of all HSV values.
-            mH = np.sum(hM)
-            mS = np.sum(sM)
-            mV = np.sum(vM)
-
-            # Refreshs the values for the Main Challenge Segmentation.
+            # Limits of the challenge being calibrated.
             if param == 'MAIN':
-                self.main_upper[0] = int(max(min(mH/N + self.thrs, 255), self.main_upper[0]))
-                self.main_lower[0] = int(min(max(mH/N - self.thrs, 0), self.main_lower[0]))
-                self.main_upper[1] = int(max(min(mS/N + self.thrs, 255), self.main_upper[1]))
-                self.main_lower[1] = int(min(max(mS/N - self.thrs, 0), self.main_lower[1]))
-                self.main_upper[2] = int(max(min(mV/N + self.thrs, 255), self.main_upper[2]))
-                self.main_lower[2] = int(min(max(mV/N - self.thrs, 0), self.main_lower[2]))
-
-            # Refreshs the values for the Step Challenge Segmentation.
-            if param == 'STEP':
-                self.step_upper[0] = int(max(min(mH/N + self.thrs, 255), self.step_upper[0]))
-                self.step_lower[0] = int(min(max(mH/N - self.thrs, 0), self.step_lower[0]))
-                self.step_upper[1] = int(max(min(mS/N + self.thrs, 255), self.step_upper[1]))
-                self.step_lower[1] = int(min(max(mS/N - self.thrs, 0), self.step_lower[1]))
-                self.step_upper[2] = int(max(min(mV/N + self.thrs, 255), self.step_upper[2]))
-                self.step_lower[2] = int(min(max(mV/N - self.thrs, 0), self.step_lower[2]))
-
-            # Refreshs the values for the Swerve Challenge Segmentation.
-            if param == 'SWERVE':
-                self.swerve_upper[0] = int(max(min(mH/N + self.thrs, 255), self.swerve_upper[0]))
-                self.swerve_lower[0] = int(min(max(mH/N - self.thrs, 0), self.swerve_lower[0]))
-                self.swerve_upper[1] = int(max(min(mS/N + self.thrs, 255), self.swerve_upper[1]))
-                self.swerve_lower[1] = int(min(max(mS/N - self.thrs, 0), self.swerve_lower[1]))
-                self.swerve_upper[2] = int(max(min(mV/N + self.thrs, 255), self.swerve_upper[2]))
-                self.swerve_lower[2] = int(min(max(mV/N - self.thrs, 0), self.swerve_lower[2]))
+                lower, upper = self.main_lower, self.main_upper
+            elif param == 'STEP':
+                lower, upper = self.step_lower, self.step_upper
+            elif param == 'SWERVE':
+                lower, upper = self.swerve_lower, self.swerve_upper
+            else:
+                return
+
+            # Widens the limits to hold the new sample, in place: the same cost whatever the number of samples.
+            np.maximum(upper, np.minimum(mean + self.thrs, 255).astype(upper.dtype), out=upper)
+            np.minimum(lower, np.maximum(mean - self.thrs, 0).astype(lower.dtype), out=lower)
+
+# --- Weighed mean of the HSV values in a window around a point -----------------------------------
+
+    def sample(self, x, y):
+        if self.hsv is None:
+            return None
+        h, w = self.hsv.shape[:2]
+        # Window of rad x rad pixels around the point, clipped to the frame.
+        x0 = x - int(self.rad/2)
+        y0 = y - int(self.rad/2)
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x0 + self.rad, w), min(y0 + self.rad, h)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return None
+        # Pixels of the window and the weights of the same pixels.
+        window = self.hsv[cy0:cy1, cx0:cx1].reshape(-1, 3)
+        weights = self.kernel[cy0-y0:cy1-y0, cx0-x0:cx1-x0].ravel()
+        return weights.dot(window) / weights.sum()
 
 # --- Calibration of Main Challenge ---------------------------------------------------------------
 
@@ -155,8 +298,9 @@ class RunVision:
             else:
                 z -= 1
             try:    
-                # Generates a mask from the hsv image.
-                mask = cv2.inRange(self.hsv, self.main_lower, self.main_upper)
+                # Gets the mask from the class plane, recomputed only for new frames or limits.
+                bits, _ = self.segment(None)
+                mask = self.classes.mask(bits, ColorClasses.MAIN)
                 # Inverts mask.
                 nmask = cv2.bitwise_not(mask)
                 # Paints the mask into the image.
@@ -224,8 +368,9 @@ class RunVision:
             else:
                 z -= 1
             try:
-                # Generates a mask from the hsv image.
-                mask = cv2.inRange(self.hsv, self.step_lower, self.step_upper)
+                # Gets the mask from the class plane, recomputed only for new frames or limits.
+                bits, _ = self.segment(None)
+                mask = self.classes.mask(bits, ColorClasses.STEP)
                 # Inverts mask.
                 nmask = cv2.bitwise_not(mask)
                 # Paints the mask into the image.
@@ -295,8 +440,9 @@ class RunVision:
             else:
                 z -= 1
             try:
-                # Generates a mask from the hsv image.
-                mask = cv2.inRange(self.hsv, self.swerve_lower, self.swerve_upper)
+                # Gets the mask from the class plane, recomputed only for new frames or limits.
+                bits, _ = self.segment(None)
+                mask = self.classes.mask(bits, ColorClasses.SWERVE)
                 # Inverts mask.
                 nmask = cv2.bitwise_not(mask)
                 # Paints the mask into the image.
@@ -374,11 +520,17 @@ class RunVision:
 # --- Running segmentation of the Main Challenge --------------------------------------------------
 
     def MainRunning(self, res):
+        # No frame from the camera (capture timed out).
+        if self.img is None:
+            return -1, -1
+        # Region predicted from the last frames, None for the full frame.
+        roi = self.main_tracker.Predict(self.img.shape)
         try:
-            # Generates a mask from the hsv image.
-            mask = cv2.inRange(self.hsv, self.main_lower, self.main_upper)
-            # Finds the contours on the mask.
-            ret = cv2.findContours(mask,cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE)
+            # Gets the class plane of the region and the mask of this challenge.
+            bits, offset = self.segment(roi)
+            mask = self.classes.mask(bits, ColorClasses.MAIN)
+            # Finds the contours on the mask, in frame coordinates.
+            ret = cv2.findContours(mask,cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE,offset=offset)
             if len(ret) == 3:
                 _, contours, _ = ret
             elif len(ret) == 2:
@@ -396,26 +548,38 @@ class RunVision:
             # Computes the centroid of the contour.
             cx = int(M['m10']/M['m00'])
             cy = int(M['m01']/M['m00'])            
+            # Refreshes the tracking with the contour found.
+            self.main_tracker.Update(cv2.boundingRect(cnt))
 
             try:
                 # Draws a circle in the middle of the contour.
                 cv2.circle(res, (cx, cy), int(len(res)/30), [0,255,0], -1)
+                # Draws the region searched.
+                if roi is not None:
+                    cv2.rectangle(res, roi[:2], roi[2:], [0,255,0], 1)
             except:
                 pass
 
             # Return a value
             return cx, cy
         except:
+            self.main_tracker.Update(None)
             return -1, -1
 
 # --- Running segmentation of the Step Challenge --------------------------------------------------
 
     def StepRunning(self, res):
+        # No frame from the camera (capture timed out).
+        if self.img is None:
+            return -1, -1, 0
+        # Region predicted from the last frames, None for the full frame.
+        roi = self.step_tracker.Predict(self.img.shape)
         try:
-            # Generates a mask from the hsv image.
-            mask = cv2.inRange(self.hsv, self.step_lower, self.step_upper)
-            # Finds the contours on the mask.
-            ret = cv2.findContours(mask,cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE)
+            # Gets the class plane of the region and the mask of this challenge.
+            bits, offset = self.segment(roi)
+            mask = self.classes.mask(bits, ColorClasses.STEP)
+            # Finds the contours on the mask, in frame coordinates.
+            ret = cv2.findContours(mask,cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE,offset=offset)
             if len(ret) == 3:
                 _, contours, _ = ret
             elif len(ret) == 2:
@@ -437,24 +601,31 @@ class RunVision:
             b = 2 * (M['m11']/M['m00'] - cx * cy)
             c = M['m02']/M['m00'] - cy * cy
             theta = atan2(b,(a-c))/2
+            # Refreshes the tracking with the contour found.
+            self.step_tracker.Update(cv2.boundingRect(cnt))
             
             try:
                 # Draws a circle in the middle of the contour.
                 cv2.circle(res, (int(cx), int(cy)), int(len(res)/30), [255,255,0], -1)
+                # Draws the region searched.
+                if roi is not None:
+                    cv2.rectangle(res, roi[:2], roi[2:], [255,255,0], 1)
             except:
                 pass
 
             # Return a value
             return cx, cy, theta
         except:
+            self.step_tracker.Update(None)
             return -1, -1, 0
 
 # --- Running segmentation of the Swerve Challenge ------------------------------------------------
 
     def SwerveRunning(self, res):
         try:
-            # Generates a mask from the hsv image.
-            mask = cv2.inRange(self.hsv, self.swerve_lower, self.swerve_upper)
+            # The scanlines cross the whole frame, so there is no region to track.
+            bits, _ = self.segment(None)
+            mask = self.classes.mask(bits, ColorClasses.SWERVE)
             
             # Divides the image into 15 scanlines.
             dx = int(len(res[0])/30)
@@ -533,8 +704,11 @@ class RunVision:
             cv2.namedWindow('Running')
 
         while True:
-            # Captures a camera frame.
-            self.capture()
+            # Captures a camera frame; the hsv image is computed by region(), where it is needed.
+            self.capture(full=False)
+            if self.img is None:
+                print "No frame from the camera."
+                continue
             # Makes a image copy.
             if image:
                 res = cv2.repeat(self.img, 1, 1)
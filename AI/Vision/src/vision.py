@@ -59,8 +59,11 @@ W = (-1, -1)
 mS = 0
 
 while True:
-    # Capture a frame from the camera.
-    main.capture()
+    # Capture a frame from the camera (the segmentation converts only the regions it tracks).
+    main.capture(full=False)
+    if main.img is None:
+        print "No frame from the camera."
+        continue
 
     # Copies the frame.
     if args.show:
@@ -23,6 +23,16 @@ sudo echo "starting all processes"
         gnome-terminal --title="DECISION" -x sh -c './start_decision.sh' &
     fi
 
+    if [ ! "$(pidof -x start_localization.sh)" ] 
+    then
+        gnome-terminal --title="LOCALIZATION" -x sh -c './start_localization.sh' &
+    fi
+
+    if [ ! "$(pidof -x start_recorder.sh)" ] 
+    then
+        gnome-terminal --title="RECORDER" -x sh -c './start_recorder.sh' &
+    fi
+
     if [ ! "$(pidof control)" ] 
     then
        gnome-terminal --title="CONTROL" -x sh -c 'echo 123456 | sudo -S ./start_control.sh' &
@@ -0,0 +1,7 @@
+#!/bin/bash
+#!/RoboFEI-HT/build/bin
+
+echo "starting localization"
+cd ..
+cd Localization/src/
+python localization.py
@@ -0,0 +1,7 @@
+#!/bin/bash
+#!/RoboFEI-HT/build/bin
+
+echo "starting blackboard recorder"
+cd ..
+cd Blackboard/src/
+python recorder.py
@@ -22,6 +22,11 @@ if [ "$(pidof -x start_decision.sh)" ]
 then
     kill $(pidof -x start_decision.sh)
 fi
+
+if [ "$(pidof -x start_localization.sh)" ]
+then
+    kill $(pidof -x start_localization.sh)
+fi
     
 if [ "$(pidof -x start_control.sh)" ]
 then
@@ -64,6 +69,12 @@ do
         echo Iniciando decision
     fi
 
+    if [ ! "$(pidof -x start_localization.sh)" ] 
+    then
+        screen -d -m -S localization ./start_localization.sh
+        echo Iniciando localization
+    fi
+
     if [ ! "$(pidof -x start_control.sh)" ] 
     then
         screen -d -m -S control ./start_control.sh